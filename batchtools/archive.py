@@ -0,0 +1,115 @@
+"""
+Durable, compressed copies of pod logs.
+
+Every container's log is written to <directory>/<pod>.<container>.log.gz
+with a timestamp on each line, and described in <directory>/logs-index.json
+so that the logs of a finished job can be found without asking the API
+server, which forgets the pods once the job is deleted.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+
+import gzip
+import json
+import os
+
+from .backend import ApiError
+from .backend import get_backend
+from .logs import LOG_CHUNK_SIZE
+from .records import PodRecord
+from .records import fetch_pods
+
+
+INDEX_FILE = "logs-index.json"
+
+
+def archive_file_name(pod_name: str, container: str) -> str:
+    return f"{pod_name}.{container}.log.gz"
+
+
+def archive_container_log(pod_name: str, container: str, path: str) -> dict[str, Any]:
+    """
+    Stream one container's log through gzip into path. Returns the size of
+    the log and the timestamps of its first and last lines.
+    """
+    size = 0
+    first_ts: str | None = None
+    last_ts: str | None = None
+    at_line_start = True
+    lines = get_backend().stream_logs(
+        pod_name, container=container, timestamps=True, chunk_size=LOG_CHUNK_SIZE
+    )
+    with gzip.open(path, "wb") as out:
+        for chunk in lines:
+            if at_line_start:
+                ts = chunk.partition(b" ")[0].decode(errors="replace")
+                first_ts = first_ts or ts
+                last_ts = ts
+            at_line_start = chunk.endswith(b"\n")
+            size += len(chunk)
+            out.write(chunk)
+    return {"bytes": size, "first_timestamp": first_ts, "last_timestamp": last_ts}
+
+
+def archive_pod_logs(pod: PodRecord, directory: str) -> list[dict[str, Any]]:
+    """Archive the log of every container of a pod into directory."""
+    os.makedirs(directory, exist_ok=True)
+    entries: list[dict[str, Any]] = []
+    for container in pod.containers:
+        file_name = archive_file_name(pod.name, container)
+        entry = {
+            "pod": pod.name,
+            "namespace": pod.namespace,
+            "job": pod.job,
+            "node": pod.node,
+            "phase": pod.phase,
+            "container": container,
+            "file": file_name,
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            entry |= archive_container_log(
+                pod.name, container, os.path.join(directory, file_name)
+            )
+        except ApiError as e:
+            entry["error"] = str(e)
+        entries.append(entry)
+    return entries
+
+
+def read_index(directory: str) -> list[dict[str, Any]]:
+    """Return the entries of the log index in directory, if there is one."""
+    try:
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            return json.load(f)["logs"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def update_index(directory: str, entries: Iterable[dict[str, Any]]) -> None:
+    """
+    Add entries to the log index in directory, replacing older entries for
+    the same container. The index is replaced atomically.
+    """
+    new = {(e["pod"], e["container"]): e for e in entries}
+    logs = [e for e in read_index(directory) if (e["pod"], e["container"]) not in new]
+    logs.extend(new.values())
+
+    path = os.path.join(directory, INDEX_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"logs": logs}, f, indent=2)
+        f.write("\n")
+    os.replace(f"{path}.tmp", path)
+
+
+def archive_job_logs(job_name: str, directory: str) -> list[dict[str, Any]]:
+    """Archive the logs of all pods of a job into directory and index them."""
+    entries: list[dict[str, Any]] = []
+    for pod in fetch_pods(labels={"job-name": job_name}):
+        entries.extend(archive_pod_logs(pod, directory))
+    if entries:
+        update_index(directory, entries)
+    return entries
@@ -0,0 +1,994 @@
+# pyright: reportExplicitAny=false, reportAny=false
+"""
+Access to the Kubernetes API for all batchtools commands.
+
+There are two implementations of the Backend interface:
+
+- RestBackend talks to the API server directly, reusing a small pool of
+  keep-alive HTTPS connections and the credentials from the kubeconfig.
+- OcBackend goes through openshift_client, which runs the oc binary for
+  every call. It is used when the kubeconfig cannot be used directly (for
+  example, when it relies on an exec credential plugin).
+
+Set BATCHTOOLS_BACKEND to "rest" or "oc" to force one or the other.
+"""
+
+from collections.abc import Generator
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import NamedTuple
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+import abc
+import base64
+import functools
+import gzip
+import http.client
+import json
+import os
+import queue
+import ssl
+import subprocess
+import tempfile
+
+if TYPE_CHECKING:
+    # openshift_client is slow to import, so it is only loaded by the code
+    # paths that need it
+    import openshift_client as oc
+
+
+# (API group path, namespaced) for every resource batchtools uses
+API_RESOURCES: dict[str, tuple[str, bool]] = {
+    "pods": ("api/v1", True),
+    "events": ("api/v1", True),
+    "jobs": ("apis/batch/v1", True),
+    "clusterqueues": ("apis/kueue.x-k8s.io/v1beta1", False),
+    "localqueues": ("apis/kueue.x-k8s.io/v1beta1", True),
+    "workloads": ("apis/kueue.x-k8s.io/v1beta1", True),
+}
+
+IN_CLUSTER_TOKEN = "/var/run/secrets/kubernetes.io/serviceaccount/token"
+IN_CLUSTER_CA = "/var/run/secrets/kubernetes.io/serviceaccount/ca.crt"
+IN_CLUSTER_NAMESPACE = "/var/run/secrets/kubernetes.io/serviceaccount/namespace"
+
+# connections kept open for reuse; more may be opened under load
+POOL_SIZE = 8
+# socket timeout for ordinary (non-streaming) requests
+REQUEST_TIMEOUT = 60
+# requests that may be sent again when we cannot tell whether the server
+# received them; a repeated POST could create a second object
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+# objects per page when listing; the same default as kubectl's --chunk-size
+PAGE_SIZE = 500
+# ask for list items with their metadata only
+PARTIAL_METADATA_LIST = (
+    "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+)
+
+
+class LogLimits(NamedTuple):
+    """Limits on the log the API server returns; None means no limit."""
+
+    # number of lines from the end of the log
+    tail: int | None = None
+    # only lines written in the last this many seconds
+    since: int | None = None
+    # stop after this many bytes
+    limit_bytes: int | None = None
+
+    def params(self) -> dict[str, str]:
+        """Query parameters of the pod log endpoint."""
+        params = {}
+        if self.tail is not None:
+            params["tailLines"] = str(self.tail)
+        if self.since is not None:
+            params["sinceSeconds"] = str(self.since)
+        if self.limit_bytes is not None:
+            params["limitBytes"] = str(self.limit_bytes)
+        return params
+
+    def oc_args(self) -> list[str]:
+        """The same limits as oc logs options."""
+        args = []
+        if self.tail is not None:
+            args.append(f"--tail={self.tail}")
+        if self.since is not None:
+            args.append(f"--since={self.since}s")
+        if self.limit_bytes is not None:
+            args.append(f"--limit-bytes={self.limit_bytes}")
+        return args
+
+
+NO_LOG_LIMITS = LogLimits()
+
+
+class ApiError(Exception):
+    """An API request failed."""
+
+    def __init__(self, msg: str, status: int | None = None):
+        super().__init__(msg)
+        self.status = status
+
+
+class WatchUnavailable(ApiError):
+    """Raised when a watch connection cannot be established."""
+
+
+def resource_name(kind: str) -> str:
+    """Map "pod", "Pod" or "pods" to the plural resource name "pods"."""
+    kind = kind.lower()
+    return kind if kind.endswith("s") else f"{kind}s"
+
+
+def label_selector(labels: dict[str, str | None]) -> str:
+    """
+    Build a label selector string. Like openshift_client, a value of None
+    selects on the label's existence: {"!name": None} requires the label and
+    {"name": None} requires its absence.
+    """
+    terms = []
+    for k, v in labels.items():
+        if v is not None:
+            terms.append(f"{k}={v}")
+        elif k.startswith("!"):
+            terms.append(k[1:])
+        else:
+            terms.append(f"!{k}")
+    return ",".join(terms)
+
+
+def field_selector(fields: dict[str, str]) -> str:
+    """Build a field selector string; a key starting with "!" negates it."""
+    return ",".join(
+        f"{k[1:]}!={v}" if k.startswith("!") else f"{k}={v}" for k, v in fields.items()
+    )
+
+
+def prune(obj: Any, paths: tuple[str, ...]) -> Any:
+    """
+    Return a copy of obj that keeps only the given dotted paths. Lists are
+    pruned element by element, so "spec.containers.name" keeps the name of
+    every container.
+    """
+    if isinstance(obj, list):
+        return [prune(item, paths) for item in obj]
+    if not isinstance(obj, dict) or "" in paths:
+        return obj
+    children: dict[str, list[str]] = {}
+    for path in paths:
+        head, _, rest = path.partition(".")
+        children.setdefault(head, []).append(rest)
+    return {k: prune(obj[k], tuple(rest)) for k, rest in children.items() if k in obj}
+
+
+class Backend(abc.ABC):
+    """Operations that batchtools commands perform against the cluster."""
+
+    name: str
+
+    @property
+    @abc.abstractmethod
+    def namespace(self) -> str: ...
+
+    @abc.abstractmethod
+    def list_objects(
+        self,
+        kind: str,
+        *,
+        labels: dict[str, str | None] | None = None,
+        fields: dict[str, str] | None = None,
+        all_namespaces: bool = False,
+        timeout: int | None = None,
+        trim: tuple[str, ...] | None = None,
+    ) -> "list[oc.APIObject]":
+        """
+        List objects of a kind, optionally filtered by labels and by field
+        selectors. If trim lists dotted paths (e.g. "spec.nodeName"), the
+        objects may be reduced to just those fields.
+        """
+
+    def iter_objects(
+        self,
+        kind: str,
+        *,
+        labels: dict[str, str | None] | None = None,
+        fields: dict[str, str] | None = None,
+        all_namespaces: bool = False,
+        timeout: int | None = None,
+        trim: tuple[str, ...] | None = None,
+    ) -> "Iterator[oc.APIObject]":
+        """
+        Like list_objects, but yield objects as they arrive. Backends that
+        can page through a collection hold only one page in memory.
+        """
+        yield from self.list_objects(
+            kind,
+            labels=labels,
+            fields=fields,
+            all_namespaces=all_namespaces,
+            timeout=timeout,
+            trim=trim,
+        )
+
+    def records(
+        self,
+        kind: str,
+        record_type: Any,
+        *,
+        labels: dict[str, str | None] | None = None,
+        fields: dict[str, str] | None = None,
+        all_namespaces: bool = False,
+        timeout: int | None = None,
+    ) -> Iterator[Any]:
+        """
+        Yield a compact record (see batchtools.records) for every object in
+        a listing.
+        """
+        for obj in self.iter_objects(
+            kind,
+            labels=labels,
+            fields=fields,
+            all_namespaces=all_namespaces,
+            timeout=timeout,
+        ):
+            yield record_type.from_object(obj)
+
+    @abc.abstractmethod
+    def get(self, kind: str, name: str) -> "oc.APIObject":
+        """Get a single object by name."""
+
+    @abc.abstractmethod
+    def create(self, body: dict[str, Any]) -> None:
+        """Create an object from its dict representation."""
+
+    @abc.abstractmethod
+    def delete(self, kind: str, name: str) -> None:
+        """Delete an object and, in the background, its dependents."""
+
+    @abc.abstractmethod
+    def delete_collection(self, kind: str, labels: dict[str, str | None]) -> list[str]:
+        """
+        Delete every object of a kind that matches the labels in a single
+        request, with background propagation. Returns the deleted names.
+        """
+
+    @abc.abstractmethod
+    def whoami(self) -> str:
+        """Return the name of the authenticated user."""
+
+    @abc.abstractmethod
+    def list_raw(self, kind: str, params: dict[str, str]) -> tuple[list[dict], str]:
+        """
+        List objects as dicts, together with the resourceVersion of the list,
+        which is where a subsequent watch starts.
+        """
+
+    @abc.abstractmethod
+    def watch(
+        self, kind: str, params: dict[str, str], resource_version: str, timeout: int
+    ) -> Iterator[tuple[str, dict]]:
+        """
+        Yield (event type, object) pairs for a collection, starting after
+        resource_version, until the server ends the watch after timeout
+        seconds. Raises WatchUnavailable if the watch cannot be established.
+        """
+
+    @abc.abstractmethod
+    def stream_logs(
+        self,
+        pod_name: str,
+        *,
+        container: str | None = None,
+        follow: bool = False,
+        timestamps: bool = False,
+        since_time: str | None = None,
+        limits: LogLimits = NO_LOG_LIMITS,
+        chunk_size: int,
+    ) -> Generator[bytes, None, None]:
+        """
+        Yield a pod's log line by line; lines longer than chunk_size are
+        split. since_time and limits.since must not be combined. Raises
+        ApiError if the stream breaks off.
+        """
+
+
+class OcBackend(Backend):
+    """Backend that runs oc through openshift_client for every request."""
+
+    name: str = "oc"
+
+    def __init__(self) -> None:
+        import openshift_client
+        from openshift_client.context import cur_context
+
+        self.oc = openshift_client
+        self.cur_context = cur_context
+
+    @property
+    def namespace(self) -> str:
+        return self.oc.get_project_name()
+
+    @contextmanager
+    def _errors(self):
+        try:
+            yield
+        except self.oc.OpenShiftPythonException as e:
+            raise ApiError(str(e)) from e
+
+    def list_objects(
+        self,
+        kind,
+        *,
+        labels=None,
+        fields=None,
+        all_namespaces=False,
+        timeout=None,
+        trim=None,
+    ):
+        kwargs: dict[str, Any] = {}
+        if labels:
+            kwargs["labels"] = labels
+        if fields:
+            kwargs["field_selectors"] = fields
+        if all_namespaces:
+            kwargs["all_namespaces"] = True
+        with self._errors():
+            if timeout:
+                with self.oc.timeout(timeout):
+                    return self.oc.selector(kind, **kwargs).objects()
+            return self.oc.selector(kind, **kwargs).objects()
+
+    def get(self, kind, name):
+        with self._errors():
+            return self.oc.selector(f"{kind}/{name}").object()
+
+    def create(self, body):
+        with self._errors():
+            self.oc.create(body)
+
+    def delete(self, kind, name):
+        with self._errors():
+            self.oc.selector(f"{kind}/{name}").delete()
+
+    def delete_collection(self, kind, labels):
+        cmd = [kind, f"--selector={label_selector(labels)}", "--cascade=background"]
+        with self._errors():
+            out = self.oc.invoke("delete", [*cmd, "--output=name"]).out()
+        # oc prints kind.group/name for every deleted object
+        return [line.rpartition("/")[2] for line in out.split()]
+
+    def whoami(self):
+        with self._errors():
+            return self.oc.invoke("whoami").out().strip()
+
+    def _oc_lines(self, cmd: list[str], *, chunk_size: int = -1) -> Iterator[bytes]:
+        """
+        Run oc and yield its output line by line while it runs. A single
+        long-lived oc process holds the connection open.
+        """
+        try:
+            proc = subprocess.Popen(
+                [self.cur_context().get_oc_path(), *cmd],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except OSError as e:
+            raise ApiError(str(e))
+
+        assert proc.stdout is not None
+        finished = False
+        try:
+            while line := proc.stdout.readline(chunk_size):
+                yield line
+            finished = True
+        finally:
+            if not finished:
+                proc.kill()
+            _, err = proc.communicate()
+            if finished and proc.returncode != 0:
+                raise ApiError(err.decode(errors="replace").strip())
+
+    def list_raw(self, kind, params):
+        path = _collection_path(kind, self.namespace)
+        try:
+            body = b"".join(
+                self._oc_lines(["get", "--raw", f"{path}?{urlencode(params)}"])
+            )
+            objlist = json.loads(body)
+        except ApiError as e:
+            raise WatchUnavailable(str(e))
+        except ValueError as e:
+            raise WatchUnavailable(f"unexpected list response: {e}")
+        return objlist.get("items", []), objlist["metadata"]["resourceVersion"]
+
+    def watch(self, kind, params, resource_version, timeout):
+        path = _collection_path(kind, self.namespace)
+        query = urlencode(_watch_params(params, resource_version, timeout))
+        try:
+            for line in self._oc_lines(["get", "--raw", f"{path}?{query}"]):
+                if line.strip():
+                    event = json.loads(line)
+                    yield event["type"], event["object"]
+        except ApiError as e:
+            raise WatchUnavailable(str(e))
+
+    def stream_logs(
+        self,
+        pod_name,
+        *,
+        container=None,
+        follow=False,
+        timestamps=False,
+        since_time=None,
+        limits=NO_LOG_LIMITS,
+        chunk_size,
+    ):
+        cmd = ["logs", f"pod/{pod_name}"]
+        if follow:
+            cmd.append("-f")
+        if timestamps:
+            cmd.append("--timestamps")
+        if container:
+            cmd.append(f"--container={container}")
+        if since_time:
+            cmd.append(f"--since-time={since_time}")
+        cmd += limits.oc_args()
+        yield from self._oc_lines(cmd, chunk_size=chunk_size)
+
+
+class KubeConfig:
+    """Connection settings and credentials for talking to the API server."""
+
+    def __init__(
+        self,
+        server: str,
+        *,
+        namespace: str = "default",
+        token: str | None = None,
+        ca_file: str | None = None,
+        ca_data: str | None = None,
+        cert_file: str | None = None,
+        key_file: str | None = None,
+        cert_data: bytes | None = None,
+        key_data: bytes | None = None,
+        insecure: bool = False,
+    ) -> None:
+        self.server = server.rstrip("/")
+        self.namespace = namespace
+        self.token = token
+        self.ca_file = ca_file
+        self.ca_data = ca_data
+        self.cert_file = cert_file
+        self.key_file = key_file
+        self.cert_data = cert_data
+        self.key_data = key_data
+        self.insecure = insecure
+
+    @classmethod
+    def load(cls) -> "KubeConfig | None":
+        """
+        Read the current context from $KUBECONFIG (or ~/.kube/config). When
+        KUBECONFIG is unset and there is no config file, use the in-cluster
+        service account. Returns None if the credentials are not something we
+        can use without oc, such as an exec plugin.
+        """
+        env = os.environ.get("KUBECONFIG")
+        paths = env.split(os.pathsep) if env else [os.path.expanduser("~/.kube/config")]
+        for path in paths:
+            if path and os.path.isfile(path):
+                return cls.from_file(path)
+        if env is None:
+            return cls.in_cluster()
+        return None
+
+    @classmethod
+    def from_file(cls, path: str) -> "KubeConfig | None":
+        import yaml
+
+        try:
+            with open(path) as f:
+                config = yaml.safe_load(f)
+        except (OSError, yaml.YAMLError):
+            return None
+        if not isinstance(config, dict):
+            return None
+
+        def named(section: str, name: str | None) -> dict[str, Any]:
+            for entry in config.get(section) or []:
+                if entry.get("name") == name:
+                    return entry.get(section[:-1]) or {}
+            return {}
+
+        context = named("contexts", config.get("current-context"))
+        cluster = named("clusters", context.get("cluster"))
+        user = named("users", context.get("user"))
+        if not cluster.get("server"):
+            return None
+        if "exec" in user or "auth-provider" in user:
+            return None
+
+        base = os.path.dirname(os.path.abspath(path))
+
+        def relative(p: str | None) -> str | None:
+            return os.path.join(base, p) if p else None
+
+        def decoded(data: str | None) -> bytes | None:
+            return base64.b64decode(data) if data else None
+
+        token = user.get("token")
+        if not token and user.get("tokenFile"):
+            with open(relative(user["tokenFile"]) or "") as f:
+                token = f.read().strip()
+
+        ca_data = decoded(cluster.get("certificate-authority-data"))
+        return cls(
+            cluster["server"],
+            namespace=context.get("namespace") or "default",
+            token=token,
+            ca_file=relative(cluster.get("certificate-authority")),
+            ca_data=ca_data.decode() if ca_data else None,
+            cert_file=relative(user.get("client-certificate")),
+            key_file=relative(user.get("client-key")),
+            cert_data=decoded(user.get("client-certificate-data")),
+            key_data=decoded(user.get("client-key-data")),
+            insecure=bool(cluster.get("insecure-skip-tls-verify")),
+        )
+
+    @classmethod
+    def in_cluster(cls) -> "KubeConfig | None":
+        host = os.environ.get("KUBERNETES_SERVICE_HOST")
+        port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+        if not host or not os.path.isfile(IN_CLUSTER_TOKEN):
+            return None
+        with open(IN_CLUSTER_TOKEN) as f:
+            token = f.read().strip()
+        namespace = "default"
+        if os.path.isfile(IN_CLUSTER_NAMESPACE):
+            with open(IN_CLUSTER_NAMESPACE) as f:
+                namespace = f.read().strip()
+        if ":" in host:
+            host = f"[{host}]"
+        return cls(
+            f"https://{host}:{port}",
+            namespace=namespace,
+            token=token,
+            ca_file=IN_CLUSTER_CA if os.path.isfile(IN_CLUSTER_CA) else None,
+        )
+
+    def ssl_context(self) -> ssl.SSLContext:
+        ctx = ssl.create_default_context(cafile=self.ca_file, cadata=self.ca_data)
+        if self.insecure:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        if self.cert_file:
+            ctx.load_cert_chain(self.cert_file, self.key_file)
+        elif self.cert_data:
+            # the ssl module can only load client certificates from files
+            with tempfile.TemporaryDirectory() as tmp:
+                cert = os.path.join(tmp, "cert.pem")
+                key = os.path.join(tmp, "key.pem")
+                for path, data in ((cert, self.cert_data), (key, self.key_data)):
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data or b"")
+                ctx.load_cert_chain(cert, key if self.key_data else None)
+        return ctx
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections to one API server. A connection is taken from the
+    pool for the duration of a request and put back once its response has
+    been read completely, so concurrent callers each get their own.
+    """
+
+    def __init__(self, config: KubeConfig, size: int = POOL_SIZE) -> None:
+        url = urlsplit(config.server)
+        self.scheme = url.scheme
+        self.host = url.hostname or "localhost"
+        self.port = url.port
+        self.ssl_context = config.ssl_context() if url.scheme == "https" else None
+        self.idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(size)
+
+    def new_connection(self) -> http.client.HTTPConnection:
+        if self.ssl_context is not None:
+            return http.client.HTTPSConnection(
+                self.host,
+                self.port,
+                timeout=REQUEST_TIMEOUT,
+                context=self.ssl_context,
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+
+    def acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Return a connection, and whether it was reused from the pool."""
+        try:
+            return self.idle.get_nowait(), True
+        except queue.Empty:
+            return self.new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RestBackend(Backend):
+    """Backend that talks to the API server over pooled HTTP connections."""
+
+    name: str = "rest"
+
+    def __init__(self, config: KubeConfig) -> None:
+        self.config = config
+        self.pool = ConnectionPool(config)
+
+    @property
+    def namespace(self) -> str:
+        return self.config.namespace
+
+    def _headers(self, extra: dict[str, str] | None = None) -> dict[str, str]:
+        headers = {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "User-Agent": "batchtools",
+        }
+        if self.config.token:
+            headers["Authorization"] = f"Bearer {self.config.token}"
+        return headers | (extra or {})
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict[str, str],
+        timeout: float | None,
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Send a request and return the connection it went out on together with
+        the response. A connection that the server closed while idle in the
+        pool is replaced transparently: always if the request could not be
+        sent, and only for idempotent methods if the connection dropped while
+        we waited for the response, since the server may have acted on it.
+        """
+        while True:
+            conn, reused = self.pool.acquire()
+            try:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                conn.request(method, path, body=body, headers=headers)
+            except (http.client.RemoteDisconnected, ConnectionError) as e:
+                conn.close()
+                if not reused:
+                    raise ApiError(f"{method} {path}: {e}")
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise ApiError(f"{method} {path}: {e}")
+
+            try:
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError) as e:
+                conn.close()
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise ApiError(f"{method} {path}: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise ApiError(f"{method} {path}: {e}")
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, str] | None = None,
+        body: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = REQUEST_TIMEOUT,
+    ) -> Any:
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        data = json.dumps(body).encode() if body is not None else None
+        extra = {"Content-Type": "application/json"} if data is not None else {}
+        conn, resp = self._send(
+            method, path, data, self._headers(extra | (headers or {})), timeout
+        )
+        try:
+            payload = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise ApiError(f"{method} {path}: {e}")
+        self._finish(conn, resp)
+        if resp.getheader("Content-Encoding") == "gzip":
+            payload = gzip.decompress(payload)
+
+        if resp.status >= 400:
+            raise _status_error(resp.status, resp.reason, payload)
+        if not payload:
+            return None
+        return json.loads(payload)
+
+    @contextmanager
+    def stream(
+        self,
+        path: str,
+        *,
+        params: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Open a streaming GET request. The connection goes back to the pool if
+        the body was read to the end, and is closed otherwise.
+        """
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        # streamed bodies are consumed line by line, so leave them uncompressed
+        headers = self._headers({"Accept-Encoding": "identity"})
+        conn, resp = self._send("GET", path, None, headers, timeout)
+        if resp.status >= 400:
+            payload = resp.read()
+            self._finish(conn, resp)
+            raise _status_error(resp.status, resp.reason, payload)
+        try:
+            yield resp
+        finally:
+            self._finish(conn, resp)
+
+    def _finish(
+        self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse
+    ) -> None:
+        """Return a connection to the pool if it can carry another request."""
+        if resp.isclosed() and not resp.will_close:
+            self.pool.release(conn)
+        else:
+            conn.close()
+
+    def _collection(self, kind: str, all_namespaces: bool = False) -> str:
+        return _collection_path(kind, None if all_namespaces else self.namespace)
+
+    def list_objects(
+        self,
+        kind,
+        *,
+        labels=None,
+        fields=None,
+        all_namespaces=False,
+        timeout=None,
+        trim=None,
+    ):
+        return list(
+            self.iter_objects(
+                kind,
+                labels=labels,
+                fields=fields,
+                all_namespaces=all_namespaces,
+                timeout=timeout,
+                trim=trim,
+            )
+        )
+
+    def iter_objects(
+        self,
+        kind,
+        *,
+        labels=None,
+        fields=None,
+        all_namespaces=False,
+        timeout=None,
+        trim=None,
+        page_size: int = PAGE_SIZE,
+    ):
+        import openshift_client as oc
+
+        for item in self._list_pages(
+            kind,
+            labels=labels,
+            fields=fields,
+            all_namespaces=all_namespaces,
+            timeout=timeout,
+            page_size=page_size,
+        ):
+            if trim:
+                # building models is the expensive part of a large listing
+                item = prune(item, trim)
+            yield oc.APIObject(dict_to_model=item)
+
+    def records(
+        self,
+        kind,
+        record_type,
+        *,
+        labels=None,
+        fields=None,
+        all_namespaces=False,
+        timeout=None,
+    ):
+        # records are built straight from the JSON, without models
+        headers = (
+            {"Accept": PARTIAL_METADATA_LIST} if record_type.METADATA_ONLY else None
+        )
+        for item in self._list_pages(
+            kind,
+            labels=labels,
+            fields=fields,
+            all_namespaces=all_namespaces,
+            timeout=timeout,
+            headers=headers,
+        ):
+            yield record_type.from_dict(item)
+
+    def _list_pages(
+        self,
+        kind: str,
+        *,
+        labels: dict[str, str | None] | None,
+        fields: dict[str, str] | None,
+        all_namespaces: bool,
+        timeout: int | None,
+        page_size: int = PAGE_SIZE,
+        headers: dict[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield the items of a collection, fetching page_size at a time."""
+        params = {"limit": str(page_size)}
+        if labels:
+            params["labelSelector"] = label_selector(labels)
+        if fields:
+            params["fieldSelector"] = field_selector(fields)
+        while True:
+            page = self.request(
+                "GET",
+                self._collection(kind, all_namespaces),
+                params=params,
+                headers=headers,
+                timeout=timeout or REQUEST_TIMEOUT,
+            )
+            yield from page.get("items", [])
+
+            token = (page.get("metadata") or {}).get("continue")
+            if not token:
+                return
+            params["continue"] = token
+
+    def get(self, kind, name):
+        import openshift_client as oc
+
+        obj = self.request("GET", f"{self._collection(kind)}/{name}")
+        return oc.APIObject(dict_to_model=obj)
+
+    def create(self, body):
+        self.request("POST", self._collection(body["kind"]), body=body)
+
+    def delete(self, kind, name):
+        self.request(
+            "DELETE",
+            f"{self._collection(kind)}/{name}",
+            body={"propagationPolicy": "Background"},
+        )
+
+    def delete_collection(self, kind, labels):
+        deleted = self.request(
+            "DELETE",
+            self._collection(kind),
+            params={"labelSelector": label_selector(labels)},
+            body={"propagationPolicy": "Background"},
+        )
+        # the response lists the objects that are being deleted
+        return [
+            (item.get("metadata") or {}).get("name", "")
+            for item in (deleted or {}).get("items", [])
+        ]
+
+    def whoami(self):
+        user = self.request("GET", "/apis/user.openshift.io/v1/users/~")
+        return user["metadata"]["name"]
+
+    def list_raw(self, kind, params):
+        objlist = self.request("GET", self._collection(kind), params=params)
+        return objlist.get("items", []), objlist["metadata"]["resourceVersion"]
+
+    def watch(self, kind, params, resource_version, timeout):
+        try:
+            with self.stream(
+                self._collection(kind),
+                params=_watch_params(params, resource_version, timeout),
+                # the server ends the watch after timeout seconds
+                timeout=timeout + REQUEST_TIMEOUT,
+            ) as resp:
+                while line := resp.readline():
+                    if line.strip():
+                        event = json.loads(line)
+                        yield event["type"], event["object"]
+        except ApiError as e:
+            raise WatchUnavailable(str(e), e.status)
+        except (OSError, http.client.HTTPException) as e:
+            raise WatchUnavailable(str(e))
+
+    def stream_logs(
+        self,
+        pod_name,
+        *,
+        container=None,
+        follow=False,
+        timestamps=False,
+        since_time=None,
+        limits=NO_LOG_LIMITS,
+        chunk_size,
+    ):
+        params = limits.params()
+        if container:
+            params["container"] = container
+        if follow:
+            params["follow"] = "true"
+        if timestamps:
+            params["timestamps"] = "true"
+        if since_time:
+            params["sinceTime"] = since_time
+        path = f"{self._collection('pods')}/{pod_name}/log"
+        try:
+            with self.stream(
+                path,
+                params=params,
+                timeout=None if follow else REQUEST_TIMEOUT,
+            ) as resp:
+                while line := resp.readline(chunk_size):
+                    yield line
+        except (OSError, http.client.HTTPException) as e:
+            raise ApiError(f"log stream for {pod_name} broke off: {e}")
+
+
+def _collection_path(kind: str, namespace: str | None) -> str:
+    resource = resource_name(kind)
+    group, namespaced = API_RESOURCES[resource]
+    if namespaced and namespace:
+        return f"/{group}/namespaces/{namespace}/{resource}"
+    return f"/{group}/{resource}"
+
+
+def _watch_params(
+    params: dict[str, str], resource_version: str, timeout: int
+) -> dict[str, str]:
+    return params | {
+        "watch": "1",
+        "resourceVersion": resource_version,
+        "allowWatchBookmarks": "true",
+        "timeoutSeconds": str(timeout),
+    }
+
+
+def _status_error(status: int, reason: str, payload: bytes) -> ApiError:
+    """Turn an error response, usually a v1 Status, into an ApiError."""
+    try:
+        message = json.loads(payload).get("message") or reason
+    except ValueError:
+        message = payload.decode(errors="replace").strip() or reason
+    return ApiError(f"{status} {message}", status)
+
+
+@functools.cache
+def get_backend() -> Backend:
+    """
+    Return the backend to use for this process. RestBackend is preferred
+    whenever the kubeconfig has credentials we can use directly.
+    """
+    choice = os.environ.get("BATCHTOOLS_BACKEND", "auto")
+    if choice == "oc":
+        return OcBackend()
+
+    config = KubeConfig.load()
+    if config is not None:
+        return RestBackend(config)
+    if choice == "rest":
+        raise ApiError("BATCHTOOLS_BACKEND=rest but no usable kubeconfig was found")
+    return OcBackend()
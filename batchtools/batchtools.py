@@ -1,28 +1,53 @@
 import argparse
+import importlib
 import sys
 
 from .basecommand import Command
 from .basecommand import SubParserFactory
-from .bj import ListJobsCommand
-from .bd import DeleteJobsCommand
-from .bl import LogsCommand
-from .bp import PrintJobsCommand
-from .bq import GpuQueuesCommand
-from .br import CreateJobCommand
-from .bps import ListPodsCommand
-from .helpers import is_logged_in
+
+
+# Command modules pull in the API client, so they are only imported for the
+# subcommand that is actually invoked. The help text here is what the global
+# --help shows for the commands that are not loaded.
+COMMANDS: dict[str, tuple[str, str]] = {
+    "bj": ("bj:ListJobsCommand", "Display the status of GPU jobs"),
+    "bl": ("bl:LogsCommand", "Display logs of specific pods"),
+    "bd": (
+        "bd:DeleteJobsCommand",
+        "Delete specified Kueue-managed GPU jobs, or all of yours if none are specified",
+    ),
+    "bp": ("bp:PrintJobsCommand", "Display the pod names of the specified batch jobs"),
+    "bq": (
+        "bq:GpuQueuesCommand",
+        "Display the status of the GPU queues for the cluster",
+    ),
+    "br": ("br:CreateJobCommand", "Create and submit a GPU batch job"),
+    "bps": ("bps:ListPodsCommand", "List active GPU pods per node"),
+    "bw": ("bw:WaitJobsCommand", "Wait for jobs to finish"),
+    "bhist": (
+        "bhist:HistoryCommand",
+        "Show queue wait and GPU usage statistics of past jobs",
+    ),
+}
+
+
+def load_command(name: str) -> type[Command]:
+    module_name, class_name = COMMANDS[name][0].split(":")
+    module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
 
 
 class BatchTools:
-    commands: dict[str, type[Command]]
+    commands: dict[str, tuple[str, str]] = COMMANDS
     parser: argparse.ArgumentParser
     subparsers: SubParserFactory
 
-    def __init__(self) -> None:
-        self.build_parser()
-
-    def build_parser(self) -> None:
-        self.commands = {}
+    def build_parser(self, selected: str | None = None) -> None:
+        """
+        Build the argument parser. Only the selected command is loaded and
+        gets its full set of options; every other command is registered with
+        just its name and help text.
+        """
         parser = self.parser = argparse.ArgumentParser(
             description="OpenShift CLI helper"
         )
@@ -36,34 +61,40 @@ class BatchTools:
             help="Increase verbosity of output",
         )
 
-        self.register(ListJobsCommand)
-        self.register(LogsCommand)
-        self.register(DeleteJobsCommand)
-        self.register(PrintJobsCommand)
-        self.register(GpuQueuesCommand)
-        self.register(CreateJobCommand)
-        self.register(ListPodsCommand)
-
-    def register(self, handler: type[Command]):
-        handler.build_parser(self.subparsers)
-        self.commands[handler.name] = handler
+        for name, (_, help_text) in self.commands.items():
+            if name == selected:
+                load_command(name).build_parser(self.subparsers)
+            else:
+                self.subparsers.add_parser(name, help=help_text)
 
     def parse(self, args: list[str] | None = None):
-        return self.parser.parse_args(args)
+        argv = sys.argv[1:] if args is None else args
+        # global options take no values, so the first positional argument
+        # names the command
+        selected = next((arg for arg in argv if not arg.startswith("-")), None)
+        self.build_parser(selected)
+        return self.parser.parse_args(argv)
+
+    def dispatch(self, parsed: argparse.Namespace):
+        load_command(parsed.cmd).run(parsed)  # pyright: ignore[reportAny]
 
     def run(self, args: list[str] | None = None):
-        parsed = self.parse(args)
-        self.commands[parsed.cmd].run(parsed)  # pyright: ignore[reportAny]
+        self.dispatch(self.parse(args))
 
 
 def main() -> None:
+    app = BatchTools()
+    parsed = app.parse()
+
+    # imported here so that --help never loads the API client
+    from .helpers import is_logged_in
+
     if not is_logged_in():
         sys.exit(
             "You are not logged in to the oc cli. Retrieve the token using 'oc login --web' or retrieving the login token from the openshift UI."
         )
 
-    app = BatchTools()
-    app.run()
+    app.dispatch(parsed)
 
 
 if __name__ == "__main__":
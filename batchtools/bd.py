@@ -1,26 +1,39 @@
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import cast
-import openshift_client as oc
+from .backend import ApiError
+from .backend import get_backend
 from .basecommand import Command, override
 from .basecommand import SubParserFactory
-from .helpers import oc_delete, is_kueue_managed_job
+from .helpers import is_kueue_managed_job
+from .helpers import job_owner
+from .helpers import owned_jobs_selector
+from .records import fetch_jobs
+
+
+# deletes of explicitly named jobs that are in flight at once
+DELETE_WORKERS = 8
 
 
 class DeleteJobsCommand(Command):
     """
     batchtools bd [job-name [job-name ...]]
 
-    Delete specified Kueue-managed GPU jobs, or all such jobs if none are specified.
+    Delete specified Kueue-managed GPU jobs, or all of your jobs if none are specified.
 
     Description:
-        Deletes only those Jobs that are both:
-          - named like your GPU jobs (name starts with 'job-'), and
-          - detected as Kueue-managed (via labels/Workload linkage).
+        Deletes only those Jobs that are detected as Kueue-managed (via
+        labels/Workload linkage). Without job names, your jobs, the
+        Kueue-managed jobs that br created for you (labeled
+        batchtools/owner), are deleted with a single request. Named jobs are
+        deleted concurrently.
     """
 
     name: str = "bd"
-    help: str = "Delete specified Kueue-managed GPU jobs, or all if none are specified"
+    help: str = (
+        "Delete specified Kueue-managed GPU jobs, or all of yours if none are specified"
+    )
 
     @classmethod
     @override
@@ -38,35 +51,53 @@ class DeleteJobsCommand(Command):
     def run(args: argparse.Namespace):
         args = cast(DeleteJobsCommand, args)
         try:
-            jobs = oc.selector("jobs").objects()
-            if not jobs:
-                print("No jobs found.")
-                return
+            if args.job_names:
+                delete_named_jobs(args.job_names)
+            else:
+                delete_owned_jobs()
+        except ApiError as e:
+            sys.exit(f"Error occurred while deleting jobs: {e}")
 
-            gpu_jobs = [job for job in jobs]
 
-            # only want to delete kueue jobs so filter for kueue jobs
-            kueue_gpu_jobs = [job for job in gpu_jobs if is_kueue_managed_job(job)]
+def delete_owned_jobs() -> None:
+    """Delete all of the user's Kueue-managed jobs with one request."""
+    print("No job names provided -> deleting all of your jobs:\n")
+    deleted = get_backend().delete_collection("jobs", owned_jobs_selector(job_owner()))
+    if not deleted:
+        print("You have no jobs to delete.")
+        return
+    print(f"Deleted {len(deleted)} job(s): {' '.join(sorted(deleted))}")
 
-            if not kueue_gpu_jobs:
-                print("No Kueue-managed GPU jobs to delete.")
-                return
 
-            if args.job_names:
-                # if jobs are specified, only delete specified jobs
-                allowed = {job.model.metadata.name for job in kueue_gpu_jobs}
-                for name in args.job_names:
-                    if name not in allowed:
-                        print(f"{name} is not a Kueue-managed GPU job; skipping.")
-                        continue
-                    oc_delete("job", name)
-                    print(f"Deleted job: {name}")
-            else:
-                print("No job names provided -> deleting all Kueue-managed GPU jobs:\n")
-                for job in kueue_gpu_jobs:
-                    name = job.model.metadata.name
-                    oc_delete("job", name)
-                    print(f"Deleted job: {name}")
+def delete_named_jobs(job_names: list[str]) -> None:
+    """Delete the named jobs concurrently, skipping those that are not Kueue-managed."""
+    jobs = list(fetch_jobs())
+    if not jobs:
+        print("No jobs found.")
+        return
 
-        except oc.OpenShiftPythonException as e:
-            sys.exit(f"Error occurred while deleting jobs: {e}")
+    # only want to delete kueue jobs so filter for kueue jobs
+    allowed = {job.name for job in jobs if is_kueue_managed_job(job)}
+    if not allowed:
+        print("No Kueue-managed GPU jobs to delete.")
+        return
+
+    names: list[str] = []
+    for name in dict.fromkeys(job_names):
+        if name in allowed:
+            names.append(name)
+        else:
+            print(f"{name} is not a Kueue-managed GPU job; skipping.")
+
+    backend = get_backend()
+    failed: list[str] = []
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+        futures = [pool.submit(backend.delete, "job", name) for name in names]
+        for name, future in zip(names, futures):
+            try:
+                future.result()
+            except ApiError as e:
+                failed.append(name)
+                print(f"Error occurred while deleting job/{name}: {e}")
+
+    print(f"Deleted {len(names) - len(failed)} job(s), {len(failed)} failed.")
@@ -0,0 +1,107 @@
+from typing import cast
+from typing_extensions import override
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from .basecommand import Command
+from .basecommand import SubParserFactory
+from .helpers import format_seconds
+from .helpers import parse_duration
+from .history import connect
+from .history import gpu_hours
+from .history import history_path
+from .history import queue_waits
+from .history import recent_jobs
+from .startup import percentile
+
+
+class HistoryCommandArgs(argparse.Namespace):
+    since: int = 30 * 24 * 60 * 60
+    jobs: int = 0
+
+
+class HistoryCommand(Command):
+    """
+    Report statistics about the jobs submitted with br from this machine:
+    the median and 95th percentile of the time jobs waited in the queue for
+    each GPU type, and the GPU-hours used per user and week.
+
+    The history is kept in a local database (see BATCHTOOLS_HISTORY) and is
+    read without contacting the cluster.
+
+    Example usages:
+
+    1. Statistics for the last week
+    $ bhist --since 7d
+
+    2. Also list the 20 most recent jobs
+    $ bhist --jobs 20
+    """
+
+    name: str = "bhist"
+    help: str = "Show queue wait and GPU usage statistics of past jobs"
+
+    @classmethod
+    @override
+    def build_parser(cls, subparsers: SubParserFactory):
+        p = super().build_parser(subparsers)
+        p.add_argument(
+            "--since",
+            type=parse_duration,
+            default=HistoryCommandArgs.since,
+            metavar="DURATION",
+            help="Only include jobs from the last DURATION (e.g. 7d, 12h), in seconds",
+        )
+        p.add_argument(
+            "--jobs",
+            type=int,
+            default=HistoryCommandArgs.jobs,
+            metavar="N",
+            help="Also list the N most recent jobs",
+        )
+        return p
+
+    @staticmethod
+    @override
+    def run(args: argparse.Namespace):
+        args = cast(HistoryCommandArgs, args)
+        since = time.time() - args.since
+        try:
+            with connect() as conn:
+                waits = queue_waits(conn, since)
+                usage = gpu_hours(conn, since)
+                jobs = recent_jobs(conn, args.jobs) if args.jobs > 0 else []
+        except (OSError, sqlite3.Error) as e:
+            sys.exit(f"Error occurred while reading {history_path()}: {e}")
+
+        if not waits and not usage and not jobs:
+            print("No jobs recorded in this period.")
+            return
+
+        print("Queue wait per GPU type:")
+        print(f"{'GPU':<10}{'JOBS':>6}{'P50':>12}{'P95':>12}")
+        for gpu, values in sorted(waits.items()):
+            print(
+                f"{gpu:<10}{len(values):>6}"
+                f"{format_seconds(percentile(values, 50)):>12}"
+                f"{format_seconds(percentile(values, 95)):>12}"
+            )
+
+        print("\nGPU-hours per user per week:")
+        print(f"{'WEEK':<10}{'USER':<32}{'GPU-HOURS':>10}")
+        for week, user, hours in usage:
+            print(f"{week:<10}{user or '-':<32}{hours:>10.2f}")
+
+        if jobs:
+            print("\nRecent jobs:")
+            print(f"{'JOB':<48}{'GPU':<6}{'PHASE':<10}{'WAIT':>10}{'RUN':>10}")
+            for name, gpu, phase, created, admitted, started, finished in jobs:
+                wait = max(0.0, admitted - created) if admitted and created else None
+                run = finished - started if finished and started else None
+                print(
+                    f"{name:<48}{gpu or '-':<6}{phase or '-':<10}"
+                    f"{format_seconds(wait):>10}{format_seconds(run):>10}"
+                )
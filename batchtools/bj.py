@@ -2,9 +2,10 @@ from typing_extensions import override
 
 import argparse
 import sys
-import openshift_client as oc
 
+from .backend import ApiError
 from .helpers import is_kueue_managed_job
+from .records import fetch_jobs
 from .basecommand import Command
 
 
@@ -31,7 +32,7 @@ class ListJobsCommand(Command):
         Display the status of GPU jobs using 'oc get jobs'.
         """
         try:
-            jobs = oc.selector("jobs").objects()
+            jobs = list(fetch_jobs())
             if not jobs:
                 print("No jobs found.")
                 return
@@ -42,7 +43,7 @@ class ListJobsCommand(Command):
             print(f"Found {len(managed)} job(s):\n")
 
             for job in managed:
-                print(f"- {job.model.metadata.name}")
+                print(f"- {job.name}")
 
-        except oc.OpenShiftPythonException as e:
+        except ApiError as e:
             sys.exit(f"Error occurred while retrieving jobs: {e}")
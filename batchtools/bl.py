@@ -1,18 +1,48 @@
 from typing_extensions import override
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO
+from typing import Any
 from typing import cast
 
+import itertools
+import os
+import shutil
 import sys
 import argparse
-import openshift_client as oc
+import tempfile
 
+from .archive import archive_pod_logs
+from .archive import update_index
+from .backend import NO_LOG_LIMITS
+from .backend import ApiError
+from .backend import LogLimits
 from .basecommand import Command
 from .basecommand import SubParserFactory
-from .helpers import pretty_print
+from .helpers import add_log_limit_arguments
+from .helpers import log_limits
 from .helpers import is_kueue_managed_pod
+from .helpers import kueue_job_index
+from .logs import LOG_CHUNK_SIZE
+from .logs import write_pod_logs
+from .records import PodRecord
+from .records import fetch_pods
+
+
+# log requests that are in flight at once
+LOG_WORKERS = 8
+# logs that are fetched but not yet printed are kept in memory up to this
+# size, and in a temporary file beyond it
+SPOOL_MEMORY = 256 * 1024
 
 
 class LogsCommandArgs(argparse.Namespace):
     pod_names: list[str] | None = None
+    tail: int | None = None
+    since: int | None = None
+    limit_bytes: int | None = None
+    save: bool = False
 
 
 class LogsCommand(Command):
@@ -36,6 +66,12 @@ class LogsCommand(Command):
             nargs="*",
             help="Optional list of pod names for which to display logs",
         )
+        add_log_limit_arguments(p)
+        p.add_argument(
+            "--save",
+            action="store_true",
+            help="Save compressed logs to jobs/<job-name>/ instead of printing them",
+        )
         return p
 
     @staticmethod
@@ -43,36 +79,114 @@ class LogsCommand(Command):
     def run(args: argparse.Namespace):
         args = cast(LogsCommandArgs, args)
         try:
-            pods = oc.selector("pods").objects()
+            if args.pod_names:
+                pods = fetch_pods()
+            else:
+                # only pods created by a job can belong to a Kueue-managed job
+                pods = fetch_pods(labels={"!job-name": None})
 
-            if not pods:
+            # pods arrive a page at a time; look at the first one before
+            # deciding there is anything to do
+            first = next(pods, None)
+            if first is None:
                 print("No pods to retrieve logs from.")
                 return
-
-            # dict of pod name and pod object
-            pod_dict: dict[str, oc.APIObject] = {
-                pod.model.metadata.name: pod for pod in pods
-            }
+            pods = itertools.chain([first], pods)
 
             # case where user provides pods
             if args.pod_names:
-                for name in args.pod_names:
+                # keep only the requested pods, not the whole listing
+                wanted = set(args.pod_names)
+                pod_dict: dict[str, PodRecord] = {
+                    pod.name: pod for pod in pods if pod.name in wanted
+                }
+                selected: list[PodRecord] = []
+                for name in dict.fromkeys(args.pod_names):
                     if name not in pod_dict:
                         print(f"{name} is not a valid pod. Logs cannot be retrieved.")
                         continue
-                    print(f"\nLogs for {name}:\n{'-' * 40}")
-                    print(pretty_print(pod_dict[name]))
+                    selected.append(pod_dict[name])
+                if args.save:
+                    save_logs(selected)
+                else:
+                    print_logs(selected, log_limits(args))
 
             else:
-                printed_any = False
-                for name, pod in pod_dict.items():
-                    if is_kueue_managed_pod(pod):
-                        printed_any = True
-                        print(f"\nLogs for {name}:\n{'-' * 40}")
-                        print(pretty_print(pod))
-
-                if not printed_any:
+                # one job listing instead of a job lookup per pod
+                jobs = kueue_job_index()
+                kueue_pods = [pod for pod in pods if is_kueue_managed_pod(pod, jobs)]
+                if not kueue_pods:
                     print("No Kueue-managed pods found")
-
-        except oc.OpenShiftPythonException as e:
+                    return
+                kueue_pods.sort(key=lambda pod: pod.name)
+                if args.save:
+                    save_logs(kueue_pods)
+                else:
+                    print_logs(kueue_pods, log_limits(args))
+
+        except ApiError as e:
             sys.exit(f"Error occurred while retrieving logs: {e}")
+
+
+def spool_logs(pod: PodRecord, limits: LogLimits = NO_LOG_LIMITS) -> IO[bytes]:
+    """
+    Write a pod's logs to a temporary file that stays in memory while it is
+    small, ready to be read back from the start.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+    write_pod_logs(pod, spool, limits=limits)
+    spool.seek(0)
+    return spool
+
+
+def print_logs(pods: list[PodRecord], limits: LogLimits = NO_LOG_LIMITS) -> None:
+    """
+    Fetch the logs of the pods through a bounded pool of workers and print
+    them in the given order. Each pod's logs are printed as soon as they and
+    those of all earlier pods have arrived. At most LOG_WORKERS pods are
+    fetched ahead of the one being printed, which bounds the spooled logs.
+    """
+    remaining = iter(pods)
+    in_flight: deque[tuple[PodRecord, Future[IO[bytes]]]] = deque()
+    with ThreadPoolExecutor(max_workers=LOG_WORKERS) as pool:
+
+        def fetch_next() -> None:
+            pod = next(remaining, None)
+            if pod is not None:
+                in_flight.append((pod, pool.submit(spool_logs, pod, limits)))
+
+        for _ in range(LOG_WORKERS):
+            fetch_next()
+        while in_flight:
+            pod, future = in_flight.popleft()
+            spool = future.result()
+            print(f"\nLogs for {pod.name}:\n{'-' * 40}", flush=True)
+            with spool:
+                shutil.copyfileobj(spool, sys.stdout.buffer, LOG_CHUNK_SIZE)
+            sys.stdout.buffer.flush()
+            fetch_next()
+
+
+def save_logs(pods: list[PodRecord], jobs_directory: str = "jobs") -> None:
+    """
+    Archive the logs of the pods into jobs/<job-name>/ (jobs/<pod-name>/ for
+    pods that do not belong to a job) and index them there.
+    """
+
+    def directory(pod: PodRecord) -> str:
+        return os.path.join(jobs_directory, pod.job or pod.name)
+
+    with ThreadPoolExecutor(max_workers=LOG_WORKERS) as pool:
+        results = pool.map(lambda pod: archive_pod_logs(pod, directory(pod)), pods)
+        by_directory: dict[str, list[dict[str, Any]]] = {}
+        for pod, entries in zip(pods, results):
+            by_directory.setdefault(directory(pod), []).extend(entries)
+            for entry in entries:
+                if "error" in entry:
+                    print(
+                        f"Error occurred while saving logs of {pod.name}: {entry['error']}"
+                    )
+
+    for path, entries in by_directory.items():
+        update_index(path, entries)
+        print(f"Saved logs to {path}/")
@@ -1,17 +1,23 @@
+from typing import Any
 from typing import cast
 from typing_extensions import override
+from collections import defaultdict
 
 import argparse
 import sys
 
-import openshift_client as oc
-
+from .backend import ApiError
 from .basecommand import Command
 from .basecommand import SubParserFactory
+from .records import fetch_jobs
+from .records import fetch_pods
+from .startup import format_breakdowns
+from .startup import startup_breakdowns
 
 
 class PrintJobsCommandArgs(argparse.Namespace):
     job_names: list[str] | None = None
+    timing: bool = False
 
 
 class PrintJobsCommand(Command):
@@ -20,6 +26,10 @@ class PrintJobsCommand(Command):
     specified then the pods of all current batch jobs will
     be displayed.
 
+    With --timing, show where the start-up time of every pod went (queue,
+    scheduling, image pull, context rsync and run), followed by percentiles
+    across all of them.
+
     See also:
         See repository README.md for more documentation and examples.
     """
@@ -34,6 +44,11 @@ class PrintJobsCommand(Command):
         p.add_argument(
             "job_names", nargs="*", help="Optional list of job names to display"
         )
+        p.add_argument(
+            "--timing",
+            action="store_true",
+            help="Show a start-up latency breakdown for the pods of the jobs",
+        )
         return p
 
     @staticmethod
@@ -41,33 +56,59 @@ class PrintJobsCommand(Command):
     def run(args: argparse.Namespace):
         args = cast(PrintJobsCommandArgs, args)
         try:
-            jobs = oc.selector("jobs").objects()
-            if not jobs:
+            job_dict = {job.name: job for job in fetch_jobs()}
+            if not job_dict:
                 print("No jobs found.")
                 return
 
-            job_dict = {job.model.metadata.name: job for job in jobs}
+            if args.timing:
+                print_startup_timing(args.job_names or None, job_dict)
+                return
+
+            # one listing for the pods of every job, rather than one per job
+            job_pods = pods_by_job()
 
             if args.job_names:
                 for name in args.job_names:
                     if name not in job_dict:
                         print(f"{name} does not exist; cannot fetch pod name.")
                         continue
-                    print_pods_for(name)
+                    print_pods_for(name, job_pods.get(name, []))
             else:
                 print("Displaying pods for all current batch jobs:\n")
                 for name in job_dict.keys():
-                    print_pods_for(name)
+                    print_pods_for(name, job_pods.get(name, []))
 
-        except oc.OpenShiftPythonException as e:
+        except ApiError as e:
             sys.exit(f"Error occurred while retrieving pods: {e}")
 
 
-def print_pods_for(job_name: str):
-    pods = oc.selector("pods", labels={"job-name": job_name}).objects()
-    if not pods:
+def print_startup_timing(job_names: list[str] | None, job_dict: dict[str, Any]):
+    for name in job_names or []:
+        if name not in job_dict:
+            print(f"{name} does not exist; cannot fetch pod timing.")
+    breakdowns = startup_breakdowns(
+        [name for name in job_names if name in job_dict] if job_names else None
+    )
+    if not breakdowns:
+        print("No pods found.")
+        return
+    print(format_breakdowns(breakdowns))
+
+
+def pods_by_job() -> dict[str, list[str]]:
+    """Group the names of all pods that carry a job-name label by job."""
+    grouped: dict[str, list[str]] = defaultdict(list)
+    for pod in fetch_pods(labels={"!job-name": None}):
+        if pod.job:
+            grouped[pod.job].append(pod.name)
+    return grouped
+
+
+def print_pods_for(job_name: str, pod_names: list[str]):
+    if not pod_names:
         print(f"No pods found for job {job_name}.")
         return
     print(f"\nPods for {job_name}:\n{'-' * 40}")
-    for pod in pods:
-        print(f"- {pod.model.metadata.name}")
+    for name in pod_names:
+        print(f"- {name}")
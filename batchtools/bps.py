@@ -1,13 +1,20 @@
 from typing_extensions import override
 from typing import cast
 from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 import sys
 import argparse
-import openshift_client as oc
-
+from .backend import ApiError
 from .basecommand import Command
 from .basecommand import SubParserFactory
+from .records import PodRecord
+from .records import fetch_pods
+
+# concurrent listings when node names are given
+MAX_NODE_QUERIES = 8
 
 
 class ListPodsCommandArgs(argparse.Namespace):
@@ -40,74 +47,63 @@ class ListPodsCommand(Command):
         v = args.verbose or 0  # treat None as 0
 
         try:
-            with oc.timeout(120):
-                all_pods = oc.selector("pods", all_namespaces=True).objects()
-
             if args.node_names:
-                # filter to Running pods on requested nodes
-                node_set = set(args.node_names)
-                pods_for_nodes = [
-                    p
-                    for p in all_pods
-                    if getattr(p.model.status, "phase", None) == "Running"
-                    and (getattr(p.model.spec, "nodeName", None) or "") in node_set
-                ]
-
-                # Group by node
-                pods_by_node: dict[str, list] = defaultdict(list)
-                for p in pods_for_nodes:
-                    n = getattr(p.model.spec, "nodeName", None) or ""
-                    pods_by_node[n].append(p)
-
-                # Emit per requested node (only those requested)
-                for node in node_set:
-                    lines = summarize_gpu_pods(pods_by_node.get(node, []), v > 0)
-                    if not lines and v > 0:
-                        print(f"{node}: FREE")
-                    else:
-                        for ln in lines:
-                            print(ln)
+                # Summaries come back in node order as each node's listing
+                # completes, so output starts before the slowest node is done
+                nodes = sorted(set(args.node_names))
+                workers = min(len(nodes), MAX_NODE_QUERIES)
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    summaries = pool.map(
+                        lambda node: summarize_gpu_pods(running_pods(node), v > 0),
+                        nodes,
+                    )
+                    for node, lines in zip(nodes, summaries):
+                        if not lines and v > 0:
+                            print(f"{node}: FREE")
+                        else:
+                            for ln in lines:
+                                print(ln)
 
             else:
-                # Global summary over all Running pods
-                running = [
-                    p
-                    for p in all_pods
-                    if getattr(p.model.status, "phase", None) == "Running"
-                ]
-                for ln in summarize_gpu_pods(running, v > 0):
+                # Global summary over all Running pods, totalled page by page
+                for ln in summarize_gpu_pods(running_pods(), v > 0):
                     print(ln)
 
-        except oc.OpenShiftPythonException as e:
+        except ApiError as e:
             sys.exit(f"Error interacting with OpenShift: {e}")
 
 
-def summarize_gpu_pods(pods, verbose: bool) -> list[str]:
+def running_pods(node: str | None = None) -> Iterator[PodRecord]:
+    """
+    Yield Running pods in all namespaces, optionally on a single node. The
+    API server does the filtering and the listing is paged.
+    """
+    fields = {"status.phase": "Running"}
+    if node:
+        fields["spec.nodeName"] = node
+    return fetch_pods(fields=fields, all_namespaces=True, timeout=120)
+
+
+def summarize_gpu_pods(pods: Iterable[PodRecord], verbose: bool) -> list[str]:
     totals: defaultdict[str, int] = defaultdict(int)
     busy_pods: defaultdict[str, set[str]] = defaultdict(set)
     seen_nodes: set[str] = set()
 
     for pod in pods or []:
-        try:
-            if pod.model.status.phase != "Running":
-                continue
-            node = (pod.model.spec.nodeName or "").strip()
-            if not node:
-                continue
-            seen_nodes.add(node)
-
-            ns = (pod.model.metadata.namespace or "").strip()
-            name = (pod.model.metadata.name or "").strip()
-            pod_id = f"{ns}/{name}" if ns and name else name or ns
-
-            for ctr in pod.model.spec.containers or []:
-                reqs = getattr(ctr.resources, "requests", {}) or {}
-                g = int(reqs.get("nvidia.com/gpu", 0) or 0)
-                if g > 0:
-                    totals[node] += g
-                    busy_pods[node].add(pod_id)
-        except Exception:
+        if pod.phase != "Running":
+            continue
+        node = pod.node.strip()
+        if not node:
             continue
+        seen_nodes.add(node)
+
+        ns = pod.namespace.strip()
+        name = pod.name.strip()
+        pod_id = f"{ns}/{name}" if ns and name else name or ns
+
+        if pod.gpus > 0:
+            totals[node] += pod.gpus
+            busy_pods[node].add(pod_id)
 
     lines: list[str] = []
     nodes = sorted(seen_nodes or totals.keys())
@@ -1,11 +1,13 @@
+from typing import Any
 from typing_extensions import override
 
 import argparse
 import sys
 
-import openshift_client as oc
-
+from .backend import ApiError
+from .backend import get_backend
 from .basecommand import Command
+from .queues import gpu_quota
 
 
 class GpuQueuesCommand(Command):
@@ -27,40 +29,36 @@ class GpuQueuesCommand(Command):
     @override
     def run(args: argparse.Namespace):
         try:
-            clusterqueues = oc.selector("clusterqueue").objects()
+            clusterqueues = get_backend().list_objects("clusterqueue")
             if not clusterqueues:
                 print("No ClusterQueues found.")
 
             for cq in clusterqueues:
                 cq_dict = cq.as_dict() if hasattr(cq, "as_dict") else cq.model.to_dict()
-                meta = cq_dict.get("metadata", {})
-                spec = cq_dict.get("spec", {})
-                status = cq_dict.get("status", {})
+                print(queue_status_line(cq_dict))
 
-                # calculate total GPUs across resourceGroups/flavors
-                total_gpu = 0
-                for rg in spec.get("resourceGroups", []) or []:
-                    for flav in rg.get("flavors", []) or []:
-                        for res in flav.get("resources", []) or []:
-                            if res.get("name") == "nvidia.com/gpu":
-                                try:
-                                    total_gpu += int(res.get("nominalQuota", 0))
-                                except (TypeError, ValueError):
-                                    continue
+        except ApiError as e:
+            sys.exit(f"Error occurred while retrieving ClusterQueues: {e}")
 
-                admitted = status.get("admittedWorkloads", 0)
-                pending = status.get("pendingWorkloads", 0)
-                reserving = status.get("reservingWorkloads", 0)
-                queueing = spec.get("queueingStrategy", "")
 
-                print(
-                    f"{meta.get('name', '')}\t"
-                    f"admitted: {admitted}\t"
-                    f"pending: {pending}\t"
-                    f"reserved: {reserving}\t"
-                    f"GPUs: {total_gpu}\t"
-                    f"{queueing}"
-                )
+def queue_status_line(cq_dict: dict[str, Any]) -> str:
+    """Summarize one ClusterQueue: its workloads, GPU quota and strategy."""
+    meta = cq_dict.get("metadata", {})
+    spec = cq_dict.get("spec", {})
+    status = cq_dict.get("status", {})
 
-        except oc.OpenShiftPythonException as e:
-            sys.exit(f"Error occurred while retrieving ClusterQueues: {e}")
+    total_gpu = gpu_quota(cq_dict)
+
+    admitted = status.get("admittedWorkloads", 0)
+    pending = status.get("pendingWorkloads", 0)
+    reserving = status.get("reservingWorkloads", 0)
+    queueing = spec.get("queueingStrategy", "")
+
+    return (
+        f"{meta.get('name', '')}\t"
+        f"admitted: {admitted}\t"
+        f"pending: {pending}\t"
+        f"reserved: {reserving}\t"
+        f"GPUs: {total_gpu}\t"
+        f"{queueing}"
+    )
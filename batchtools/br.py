@@ -1,22 +1,61 @@
 # pyright: reportUninitializedInstanceVariable=false
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import nullcontext
+from functools import cached_property
+from typing import TYPE_CHECKING
+from typing import Any
 from typing import cast
 from typing_extensions import override
 
 import argparse
+import asyncio
+import itertools
+import math
 import os
 import socket
 import sys
 import time
 import uuid
 
-import openshift_client as oc
-
+from .backend import NO_LOG_LIMITS
+from .backend import ApiError
+from .backend import LogLimits
+from .backend import get_backend
+from .archive import archive_job_logs
 from .basecommand import Command
 from .basecommand import SubParserFactory
 from .build_yaml import build_job_body
-from .helpers import pretty_print
+from .helpers import add_log_limit_arguments
+from .helpers import format_seconds
+from .helpers import job_owner
+from .helpers import log_limits
 from .helpers import oc_delete
+from .file_setup import context_size
+from .file_setup import list_context
 from .file_setup import prepare_context
+from .logs import follow_pod_logs
+from .logs import write_pod_logs
+from .history import record_completion
+from .history import record_submission
+from .queues import DEFAULT_QUEUES
+from .queues import QueuePicker
+from .queues import parse_gpu_choice
+from .runner import JobResult
+from .runner import JobRunner
+from .runner import StageLimits
+from .timings import Timings
+from .timings import fetch_cluster_times
+from .wait import TERMINAL_PHASES
+from .wait import wait_for_admission
+from .wait import wait_for_job
+from .wait import wait_for_pod
+
+if TYPE_CHECKING:
+    import openshift_client as oc
 
 
 class CreateJobCommandArgs(argparse.Namespace):
@@ -35,10 +74,21 @@ class CreateJobCommandArgs(argparse.Namespace):
     job_id: str = uuid.uuid5(uuid.NAMESPACE_OID, f"{os.getpid()}-{time.time()}").hex
     job_delete: bool = True
     wait: bool = True
+    follow: bool = True
     timeout: int = 60 * 15 * 4
     max_sec: int = 60 * 15
     gpu_numreq: int = 1
     gpu_numlim: int = 1
+    array: int = 0
+    parallelism: int | None = None
+    from_file: str | None = None
+    workers: int = 16
+    tail: int | None = None
+    since: int | None = None
+    limit_bytes: int | None = None
+    archive_logs: bool = True
+    timings: bool = False
+    timings_file: str = os.path.join("jobs", "timings.jsonl")
     verbose: int = 0
     command: list[str]
 
@@ -65,9 +115,22 @@ class CreateJobCommand(Command):
     2. Specify GPU type and image for a training job
     $ br --gpu a100 --image quay.io/user/train:latest cuda-code
 
+    Use --gpu auto (or a list like --gpu v100,a100) to submit to whichever
+    queue is expected to start the job first.
+
     3. Submit without waiting for completion
     $ br --wait 0 ./long_running_task.sh
 
+    4. Run many jobs at once, one per line of a file (or stdin with -); their
+       output is interleaved line by line, each line prefixed with its job.
+       With --no-wait the jobs are only submitted.
+    $ br --from-file sweep.txt
+
+    5. Run a parameter sweep as one indexed job with 16 members, 4 at a time.
+       Each member sees its index in $JOB_COMPLETION_INDEX and writes its
+       outputs to jobs/<job>/<index>/
+    $ br --array 16 --parallelism 4 './train --seed $JOB_COMPLETION_INDEX'
+
     By default, br waits for the job to complete, streams its logs,
     and then displays the directory where the job outputs were copied.
 
@@ -85,7 +148,8 @@ class CreateJobCommand(Command):
         p.add_argument(
             "--gpu",
             default=CreateJobCommandArgs.gpu,
-            help="Select GPU type",
+            help="Select GPU type, a preference list like v100,a100 or 'auto' to "
+            "use the queue with the shortest expected wait",
         )
         p.add_argument(
             "--image",
@@ -120,6 +184,12 @@ class CreateJobCommand(Command):
             default=CreateJobCommandArgs.wait,
             help="Wait for job completion",
         )
+        p.add_argument(
+            "--follow",
+            action=argparse.BooleanOptionalAction,
+            default=CreateJobCommandArgs.follow,
+            help="Stream job output while it runs (requires --wait)",
+        )
         p.add_argument(
             "--timeout",
             default=CreateJobCommandArgs.timeout,
@@ -144,6 +214,49 @@ class CreateJobCommand(Command):
             type=int,
             help="Number of GPUs limited",
         )
+        p.add_argument(
+            "--array",
+            default=CreateJobCommandArgs.array,
+            type=int,
+            help="Run the command as an indexed job with this many members",
+        )
+        p.add_argument(
+            "--parallelism",
+            default=CreateJobCommandArgs.parallelism,
+            type=int,
+            help="Maximum number of array members running at once (default: all)",
+        )
+        p.add_argument(
+            "--from-file",
+            default=CreateJobCommandArgs.from_file,
+            metavar="PATH",
+            help="Submit one job per line of PATH ('-' for stdin) instead of a single command",
+        )
+        p.add_argument(
+            "--workers",
+            default=CreateJobCommandArgs.workers,
+            type=int,
+            help="Number of concurrent submissions with --from-file",
+        )
+        add_log_limit_arguments(p)
+        p.add_argument(
+            "--archive-logs",
+            action=argparse.BooleanOptionalAction,
+            default=CreateJobCommandArgs.archive_logs,
+            help="Save compressed pod logs to jobs/<job-name>/ when the job finishes",
+        )
+        p.add_argument(
+            "--timings",
+            action="store_true",
+            default=CreateJobCommandArgs.timings,
+            help="Report where the time of the job went (queue, image pull, run, ...)",
+        )
+        p.add_argument(
+            "--timings-file",
+            default=CreateJobCommandArgs.timings_file,
+            metavar="PATH",
+            help="File that --timings appends one JSON line per job to",
+        )
         p.add_argument(
             "command",
             nargs=argparse.REMAINDER,
@@ -156,76 +269,112 @@ class CreateJobCommand(Command):
     @override
     def run(args: argparse.Namespace):
         args = cast(CreateJobCommandArgs, args)
-        DEFAULT_QUEUES = {
-            "v100": "v100-localqueue",
-            "a100": "a100-localqueue",
-            "h100": "h100-localqueue",
-            "none": "dummy-localqueue",
-        }
-
-        if not args.command:
+
+        if not args.command and not args.from_file:
             sys.exit("ERROR: you must provide a command")
 
-        if args.gpu not in DEFAULT_QUEUES:
-            sys.exit(f"ERROR: unsupported GPU {args.gpu} : no queue found")
-        queue_name = DEFAULT_QUEUES[args.gpu]
+        try:
+            gpus = parse_gpu_choice(args.gpu)
+        except ValueError as e:
+            sys.exit(f"ERROR: unsupported GPU {e} : no queue found")
+
+        if args.array < 0:
+            sys.exit("ERROR: --array must be a positive number of members")
+        if args.parallelism is not None and args.parallelism < 1:
+            sys.exit("ERROR: --parallelism must be at least 1")
+        if args.from_file and args.command:
+            sys.exit("ERROR: provide either a command or --from-file, not both")
+        if args.workers < 1:
+            sys.exit("ERROR: --workers must be at least 1")
+        if args.from_file and args.timings:
+            sys.exit("ERROR: --timings is not supported with --from-file")
+        if args.from_file and args.wait and args.array:
+            # the runner follows one pod per job, not every member of an array
+            sys.exit("ERROR: --array with --from-file needs --no-wait")
 
-        job_name = f"{args.name}-{args.gpu}-{args.job_id}"
-        container_name = f"{job_name}-container"
+        try:
+            submitter = JobSubmitter(args, gpus)
+        except ApiError as e:
+            sys.exit(f"Error occurred while looking up the dev pod: {e}")
+
+        if args.from_file and args.wait:
+            run_from_file(submitter, args.from_file, workers=args.workers)
+            return
+        if args.from_file:
+            submit_from_file(submitter, args.from_file, workers=args.workers)
+            return
+
+        gpu = submitter.choose_gpu()
+        job_name = f"{args.name}-{gpu}-{args.job_id}"
         file_to_execute = " ".join(args.command).strip()
 
-        pwd = os.getcwd()
-        context_directory = pwd
-        jobs_directory = os.path.join(pwd, "jobs")
-
-        output_directory = os.path.join(jobs_directory, job_name)
-        dev_pod_name = socket.gethostname()
-        getlist = os.path.join(output_directory, "getlist")
+        timings = Timings(job_name)
+        with timings.phase("prepare_context"):
+            submitter.prepare(job_name)
 
-        pod = oc.selector(f"pod/{dev_pod_name}").object()
-        container = getattr(pod.model.spec, "containers", []) or []
-        dev_container_name = container[0].name
-
-        prepare_context(
-            context=args.context,
-            context_dir=context_directory,
-            jobs_dir=jobs_directory,
-            output_dir=output_directory,
-            getlist_path=getlist,
-        )
+        # measured for the job history while we wait for the job
+        context_bytes: Future[int | None] | None = None
+        if args.wait and args.context:
+            measure = ThreadPoolExecutor(max_workers=1)
+            context_bytes = measure.submit(submitter.context_bytes)
+            measure.shutdown(wait=False)
+        try:
+            with timings.phase("create"):
+                submitter.submit(job_name, file_to_execute, gpu)
+        except ApiError as e:
+            sys.exit(f"Error occurred while creating job: {e}")
+        print(f"Job: {job_name} created successfully. Now checking pod...")
 
+        finished = True
         try:
-            # Create job body using the helper
-            job_body = build_job_body(
-                job_name=job_name,
-                queue_name=queue_name,
-                image=args.image,
-                container_name=container_name,
-                cmdline=file_to_execute,
-                max_sec=args.max_sec,
-                gpu=args.gpu,
-                gpu_req=args.gpu_numreq,
-                gpu_lim=args.gpu_numlim,
-                context=args.context,
-                devpod_name=dev_pod_name,
-                devcontainer=dev_container_name,
-                context_dir=context_directory,
-                jobs_dir=jobs_directory,
-                getlist_path=getlist,
+            if args.wait and submitter.indexed:
+                finished = log_array_output(
+                    job_name=job_name,
+                    timeout=args.timeout,
+                    limits=log_limits(args),
+                    timings=timings,
+                )
+            elif args.wait:
+                finished = log_job_output(
+                    job_name=job_name,
+                    wait=True,
+                    timeout=args.timeout,
+                    follow=args.follow,
+                    limits=log_limits(args),
+                    timings=timings,
+                )
+        except ApiError as e:
+            # nobody would be waiting for the job any more
+            print(f"Error occurred while waiting for job {job_name}: {e}")
+            oc_delete("job", job_name)
+            sys.exit(1)
+
+        if not finished:
+            # abandon_job() has deleted the job, and its pods and logs with it
+            return
+
+        # the cluster's timestamps go away with the job
+        if args.wait:
+            times = fetch_cluster_times(job_name)
+            if args.timings and times:
+                timings.add_cluster_phases(times)
+            record_completion(
+                job_name,
+                times,
+                context_bytes.result() if context_bytes is not None else None,
             )
 
-            print(f"Creating job {job_name} in {queue_name}...")
-            oc.create(job_body)
-            print(f"Job: {job_name} created successfully. Now checking pod...")
-            if args.wait:
-                log_job_output(job_name=job_name, wait=True, timeout=args.timeout)
-
-        except oc.OpenShiftPythonException as e:
-            sys.exit(f"Error occurred while creating job: {e}")
+        # the pods, and with them the logs, go away with the job
+        if args.wait and args.archive_logs:
+            with timings.phase("archive_logs"):
+                save_job_logs(
+                    job_name, os.path.join(submitter.jobs_directory, job_name)
+                )
 
         if args.job_delete and args.wait:
             print(f"RUNDIR: jobs/{job_name}")
-            oc_delete("job", job_name)
+            with timings.phase("delete"):
+                oc_delete("job", job_name)
         else:
             print(
                 f"User specified not to wait, or not to delete, so {job_name} must be deleted by user.\n"
@@ -234,44 +383,447 @@ class CreateJobCommand(Command):
                 f"  oc delete job {job_name}"
             )
 
+        if args.timings:
+            print(timings.report())
+            timings.write(args.timings_file, gpu=gpu, queue=DEFAULT_QUEUES[gpu])
+
 
-def get_pod_status(pod_name: str | None = None) -> str:
+class JobSubmitter:
     """
-    Return the current status.phase of a pod (Pending, Running, Succeeded, Failed).
+    Holds everything that is the same for all jobs of one br invocation: the
+    dev pod we copy the context from, and (with --context) the list of
+    context entries. Looking these up once lets us submit many jobs cheaply.
     """
-    pod = oc.selector(f"pod/{pod_name}").object()
-    return pod.model.status.phase or "Unknown"
 
+    def __init__(self, args: CreateJobCommandArgs, gpus: list[str]) -> None:
+        self.args = args
+        self.gpus = gpus
+        # with a choice of GPU types, each job goes where it will start first
+        self.picker = QueuePicker(gpus) if len(gpus) > 1 else None
+
+        self.indexed = args.array > 0
+        self.completions = args.array if self.indexed else 1
+        self.parallelism = min(args.parallelism or self.completions, self.completions)
 
-def log_job_output(job_name: str, *, wait: bool, timeout: int | None) -> None:
+        pwd = os.getcwd()
+        self.context_directory = pwd
+        self.jobs_directory = os.path.join(pwd, "jobs")
+
+        self.dev_pod_name = socket.gethostname()
+        pod = get_backend().get("pod", self.dev_pod_name)
+        container = getattr(pod.model.spec, "containers", []) or []
+        self.dev_container_name = container[0].name
+
+        self.context_entries: list[str] | None = None
+
+    @cached_property
+    def owner(self) -> str:
+        """The batchtools/owner label of our jobs, looked up on first use."""
+        try:
+            return job_owner()
+        except ApiError as e:
+            sys.exit(f"Error occurred while looking up the current user: {e}")
+
+    def snapshot_context(self) -> None:
+        """List the context directory once for all subsequent jobs."""
+        if self.args.context:
+            self.context_entries = list_context(
+                self.context_directory, self.jobs_directory
+            )
+
+    def prepare(self, job_name: str) -> None:
+        output_directory = os.path.join(self.jobs_directory, job_name)
+        prepare_context(
+            context=self.args.context,
+            context_dir=self.context_directory,
+            jobs_dir=self.jobs_directory,
+            output_dir=output_directory,
+            getlist_path=os.path.join(output_directory, "getlist"),
+            entries=self.context_entries,
+        )
+
+    def read_queues(self) -> None:
+        """Read the status of the queues to choose from, if there is a choice."""
+        if self.picker is not None:
+            try:
+                self.picker.prefetch()
+            except ApiError as e:
+                sys.exit(f"Error occurred while reading the queue status: {e}")
+
+    def choose_gpu(self) -> str:
+        """Return the GPU type for the next job."""
+        if self.picker is None:
+            return self.gpus[0]
+        try:
+            gpu, estimates = self.picker.pick(self.args.gpu_numreq)
+        except ApiError as e:
+            sys.exit(f"Error occurred while reading the queue status: {e}")
+        print(
+            f"Choosing {gpu}; expected wait: "
+            + ", ".join(f"{g} {format_wait(w)}" for g, w in estimates.items())
+        )
+        return gpu
+
+    def job_body(self, job_name: str, cmdline: str, gpu: str) -> dict[str, Any]:
+        args = self.args
+        return build_job_body(
+            job_name=job_name,
+            queue_name=DEFAULT_QUEUES[gpu],
+            image=args.image,
+            container_name=f"{job_name}-container",
+            cmdline=cmdline,
+            max_sec=args.max_sec,
+            gpu=gpu,
+            gpu_req=args.gpu_numreq,
+            gpu_lim=args.gpu_numlim,
+            context=args.context,
+            devpod_name=self.dev_pod_name,
+            devcontainer=self.dev_container_name,
+            context_dir=self.context_directory,
+            jobs_dir=self.jobs_directory,
+            getlist_path=os.path.join(self.jobs_directory, job_name, "getlist"),
+            completions=self.completions,
+            parallelism=self.parallelism,
+            indexed=self.indexed,
+            owner=self.owner,
+        )
+
+    def submit(self, job_name: str, cmdline: str, gpu: str) -> None:
+        job_body = self.job_body(job_name, cmdline, gpu)
+        print(f"Creating job {job_name} in {DEFAULT_QUEUES[gpu]}...")
+        get_backend().create(job_body)
+        self.record(job_name, cmdline, gpu)
+
+    def record(self, job_name: str, cmdline: str, gpu: str) -> None:
+        args = self.args
+        record_submission(
+            job_name,
+            user=self.owner,
+            queue=DEFAULT_QUEUES[gpu],
+            gpu=gpu,
+            gpus=0 if gpu == "none" else args.gpu_numreq,
+            image=args.image,
+            command=cmdline,
+        )
+
+    def context_bytes(self) -> int | None:
+        """Return the size of the context the job copies in, for the history."""
+        try:
+            entries = self.context_entries
+            if entries is None:
+                entries = list_context(self.context_directory, self.jobs_directory)
+            return context_size(self.context_directory, entries)
+        except (OSError, SystemExit):
+            return None
+
+
+def format_wait(seconds: float) -> str:
+    if math.isinf(seconds):
+        return "never (no quota)"
+    return format_seconds(seconds)
+
+
+def job_ids() -> Iterator[str]:
     """
-    Wait until the job's pod completes (Succeeded/Failed), then print its logs once.
+    Generate job ID suffixes for a batch submission. All IDs share a random
+    prefix, so they cannot collide with other br invocations, and carry a
+    sequence number, so they cannot collide with each other.
     """
-    pods = oc.selector("pod", labels={"job-name": job_name}).objects()
-    if not pods:
-        print(f"No pods found for job {job_name}")
-        return
+    prefix = uuid.uuid4().hex[:12]
+    for seq in itertools.count():
+        yield f"{prefix}-{seq}"
+
+
+def read_commands(path: str) -> Iterator[str]:
+    """
+    Yield one command line per non-empty line of path ("-" for stdin),
+    skipping comments. The file is read lazily.
+    """
+    with open(sys.stdin.fileno() if path == "-" else path, closefd=path != "-") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
 
-    pod = pods[0]
-    pod_name = pod.model.metadata.name
+
+def submit_from_file(submitter: JobSubmitter, path: str, *, workers: int) -> None:
+    """
+    Submit one job per command line in path through a bounded pool of
+    workers. Commands are read as a stream, and at most a few batches of
+    submissions are in flight at any time.
+    """
+    args = submitter.args
+    submitter.snapshot_context()
+    ids = job_ids()
+
+    def submit_one(job_name: str, cmdline: str, gpu: str) -> str:
+        submitter.prepare(job_name)
+        submitter.submit(job_name, cmdline, gpu)
+        return job_name
+
+    created: list[str] = []
+    failed = 0
+
+    def collect(future: Future[str]) -> None:
+        nonlocal failed
+        try:
+            created.append(future.result())
+        except (ApiError, SystemExit) as e:
+            failed += 1
+            print(f"Error occurred while creating job: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight: set[Future[str]] = set()
+        for cmdline in read_commands(path):
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            gpu = submitter.choose_gpu()
+            job_name = f"{args.name}-{gpu}-{next(ids)}"
+            in_flight.add(pool.submit(submit_one, job_name, cmdline, gpu))
+        for future in in_flight:
+            collect(future)
+
+    print(f"\nSubmitted {len(created)} job(s), {failed} failed.")
+    if created:
+        print(
+            "Jobs submitted with --from-file --no-wait must be deleted by user.\n"
+            "You can do this by running:\n"
+            "  batchtools bd"
+        )
+    if failed:
+        sys.exit(1)
+
+
+class SubmitterRunner(JobRunner):
+    """A JobRunner that records br's jobs in the job history."""
+
+    def __init__(self, submitter: JobSubmitter, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.submitter = submitter
+        # job name -> (command line, GPU type)
+        self.commands: dict[str, tuple[str, str]] = {}
+
+    @override
+    def on_created(self, job_name: str, body: dict[str, Any]) -> None:
+        self.submitter.record(job_name, *self.commands[job_name])
+
+    @override
+    def on_finished(self, result: JobResult) -> None:
+        self.commands.pop(result.name, None)
+        record_completion(result.name, fetch_cluster_times(result.name))
+
+
+def run_from_file(submitter: JobSubmitter, path: str, *, workers: int) -> None:
+    """
+    Run one job per command line in path to completion: every job is
+    created, waited for, has its log streamed (each line prefixed with the
+    job name) and archived, and is deleted, all from one event loop. At most
+    workers jobs are being created at any time.
+    """
+    args = submitter.args
+    submitter.snapshot_context()
+    submitter.read_queues()
+    ids = job_ids()
+    runner = SubmitterRunner(
+        submitter,
+        limits=StageLimits(create=workers),
+        timeout=args.timeout,
+        follow=args.follow,
+        log_limits=log_limits(args),
+        jobs_dir=submitter.jobs_directory if args.archive_logs else None,
+        delete=args.job_delete,
+    )
+
+    # runs in a worker thread of the runner
+    def bodies() -> Iterator[dict[str, Any]]:
+        for cmdline in read_commands(path):
+            gpu = submitter.choose_gpu()
+            job_name = f"{args.name}-{gpu}-{next(ids)}"
+            submitter.prepare(job_name)
+            runner.commands[job_name] = (cmdline, gpu)
+            yield submitter.job_body(job_name, cmdline, gpu)
+
+    async def run_all() -> list[JobResult]:
+        async with runner:
+            return await runner.run_all(bodies())
+
+    results = asyncio.run(run_all())
+    succeeded = sum(result.succeeded for result in results)
+    timed_out = sum(result.error == "timeout" for result in results)
+    print(
+        f"\nRan {len(results)} job(s): {succeeded} succeeded, "
+        f"{len(results) - succeeded - timed_out} failed, {timed_out} timed out."
+    )
+    print("RUNDIR: jobs/")
+    if not args.job_delete:
+        print(
+            "User specified not to delete, so the jobs must be deleted by user.\n"
+            "You can do this by running:\n"
+            "  batchtools bd"
+        )
+    if succeeded < len(results):
+        sys.exit(1)
+
+
+def abandon_job(job_name: str, waiting_for: str) -> None:
+    print(f"Timeout waiting for job {job_name} to {waiting_for}")
+    print(f"Deleting job {job_name}")
+    oc_delete("job", job_name)
+
+
+def wait_until_admitted(job_name: str, *, timeout: float | None) -> bool:
+    """
+    Follow the job's Kueue Workload until the job is admitted, printing its
+    position in the queue while it waits. No pod can exist before then, so
+    this is all we ask the API server about in the meantime. Returns False
+    if the timeout expired first.
+    """
+
+    def report(queue: str | None, position: int) -> None:
+        print(f"Job {job_name} is pending in {queue}: position {position}")
+
+    try:
+        state = wait_for_admission(
+            job_name,
+            timeout=None if timeout is None else max(1, int(timeout)),
+            report=report,
+        )
+    except ApiError as e:
+        print(f"Cannot follow the job's Kueue Workload ({e}), waiting for its pod")
+        return True
+    if state is None:
+        return False
+    if state == "Admitted":
+        print(f"Job {job_name} was admitted, waiting for its pod...")
+    return True
+
+
+def remaining_time(start: float, timeout: int | None) -> int | None:
+    """What is left of timeout since start (a time.monotonic() value)."""
+    if not timeout:
+        return None
+    return max(1, math.ceil(timeout - (time.monotonic() - start)))
+
+
+def log_job_output(
+    job_name: str,
+    *,
+    wait: bool,
+    timeout: int | None,
+    follow: bool = False,
+    limits: LogLimits = NO_LOG_LIMITS,
+    timings: Timings | None = None,
+) -> bool:
+    """
+    Wait until the job's pod completes (Succeeded/Failed), then print its logs once.
+
+    While Kueue holds the job in its queue, follow its Workload instead of
+    its pods. With follow, start streaming the logs as soon as the pod is
+    Running and keep printing them until the container exits. The limits
+    are applied by the API server in either case.
+
+    Returns False if the timeout expired, in which case the job has been
+    deleted.
+    """
+    start = time.monotonic()
+    if wait and not wait_until_admitted(job_name, timeout=timeout):
+        abandon_job(job_name, "be admitted")
+        return False
+
+    if wait and follow:
+        result = wait_for_pod(
+            job_name,
+            timeout=remaining_time(start, timeout),
+            phases=("Running", *TERMINAL_PHASES),
+        )
+        if result is None:
+            abandon_job(job_name, "start")
+            return False
+
+        pod_name, phase = result
+        if phase == "Running":
+            print(f"Pod, {pod_name} is running, streaming logs:")
+        with timings.phase("log_fetch") if timings else nullcontext():
+            follow_pod_logs(pod_name, limits=limits)
+
+        if phase == "Running":
+            result = wait_for_pod(job_name, timeout=remaining_time(start, timeout))
+            if result is None:
+                abandon_job(job_name, "complete")
+                return False
+            pod_name, phase = result
+        print(f"Pod, {pod_name} finished with phase={phase}")
+        return True
 
     if wait:
-        start = time.monotonic()
-        while True:
-            phase = get_pod_status(pod_name)
-            if phase in ("Succeeded", "Failed"):
-                print(f"Pod, {pod_name} finished with phase={phase}")
-                # end = time.monotonic()
-                # for logging information
-                # elapsed = end - start
-                break
-            if timeout and (time.monotonic() - start) > timeout:
-                print(f"Timeout waiting for pod {pod_name} to complete")
-                print(f"Deleting pod {pod_name}")
-                oc_delete("job", job_name)
-                return
+        result = wait_for_pod(job_name, timeout=remaining_time(start, timeout))
+        if result is None:
+            abandon_job(job_name, "complete")
+            return False
+
+        pod_name, phase = result
+        print(f"Pod, {pod_name} finished with phase={phase}")
+        pod = get_backend().get("pod", pod_name)
+    else:
+        pods = get_backend().list_objects("pod", labels={"job-name": job_name})
+        if not pods:
+            print(f"No pods found for job {job_name}")
+            return True
+        pod = pods[0]
 
-            # sleep to avoid hammering the server
-            time.sleep(2)
     # pass in the pod object to get logs from, not the name
-    print(pretty_print(pod))
+    with timings.phase("log_fetch") if timings else nullcontext():
+        write_pod_logs(pod, limits=limits)
+    return True
+
+
+def log_array_output(
+    job_name: str,
+    *,
+    timeout: int | None,
+    limits: LogLimits = NO_LOG_LIMITS,
+    timings: Timings | None = None,
+) -> bool:
+    """
+    Wait until every member of an indexed job has finished, then print the
+    logs of each member in index order. Returns False if the timeout
+    expired, in which case the job has been deleted.
+    """
+    start = time.monotonic()
+    if not wait_until_admitted(job_name, timeout=timeout):
+        abandon_job(job_name, "be admitted")
+        return False
+    condition = wait_for_job(job_name, timeout=remaining_time(start, timeout))
+    if condition is None:
+        abandon_job(job_name, "complete")
+        return False
+
+    pods = get_backend().list_objects("pod", labels={"job-name": job_name})
+    pods.sort(key=completion_index)
+    print(f"Job, {job_name} finished with condition={condition}")
+    for pod in pods:
+        print(
+            f"\nLogs for index {completion_index(pod)} "
+            f"({pod.model.metadata.name}, phase={pod.model.status.phase}):\n"
+            f"{'-' * 40}"
+        )
+        with timings.phase("log_fetch") if timings else nullcontext():
+            write_pod_logs(pod, limits=limits)
+    return True
+
+
+def save_job_logs(job_name: str, directory: str) -> None:
+    try:
+        entries = archive_job_logs(job_name, directory)
+    except ApiError as e:
+        print(f"Error occurred while archiving logs: {e}")
+        return
+    if entries:
+        print(f"Logs archived to {os.path.relpath(directory)}/")
+
+
+def completion_index(pod: "oc.APIObject") -> int:
+    annotations = pod.model.metadata.annotations or {}
+    return int(annotations.get("batch.kubernetes.io/job-completion-index", -1))
@@ -1,6 +1,8 @@
 # pyright: reportExplicitAny=false
 from typing import Any
 
+from .records import OWNER_LABEL
+
 rsync_script = """
 set -e
 export RSYNC_RSH='oc rsh -c {devcontainer}'
@@ -25,6 +27,33 @@ rsync -q --archive --no-owner --no-group \
 """
 
 
+# Used for indexed jobs (br --array): every completion index gets its own
+# working directory, and its outputs are copied back to jobs/<job>/<index>/
+indexed_rsync_script = """
+set -e
+export RSYNC_RSH='oc rsh -c {devcontainer}'
+
+workdir={job_name}/$JOB_COMPLETION_INDEX
+mkdir -p $workdir
+
+rsync -q --archive --no-owner --no-group --omit-dir-times \
+    --numeric-ids {devpod_name}:{getlist_path} $workdir/getlist
+rsync -q -r --archive --no-owner --no-group \
+    --omit-dir-times --numeric-ids --files-from=$workdir/getlist \
+    {devpod_name}:{context_dir}/ $workdir/
+(cd {job_name} && find $JOB_COMPLETION_INDEX -mindepth 1 -maxdepth 1) > $workdir/gotlist
+
+(
+  cd $workdir && {cmdline} |& tee {job_name}-$JOB_COMPLETION_INDEX.log
+)
+
+rsync -q --archive --no-owner --no-group \
+    --omit-dir-times --no-relative --numeric-ids  \
+    --exclude-from=$workdir/gotlist \
+    $workdir {devpod_name}:{jobs_dir}/{job_name}/
+"""
+
+
 def build_job_body(
     job_name: str,
     queue_name: str,
@@ -41,9 +70,18 @@ def build_job_body(
     context_dir: str,
     jobs_dir: str,
     getlist_path: str,
+    completions: int = 1,
+    parallelism: int = 1,
+    indexed: bool = False,
+    owner: str | None = None,
 ) -> dict[str, Any]:
     """
     Build a batch/v1 Job as a dict to pass to oc.create()
+
+    With indexed, the job uses completionMode: Indexed and each of its
+    completions sees its index in $JOB_COMPLETION_INDEX. With owner, the
+    job is labeled so that bd can delete it together with the owner's other
+    jobs.
     """
     if gpu == "none":
         resources = {
@@ -59,10 +97,11 @@ def build_job_body(
     # - when context is False, just run the provided command via /bin/sh -
     if context:
         print("Copying context")
+        script = indexed_rsync_script if indexed else rsync_script
         command = [
             "/bin/bash",
             "-c",
-            rsync_script.format_map(locals()),
+            script.format_map(locals()),
         ]
     else:
         command = ["/bin/bash", "-c", cmdline]
@@ -78,8 +117,8 @@ def build_job_body(
             },
         },
         "spec": {
-            "parallelism": 1,
-            "completions": 1,
+            "parallelism": parallelism,
+            "completions": completions,
             "backoffLimit": 0,
             "activeDeadlineSeconds": max_sec,
             "template": {
@@ -97,4 +136,8 @@ def build_job_body(
             },
         },
     }
+    if owner:
+        body["metadata"]["labels"][OWNER_LABEL] = owner
+    if indexed:
+        body["spec"]["completionMode"] = "Indexed"
     return body
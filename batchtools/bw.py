@@ -0,0 +1,237 @@
+from typing import cast
+from typing_extensions import override
+
+import argparse
+import sys
+import time
+
+from .backend import ApiError
+from .backend import get_backend
+from .backend import label_selector
+from .basecommand import Command
+from .basecommand import SubParserFactory
+from .helpers import job_owner
+from .helpers import owned_jobs_selector
+from .helpers import parse_duration
+from .helpers import parse_label_selector
+from .wait import job_condition
+from .wait import watch_events
+
+# exit statuses
+EXIT_FAILED = 1
+EXIT_TIMEOUT = 2
+
+
+class WaitJobsCommandArgs(argparse.Namespace):
+    job_names: list[str] = []
+    selector: dict[str, str | None] | None = None
+    count: int = 0
+    fail_fast: bool = False
+    timeout: int = 0
+
+
+class WaitJobsCommand(Command):
+    """
+    batchtools bw [job-name [job-name ...]] [-l selector]
+
+    Wait until jobs have finished, printing each one as it completes or fails.
+
+    Without job names or a selector, waits for all of your jobs that br
+    created (labeled batchtools/owner), as they exist when bw starts. All
+    jobs are followed with a single watch on the namespace's jobs.
+
+    Exit status: 0 if every job we waited for completed, 1 if any of them
+    failed or does not exist, 2 if the timeout expired first.
+
+    Example usages:
+
+    1. Wait for the jobs of a sweep submitted with br --from-file --no-wait
+    $ bw
+
+    2. Wait for two jobs, but stop as soon as one fails
+    $ bw --fail-fast job-v100-1 job-v100-2
+
+    3. Wait for the first 10 jobs labeled sweep=lr to finish, for at most an hour
+    $ bw -l sweep=lr --count 10 --timeout 1h
+    """
+
+    name: str = "bw"
+    help: str = "Wait for jobs to finish"
+
+    @classmethod
+    @override
+    def build_parser(cls, subparsers: SubParserFactory):
+        p = super().build_parser(subparsers)
+        p.add_argument(
+            "job_names",
+            nargs="*",
+            help="Names of the jobs to wait for",
+        )
+        p.add_argument(
+            "-l",
+            "--selector",
+            type=parse_label_selector,
+            default=WaitJobsCommandArgs.selector,
+            help="Wait for the jobs with these labels (e.g. app=train,!skip)",
+        )
+        p.add_argument(
+            "--count",
+            type=int,
+            default=WaitJobsCommandArgs.count,
+            metavar="N",
+            help="Return once N jobs have finished (default: all of them)",
+        )
+        p.add_argument(
+            "--fail-fast",
+            action="store_true",
+            default=WaitJobsCommandArgs.fail_fast,
+            help="Return as soon as any job fails",
+        )
+        p.add_argument(
+            "--timeout",
+            type=parse_duration,
+            default=WaitJobsCommandArgs.timeout,
+            metavar="DURATION",
+            help="Give up after DURATION (e.g. 30m, 2h); 0 waits forever",
+        )
+        return p
+
+    @staticmethod
+    @override
+    def run(args: argparse.Namespace):
+        args = cast(WaitJobsCommandArgs, args)
+        if args.job_names and args.selector is not None:
+            sys.exit("ERROR: provide either job names or --selector, not both")
+        if args.count < 0:
+            sys.exit("ERROR: --count must not be negative")
+
+        try:
+            status = wait_for_jobs(
+                args.job_names,
+                labels=args.selector,
+                count=args.count,
+                fail_fast=args.fail_fast,
+                timeout=args.timeout,
+            )
+        except ApiError as e:
+            sys.exit(f"Error occurred while waiting for jobs: {e}")
+        if status:
+            sys.exit(status)
+
+
+class JobTracker:
+    """
+    Count the jobs bw waits for as their updates arrive, and decide when to
+    stop. A job that is deleted before it finished counts as NotFound.
+    """
+
+    def __init__(self, names: list[str], *, count: int, fail_fast: bool) -> None:
+        self.pending = set(names)
+        self.total = len(self.pending)
+        self.count = min(count, self.total) if count else self.total
+        self.fail_fast = fail_fast
+        self.finished: dict[str, str] = {}
+
+    def failed(self) -> list[str]:
+        return [name for name, cond in self.finished.items() if cond != "Complete"]
+
+    def done(self) -> bool:
+        return len(self.finished) >= self.count or bool(
+            self.fail_fast and self.failed()
+        )
+
+    def finish(self, name: str, condition: str) -> None:
+        self.pending.discard(name)
+        self.finished[name] = condition
+        print(f"[{len(self.finished)}/{self.total}] {name}: {condition}")
+
+    def check(self, job: dict) -> bool | None:
+        name = job["metadata"]["name"]
+        if name in self.pending:
+            condition = job_condition(job)
+            if condition is not None:
+                self.finish(name, condition)
+        return True if self.done() else None
+
+    def update(self, event_type: str, jobs: list[dict]) -> None:
+        """Take in an event of watch_events()."""
+        if event_type == "SYNC":
+            listed = {job["metadata"]["name"] for job in jobs}
+            for name in sorted(self.pending - listed):
+                if not self.done():
+                    self.finish(name, "NotFound")
+        for job in jobs:
+            if self.done():
+                return
+            name = job["metadata"]["name"]
+            if event_type == "DELETED" and name in self.pending:
+                self.finish(name, job_condition(job) or "NotFound")
+            else:
+                self.check(job)
+
+
+def wait_for_jobs(
+    job_names: list[str],
+    *,
+    labels: dict[str, str | None] | None = None,
+    count: int = 0,
+    fail_fast: bool = False,
+    timeout: int | None = None,
+) -> int:
+    """
+    Wait for the named jobs, or for the jobs selected by labels (by default
+    the user's own), and return bw's exit status.
+    """
+    backend = get_backend()
+    if not job_names and labels is None:
+        labels = owned_jobs_selector(job_owner())
+    list_labels = labels or {}
+
+    # one listing tells us which jobs there are and which have finished already
+    jobs = {
+        job["metadata"]["name"]: job
+        for job in (
+            obj.as_dict()
+            for obj in backend.list_objects(
+                "jobs", labels=list_labels, trim=("metadata.name", "status.conditions")
+            )
+        )
+    }
+    names = list(dict.fromkeys(job_names)) if job_names else sorted(jobs)
+    if not names:
+        print("No jobs to wait for.")
+        return 0
+
+    tracker = JobTracker(names, count=count, fail_fast=fail_fast)
+    print(f"Waiting for {tracker.count} of {tracker.total} job(s)...")
+    for name in names:
+        if name not in jobs:
+            tracker.finish(name, "NotFound")
+        elif not tracker.done():
+            tracker.check(jobs[name])
+
+    if not tracker.done():
+        params = {"labelSelector": label_selector(list_labels)} if list_labels else {}
+        deadline = time.monotonic() + timeout if timeout else None
+        for event_type, objs in watch_events(
+            "jobs",
+            params,
+            lambda: backend.list_objects("jobs", labels=list_labels),
+            deadline=deadline,
+        ):
+            tracker.update(event_type, objs)
+            if tracker.done():
+                break
+        else:
+            print(
+                f"Timeout: {len(tracker.finished)} of {tracker.total} job(s) finished, "
+                f"still waiting for: {' '.join(sorted(tracker.pending))}"
+            )
+            return EXIT_TIMEOUT
+
+    failed = tracker.failed()
+    print(
+        f"{len(tracker.finished) - len(failed)} job(s) complete, {len(failed)} failed"
+        + (f", {len(tracker.pending)} not waited for" if tracker.pending else "")
+    )
+    return EXIT_FAILED if failed else 0
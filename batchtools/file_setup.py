@@ -1,20 +1,29 @@
+import os
 import sys
 from pathlib import Path
 
 
 def prepare_context(
-    context: int, context_dir: str, jobs_dir: str, output_dir: str, getlist_path: str
+    context: int,
+    context_dir: str,
+    jobs_dir: str,
+    output_dir: str,
+    getlist_path: str,
+    entries: list[str] | None = None,
 ) -> None:
+    """
+    Create the job's output directory and write the list of context entries
+    that the job copies from the dev pod. Pass entries from list_context() to
+    reuse one snapshot of the context directory for many jobs.
+    """
     if not context:
         return
 
-    ctx = Path(context_dir).resolve()
     out = Path(output_dir).resolve()
     gl = Path(getlist_path).resolve()
-    jobs = Path(jobs_dir).resolve()
 
-    if not ctx.is_dir():
-        sys.exit(f"ERROR: CONTEXT_DIR: {ctx} is not a directory")
+    if entries is None:
+        entries = list_context(context_dir, jobs_dir)
 
     if out.exists():
         sys.exit(f"ERROR: {out} directory already exists")
@@ -25,6 +34,26 @@ def prepare_context(
     except Exception as e:
         sys.exit(f"ERROR: Failed to make output dir: {e}")
 
+    # write files to get list
+    try:
+        gl.parent.mkdir(parents=True, exist_ok=True)
+        gl.write_text("\n".join(entries) + ("\n" if entries else ""))
+    except Exception as e:
+        print(f"ERROR: Failed to write getlist at {gl}: {e}")
+        sys.exit(1)
+
+
+def list_context(context_dir: str, jobs_dir: str) -> list[str]:
+    """
+    Return the immediate children of context_dir as ./<name> entries,
+    leaving out jobs_dir.
+    """
+    ctx = Path(context_dir).resolve()
+    jobs = Path(jobs_dir).resolve()
+
+    if not ctx.is_dir():
+        sys.exit(f"ERROR: CONTEXT_DIR: {ctx} is not a directory")
+
     jdir_rel: str | None = None
     # Is jobs_dir directly under context_dir? if yes create relative path of jobs
     if jobs.parent.resolve() == ctx:
@@ -40,11 +69,21 @@ def prepare_context(
         if jdir_rel and rel == jdir_rel:
             continue
         entries.append(rel)
+    return entries
 
-    # write files to get list
-    try:
-        gl.parent.mkdir(parents=True, exist_ok=True)
-        gl.write_text("\n".join(entries) + ("\n" if entries else ""))
-    except Exception as e:
-        print(f"ERROR: Failed to write getlist at {gl}: {e}")
-        sys.exit(1)
+
+def context_size(context_dir: str, entries: list[str]) -> int:
+    """Return the total size in bytes of the files the job copies in."""
+    total = 0
+    for entry in entries:
+        path = os.path.join(context_dir, entry)
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+    return total
@@ -1,53 +1,272 @@
-import openshift_client as oc
+from collections.abc import Container
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import time
+
+from .backend import ApiError
+from .backend import KubeConfig
+from .backend import LogLimits
+from .backend import get_backend
+from .records import KUEUE_QUEUE_LABEL
+from .records import OWNER_LABEL
+from .records import JobRecord
+from .records import PodRecord
+from .records import fetch_jobs
+
+
+# how long a successful login check is trusted for credentials whose expiry
+# we cannot read locally (opaque OpenShift tokens, certificates)
+LOGIN_CACHE_SECONDS = 15 * 60
+
+
+def cache_path(name: str) -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "batchtools", name)
+
+
+def token_expiry(token: str) -> float | None:
+    """Return the exp claim of a JWT (e.g. a service account token), if any."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def credentials_key(config: KubeConfig | None) -> str:
+    """
+    Identify the current credentials. Without a usable kubeconfig (oc
+    backend), use the kubeconfig files' modification times, which change
+    whenever oc login writes a new token.
+    """
+    if config is not None:
+        parts = [config.server, config.token, config.cert_data, config.cert_file]
+    else:
+        env = os.environ.get("KUBECONFIG")
+        paths = env.split(os.pathsep) if env else [os.path.expanduser("~/.kube/config")]
+        parts = [
+            (path, os.stat(path).st_mtime) for path in paths if os.path.isfile(path)
+        ]
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
 
 
 def is_logged_in() -> bool:
+    """
+    Check the current credentials without running oc when possible. A token
+    that carries its own expiry is checked locally; otherwise a successful
+    whoami is remembered for LOGIN_CACHE_SECONDS.
+    """
+    config = KubeConfig.load()
+    if config is not None and config.token:
+        expiry = token_expiry(config.token)
+        if expiry is not None:
+            return expiry > time.time()
+
+    key = credentials_key(config)
+    path = cache_path("login.json")
     try:
-        oc.invoke("whoami")
-        return True
-    except oc.OpenShiftPythonException:
+        with open(path) as f:
+            if json.load(f).get(key, 0) > time.time():
+                return True
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        user = get_backend().whoami()
+    except ApiError:
         return False
+    remember_user(key, user)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({key: time.time() + LOGIN_CACHE_SECONDS}, f)
+    except OSError:
+        pass
+    return True
+
+
+def remember_user(key: str, user: str) -> None:
+    """Remember the user name of the credentials identified by key."""
+    path = cache_path("user.json")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({key: user}, f)
+    except OSError:
+        pass
 
 
-def pretty_print(pod: oc.APIObject) -> str:
-    formatted_logs: str = ""
+def current_user() -> str:
+    """
+    The name of the authenticated user. It is remembered for the current
+    credentials, so only the first command after a login has to ask the
+    API server (and run oc, with the oc backend).
+    """
+    key = credentials_key(KubeConfig.load())
     try:
-        logs: dict[str, str] = pod.logs()
-        # ⋆ ˚｡⋆୨୧˚ stringify and pretty print for readibility ⋆ ˚｡⋆୨୧˚
-        formatted_logs = str(logs).replace("\\n", "\n")
-    except oc.OpenShiftPythonException as e:
-        print(f"Error occurred while retrieving logs: {e}")
+        with open(cache_path("user.json")) as f:
+            user = json.load(f).get(key)
+        if isinstance(user, str):
+            return user
+    except (OSError, ValueError, AttributeError):
+        pass
+    user = get_backend().whoami()
+    remember_user(key, user)
+    return user
 
-    return formatted_logs
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_duration(text: str) -> int:
+    """Parse a duration like "90", "15m" or "1h30m" into seconds."""
+    if text.isdigit():
+        return int(text)
+    parts = re.fullmatch(r"(?:\d+[smhd])+", text) and re.findall(r"(\d+)([smhd])", text)
+    if not parts:
+        raise argparse.ArgumentTypeError(
+            f"invalid duration {text!r} (expected e.g. 30s, 15m or 1h30m)"
+        )
+    return sum(int(n) * DURATION_UNITS[unit] for n, unit in parts)
+
+
+def format_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 2 * 60 * 60:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def parse_label_selector(text: str) -> dict[str, str | None]:
+    """
+    Parse a label selector like "app=train,batchtools/owner" into the dict
+    form that list_objects takes. Only equality and (non-)existence terms
+    are supported.
+    """
+    labels: dict[str, str | None] = {}
+    for term in filter(None, (t.strip() for t in text.split(","))):
+        key, sep, value = term.partition("=")
+        key = key.rstrip("=")
+        value = value.lstrip("=")
+        if sep and not key.endswith("!") and re.fullmatch(r"[\w./-]+", key + value):
+            labels[key] = value
+        elif not sep and re.fullmatch(r"!?[\w./-]+", term):
+            # "name" requires the label, "!name" requires its absence
+            labels[term[1:] if term.startswith("!") else f"!{term}"] = None
+        else:
+            raise argparse.ArgumentTypeError(
+                f"unsupported label selector term {term!r} "
+                "(expected key=value, key or !key)"
+            )
+    return labels
+
+
+def add_log_limit_arguments(p: argparse.ArgumentParser) -> None:
+    """Add the options that limit how much of a log is retrieved."""
+    p.add_argument(
+        "--tail",
+        type=int,
+        metavar="N",
+        help="Only show the last N lines of each log",
+    )
+    p.add_argument(
+        "--since",
+        type=parse_duration,
+        metavar="DURATION",
+        help="Only show log lines written in the last DURATION (e.g. 30s, 15m, 1h)",
+    )
+    p.add_argument(
+        "--limit-bytes",
+        type=int,
+        metavar="BYTES",
+        help="Show at most BYTES of each log",
+    )
+
+
+def log_limits(args: argparse.Namespace) -> LogLimits:
+    return LogLimits(
+        tail=getattr(args, "tail", None),
+        since=getattr(args, "since", None),
+        limit_bytes=getattr(args, "limit_bytes", None),
+    )
 
 
 def oc_delete(obj_type: str, obj_name: str) -> None:
     try:
         print(f"Deleting {obj_type}/{obj_name}")
-        oc.selector(f"{obj_type}/{obj_name}").delete()
-    except oc.OpenShiftPythonException as e:
+        get_backend().delete(obj_type, obj_name)
+    except ApiError as e:
         print(f"Error occurred while deleting {obj_type}/{obj_name}: {e}")
 
 
 def is_kueue_managed_job(job_obj) -> bool:
+    if isinstance(job_obj, JobRecord):
+        return job_obj.queue is not None
     try:
         md = job_obj.model.metadata
         labels = getattr(md, "labels", {}) or {}
-        if "kueue.x-k8s.io/queue-name" in labels:
+        if KUEUE_QUEUE_LABEL in labels:
             return True
     except Exception:
         return False
 
 
-def is_kueue_managed_pod(pod) -> bool:
+def label_value(text: str) -> str:
+    """
+    Turn arbitrary text (e.g. "system:serviceaccount:ns:name") into a valid
+    label value: at most 63 characters from [A-Za-z0-9_.-], starting and
+    ending with an alphanumeric.
+    """
+    value = re.sub(r"[^A-Za-z0-9_.-]", "_", text)[:63]
+    return re.sub(r"^[^A-Za-z0-9]+|[^A-Za-z0-9]+$", "", value)
+
+
+def job_owner() -> str:
+    """The value of the batchtools/owner label for the current user."""
+    return label_value(current_user())
+
+
+def owned_jobs_selector(owner: str) -> dict[str, str | None]:
+    """Select the Kueue-managed jobs that br created for owner."""
+    return {OWNER_LABEL: owner, f"!{KUEUE_QUEUE_LABEL}": None}
+
+
+def kueue_job_index() -> set[str]:
+    """Return the names of all Kueue-managed jobs, from a single listing."""
+    return {job.name for job in fetch_jobs(labels={f"!{KUEUE_QUEUE_LABEL}": None})}
+
+
+def is_kueue_managed_pod(pod, jobs: Container[str] | None = None) -> bool:
+    """
+    Check whether a pod (an APIObject or a PodRecord) belongs to a
+    Kueue-managed job. Pass the names from kueue_job_index() when checking
+    many pods; otherwise the owning job is looked up.
+    """
     try:
-        owners = getattr(pod.model.metadata, "ownerReferences", []) or []
-        job_owner = next((o for o in owners if o.kind == "Job"), None)
-        if not job_owner:
+        if isinstance(pod, PodRecord):
+            job_name = pod.job
+        else:
+            owners = getattr(pod.model.metadata, "ownerReferences", []) or []
+            job_owner = next((o for o in owners if o.kind == "Job"), None)
+            job_name = job_owner.name if job_owner else None
+        if not job_name:
             return False
 
-        job_name = job_owner.name
-        job_obj = oc.selector(f"job/{job_name}").object()
+        if jobs is not None:
+            return job_name in jobs
+        job_obj = get_backend().get("job", job_name)
         return is_kueue_managed_job(job_obj)
 
     except Exception:
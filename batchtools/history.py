@@ -0,0 +1,185 @@
+"""
+A local record of every job br submits, kept in an SQLite database so that
+queue waits and GPU usage can be looked at after the jobs are gone.
+
+The database lives in $XDG_DATA_HOME/batchtools/history.db unless
+BATCHTOOLS_HISTORY names another file. Each write is a single short
+transaction on a database in WAL mode, so recording a job costs well under
+a millisecond; a failed write is reported and otherwise ignored.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from typing import Any
+
+import os
+import time
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    from .timings import ClusterTimes
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    user TEXT,
+    queue TEXT,
+    gpu TEXT,
+    gpus INTEGER,
+    image TEXT,
+    command TEXT,
+    context_bytes INTEGER,
+    submitted_at REAL,
+    created_at REAL,
+    admitted_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    phase TEXT
+)
+"""
+
+
+def history_path() -> str:
+    path = os.environ.get("BATCHTOOLS_HISTORY")
+    if path:
+        return path
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data_home, "batchtools", "history.db")
+
+
+@contextmanager
+def connect(path: str | None = None) -> Iterator["sqlite3.Connection"]:
+    """Open the history database, creating it if needed, in one transaction."""
+    import sqlite3
+
+    path = path or history_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=1.0)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "created_at" not in columns:
+            # databases written before the cluster's creation time was kept
+            conn.execute("ALTER TABLE jobs ADD COLUMN created_at REAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _write(sql: str, params: dict[str, Any]) -> None:
+    import sqlite3
+
+    try:
+        with connect() as conn:
+            conn.execute(sql, params)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error occurred while recording job history: {e}")
+
+
+def record_submission(
+    name: str,
+    *,
+    user: str,
+    queue: str,
+    gpu: str,
+    gpus: int,
+    image: str,
+    command: str,
+    submitted_at: float | None = None,
+) -> None:
+    _write(
+        "INSERT OR REPLACE INTO jobs"
+        " (name, user, queue, gpu, gpus, image, command, submitted_at)"
+        " VALUES (:name, :user, :queue, :gpu, :gpus, :image, :command, :submitted_at)",
+        {
+            "name": name,
+            "user": user,
+            "queue": queue,
+            "gpu": gpu,
+            "gpus": gpus,
+            "image": image,
+            "command": command,
+            "submitted_at": submitted_at if submitted_at is not None else time.time(),
+        },
+    )
+
+
+def record_completion(
+    name: str, times: "ClusterTimes | None", context_bytes: int | None = None
+) -> None:
+    """Add what the cluster knows about a finished job to its record."""
+    _write(
+        "UPDATE jobs SET"
+        " created_at = :created, admitted_at = :admitted, started_at = :started,"
+        " finished_at = :finished,"
+        " phase = :phase, context_bytes = coalesce(:context_bytes, context_bytes)"
+        " WHERE name = :name",
+        {
+            "name": name,
+            "created": times.created if times else None,
+            "admitted": times.admitted if times else None,
+            "started": times.started if times else None,
+            "finished": times.finished if times else None,
+            "phase": times.phase if times else None,
+            "context_bytes": context_bytes,
+        },
+    )
+
+
+def queue_waits(conn: "sqlite3.Connection", since: float) -> dict[str, list[float]]:
+    """Map GPU types to the queue waits of the jobs submitted since then.
+
+    A job waits from when the API server created it until Kueue admitted it,
+    both as the cluster recorded them, so the client's clock and the time br
+    took to create the job do not count. Older records without the creation
+    time fall back to when br submitted the job.
+    """
+    waits: dict[str, list[float]] = {}
+    rows = conn.execute(
+        "SELECT gpu, admitted_at - coalesce(created_at, submitted_at) FROM jobs"
+        " WHERE submitted_at >= ? AND admitted_at IS NOT NULL",
+        (since,),
+    )
+    for gpu, wait in rows:
+        waits.setdefault(gpu, []).append(max(0.0, wait))
+    return waits
+
+
+def run_times(conn: "sqlite3.Connection", since: float) -> dict[str, list[float]]:
+    """Map GPU types to how long the jobs started since then ran."""
+    runs: dict[str, list[float]] = {}
+    rows = conn.execute(
+        "SELECT gpu, finished_at - started_at FROM jobs"
+        " WHERE started_at >= ? AND finished_at IS NOT NULL",
+        (since,),
+    )
+    for gpu, run in rows:
+        runs.setdefault(gpu, []).append(max(0.0, run))
+    return runs
+
+
+def gpu_hours(conn: "sqlite3.Connection", since: float) -> list[tuple[str, str, float]]:
+    """Return (week, user, GPU-hours) for the jobs started since then."""
+    return conn.execute(
+        "SELECT strftime('%Y-W%W', started_at, 'unixepoch') AS week, user,"
+        " sum((finished_at - started_at) * gpus) / 3600.0"
+        " FROM jobs"
+        " WHERE started_at >= ? AND finished_at IS NOT NULL"
+        " GROUP BY week, user ORDER BY week, user",
+        (since,),
+    ).fetchall()
+
+
+def recent_jobs(conn: "sqlite3.Connection", limit: int) -> list[tuple]:
+    return conn.execute(
+        "SELECT name, gpu, phase, coalesce(created_at, submitted_at), admitted_at,"
+        " started_at, finished_at"
+        " FROM jobs ORDER BY submitted_at DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
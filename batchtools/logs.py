@@ -0,0 +1,186 @@
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import BinaryIO
+from typing import Protocol
+
+import sys
+import time
+
+from .backend import NO_LOG_LIMITS
+from .backend import ApiError
+from .backend import LogLimits
+from .backend import get_backend
+
+if TYPE_CHECKING:
+    import openshift_client as oc
+
+    from .records import PodRecord
+
+
+# largest piece of a log line we hold in memory at once
+LOG_CHUNK_SIZE = 64 * 1024
+
+# how often we reconnect a dropped log stream before giving up
+MAX_RECONNECTS = 5
+RECONNECT_DELAY = 1.0
+
+
+class LogOutput(Protocol):
+    """Where logs are copied to: a binary file, or anything that takes bytes like one."""
+
+    def write(self, data: bytes, /) -> object: ...
+
+    def flush(self) -> None: ...
+
+
+def _stdout() -> BinaryIO:
+    # anything already print()ed must come out before the raw log bytes
+    sys.stdout.flush()
+    return sys.stdout.buffer
+
+
+def pod_containers(pod: "oc.APIObject | PodRecord") -> tuple[str, list[str]]:
+    """Return the name of a pod and the names of its containers."""
+    if hasattr(pod, "model"):
+        containers: Any = pod.model.spec.containers or []
+        return pod.model.metadata.name, [c.name for c in containers]
+    return pod.name, list(pod.containers)
+
+
+def write_pod_logs(
+    pod: "oc.APIObject | PodRecord",
+    out: LogOutput | None = None,
+    *,
+    limits: LogLimits = NO_LOG_LIMITS,
+) -> None:
+    """
+    Copy the log of every container of a pod to out (stdout by default),
+    each under a header naming the container. Logs are copied as they are
+    received, in chunks of at most LOG_CHUNK_SIZE, and are never decoded, so
+    memory use does not depend on the size of the log.
+    """
+    if out is None:
+        out = _stdout()
+
+    backend = get_backend()
+    name, containers = pod_containers(pod)
+    for container in containers:
+        out.write(f"==> {name}/{container} <==\n".encode())
+        at_line_start = True
+        try:
+            for chunk in backend.stream_logs(
+                name, container=container, limits=limits, chunk_size=LOG_CHUNK_SIZE
+            ):
+                out.write(chunk)
+                at_line_start = chunk.endswith(b"\n")
+        except ApiError as e:
+            if not at_line_start:
+                out.write(b"\n")
+            at_line_start = True
+            out.write(f"Error occurred while retrieving logs: {e}\n".encode())
+        if not at_line_start:
+            out.write(b"\n")
+    out.flush()
+
+
+def _ts_key(ts: bytes) -> tuple[bytes, bytes]:
+    """
+    Make an RFC3339Nano timestamp comparable. The API server trims trailing
+    zeros from the fractional seconds, so plain byte comparison is not enough.
+    """
+    secs, _, frac = ts.rstrip(b"Z").partition(b".")
+    return secs, frac.ljust(9, b"0")
+
+
+def follow_pod_logs(
+    pod_name: str,
+    *,
+    container: str | None = None,
+    out: LogOutput | None = None,
+    limits: LogLimits = NO_LOG_LIMITS,
+) -> None:
+    """
+    Stream a pod's logs as they are written, like `oc logs -f`, until the
+    container exits. Output is copied in chunks of at most LOG_CHUNK_SIZE, so
+    memory use does not depend on the size of the log.
+
+    If the connection drops, reconnect and resume with --since-time from the
+    timestamp of the last line we printed, skipping lines already written.
+    tail and since apply to the first connection only. limit_bytes is
+    applied here rather than by the API server, which would count the
+    timestamps we ask for against it, and holds across reconnects.
+    """
+    if out is None:
+        out = _stdout()
+
+    backend = get_backend()
+    budget = limits.limit_bytes
+    limits = limits._replace(limit_bytes=None)
+    last_ts: bytes | None = None
+    written = 0
+    # whether our output ends in the middle of a line
+    open_line = False
+    for attempt in range(MAX_RECONNECTS + 1):
+        resume_after = last_ts
+        if resume_after is not None:
+            limits = NO_LOG_LIMITS
+        lines = backend.stream_logs(
+            pod_name,
+            container=container,
+            follow=True,
+            timestamps=True,
+            since_time=resume_after.decode() if resume_after else None,
+            limits=limits,
+            chunk_size=LOG_CHUNK_SIZE,
+        )
+
+        at_line_start = True
+        skipping = False
+        try:
+            for chunk in lines:
+                if budget is not None and written >= budget:
+                    break
+                if at_line_start:
+                    ts, sep, rest = chunk.partition(b" ")
+                    if sep and ts[:1].isdigit():
+                        # lines up to resume_after were printed before we reconnected
+                        skipping = resume_after is not None and _ts_key(ts) <= _ts_key(
+                            resume_after
+                        )
+                        if not skipping:
+                            last_ts = ts
+                        chunk = rest
+                at_line_start = chunk.endswith(b"\n")
+                if not skipping:
+                    if budget is not None:
+                        chunk = chunk[: budget - written]
+                    written += len(chunk)
+                    out.write(chunk)
+                    if chunk:
+                        open_line = not chunk.endswith(b"\n")
+                    if not open_line:
+                        out.flush()
+            if open_line:
+                out.write(b"\n")
+            return
+        except ApiError as e:
+            error = e
+        finally:
+            lines.close()
+            out.flush()
+
+        if open_line:
+            # the rest of that line is lost with the connection
+            out.write(b"\n")
+            open_line = False
+        if attempt < MAX_RECONNECTS:
+            print(
+                f"Log stream for {pod_name} interrupted, reconnecting...",
+                file=sys.stderr,
+            )
+            time.sleep(RECONNECT_DELAY)
+        else:
+            print(
+                f"Error occurred while streaming logs for {pod_name}: {error}",
+                file=sys.stderr,
+            )
@@ -0,0 +1,281 @@
+"""
+Choose the GPU queue a job is likely to be admitted from first, for
+br --gpu auto and --gpu v100,a100.
+
+For each candidate GPU type we read the nominal GPU quota and the GPUs in
+use of its ClusterQueue (what bq shows) and add up the GPUs that pending
+Workloads ask for. A job that fits in the free quota is admitted at once;
+otherwise it waits until enough GPUs are freed, which at a steady state
+happens at a rate of quota GPUs per typical run time. Run times come from
+the local job history.
+
+The queue status is cached for QUEUE_CACHE_SECONDS, and every job placed
+from it is added to the cached pending GPUs, so that bulk submissions
+spread over the queues without asking the API server for every job.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+from typing import NamedTuple
+
+import json
+import math
+import os
+import threading
+import time
+
+from .backend import KubeConfig
+from .backend import get_backend
+from .helpers import cache_path
+from .helpers import credentials_key
+from .history import connect
+from .history import run_times
+from .records import GPU_RESOURCE
+from .startup import percentile
+from .wait import workload_state
+
+DEFAULT_QUEUES = {
+    "v100": "v100-localqueue",
+    "a100": "a100-localqueue",
+    "h100": "h100-localqueue",
+    "none": "dummy-localqueue",
+}
+
+# the GPU types --gpu auto chooses from, in order of preference on a tie
+AUTO_GPUS = ("v100", "a100", "h100")
+
+QUEUE_CACHE_SECONDS = 30
+
+# assumed run time of a job when the history has none for its GPU type
+DEFAULT_RUN_SECONDS = 15 * 60
+
+# how far back the history is used for typical run times
+RUN_HISTORY_SECONDS = 30 * 24 * 60 * 60
+
+
+def parse_gpu_choice(text: str) -> list[str]:
+    """
+    Parse --gpu: a GPU type, "auto", or a comma-separated preference list of
+    GPU types. Raises ValueError naming what is not a GPU type.
+    """
+    if text == "auto":
+        return list(AUTO_GPUS)
+    if text in DEFAULT_QUEUES:
+        return [text]
+    gpus = [gpu.strip() for gpu in text.split(",") if gpu.strip()]
+    unknown = [gpu for gpu in gpus if gpu not in AUTO_GPUS]
+    if not gpus or unknown:
+        raise ValueError(", ".join(unknown) or text)
+    return list(dict.fromkeys(gpus))
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def gpu_quota(cq_dict: dict[str, Any]) -> int:
+    """Total nominal GPU quota of a ClusterQueue, across resource groups and flavors."""
+    total = 0
+    for rg in cq_dict.get("spec", {}).get("resourceGroups", []) or []:
+        for flav in rg.get("flavors", []) or []:
+            for res in flav.get("resources", []) or []:
+                if res.get("name") == GPU_RESOURCE:
+                    total += _int(res.get("nominalQuota", 0))
+    return total
+
+
+def gpus_reserved(cq_dict: dict[str, Any]) -> int:
+    """GPUs held by the ClusterQueue's admitted Workloads."""
+    status = cq_dict.get("status", {})
+    flavors = status.get("flavorsReservation") or status.get("flavorsUsage")
+    if flavors is None:
+        # older Kueue: assume one GPU per admitted Workload
+        return _int(status.get("reservingWorkloads", status.get("admittedWorkloads")))
+    return sum(
+        _int(res.get("total"))
+        for flav in flavors
+        for res in flav.get("resources", []) or []
+        if res.get("name") == GPU_RESOURCE
+    )
+
+
+def workload_gpus(wl: dict[str, Any]) -> int:
+    """GPUs a Workload asks for, over all of its pods."""
+    total = 0
+    for ps in wl.get("spec", {}).get("podSets", []) or []:
+        containers = ps.get("template", {}).get("spec", {}).get("containers") or []
+        per_pod = sum(
+            _int(((c.get("resources") or {}).get("requests") or {}).get(GPU_RESOURCE))
+            for c in containers
+        )
+        total += per_pod * _int(ps.get("count", 1))
+    return total
+
+
+class QueueStatus(NamedTuple):
+    gpu: str
+    # nominal GPU quota of the ClusterQueue
+    quota: int
+    # GPUs held by admitted Workloads
+    used: int
+    # GPUs asked for by pending Workloads
+    pending: int
+    # typical run time of a job on this GPU type
+    run_seconds: float
+
+    def estimate(self, gpus: int) -> float:
+        """Seconds until a job asking for gpus would be admitted."""
+        if self.quota < max(gpus, 1):
+            return math.inf
+        shortfall = self.used + self.pending + gpus - self.quota
+        if shortfall <= 0:
+            return 0.0
+        return shortfall / self.quota * self.run_seconds
+
+
+def typical_run_seconds() -> dict[str, float]:
+    """The median run time per GPU type of the jobs in the history."""
+    import sqlite3
+
+    try:
+        with connect() as conn:
+            runs = run_times(conn, time.time() - RUN_HISTORY_SECONDS)
+    except (OSError, sqlite3.Error):
+        return {}
+    return {gpu: percentile(values, 50) for gpu, values in runs.items() if values}
+
+
+def fetch_queue_status(gpus: Iterable[str]) -> dict[str, QueueStatus]:
+    """
+    Read the status of the queues of the given GPU types from the cluster.
+    GPU types whose queue does not exist are left out.
+    """
+    backend = get_backend()
+    local_queues = {
+        lq["metadata"]["name"]: lq.get("spec", {}).get("clusterQueue")
+        for lq in (obj.as_dict() for obj in backend.list_objects("localqueues"))
+    }
+    cluster_queues = {
+        cq["metadata"]["name"]: cq
+        for cq in (obj.as_dict() for obj in backend.list_objects("clusterqueues"))
+    }
+
+    # Workloads of other namespaces are not visible, so the ClusterQueue's
+    # count of pending Workloads (one GPU each at least) is a lower bound
+    pending: dict[str, int] = {}
+    for wl in (obj.as_dict() for obj in backend.iter_objects("workloads")):
+        if workload_state(wl) == "Pending":
+            cq = local_queues.get(wl.get("spec", {}).get("queueName"))
+            if cq:
+                pending[cq] = pending.get(cq, 0) + workload_gpus(wl)
+
+    run_seconds = typical_run_seconds()
+    statuses = {}
+    for gpu in gpus:
+        cq_name = local_queues.get(DEFAULT_QUEUES[gpu])
+        cq = cluster_queues.get(cq_name) if cq_name else None
+        if cq is None:
+            continue
+        waiting = _int(cq.get("status", {}).get("pendingWorkloads"))
+        statuses[gpu] = QueueStatus(
+            gpu=gpu,
+            quota=gpu_quota(cq),
+            used=gpus_reserved(cq),
+            pending=max(pending.get(cq_name, 0), waiting),
+            run_seconds=run_seconds.get(gpu, DEFAULT_RUN_SECONDS),
+        )
+    return statuses
+
+
+class QueuePicker:
+    """
+    Place jobs on the queue of the GPU type with the shortest expected wait.
+    Safe to share between threads.
+    """
+
+    def __init__(self, gpus: list[str]) -> None:
+        self.gpus = gpus
+        self.lock = threading.Lock()
+        self.statuses: dict[str, QueueStatus] | None = None
+        # when the statuses were read from the cluster
+        self.fetched_at = 0.0
+        self.path = cache_path("queues.json")
+        self.key = credentials_key(KubeConfig.load())
+
+    def prefetch(self) -> None:
+        """Read the queue status now, so that the first pick need not."""
+        with self.lock:
+            self._statuses()
+
+    def pick(self, gpus: int) -> tuple[str, dict[str, float]]:
+        """
+        Choose the GPU type for a job asking for gpus, and count the job as
+        pending there. Returns the choice and the estimated wait of every
+        candidate.
+        """
+        with self.lock:
+            statuses = self._statuses()
+            estimates = {
+                gpu: statuses[gpu].estimate(gpus)
+                for gpu in self.gpus
+                if gpu in statuses
+            }
+            if not estimates:
+                # no queue status to go by: take the first preference
+                return self.gpus[0], estimates
+            best = min(
+                estimates, key=lambda gpu: (estimates[gpu], self.gpus.index(gpu))
+            )
+            status = statuses[best]
+            statuses[best] = status._replace(pending=status.pending + gpus)
+            self._save(statuses)
+            return best, estimates
+
+    def _statuses(self) -> dict[str, QueueStatus]:
+        # another br may have placed jobs or read newer status since we last
+        # looked; the file has ours too, unless it could not be written
+        cached = self._load()
+        if cached is not None and cached[0] >= self.fetched_at:
+            self.fetched_at, self.statuses = cached
+        elif self.statuses is None or (
+            time.time() - self.fetched_at > QUEUE_CACHE_SECONDS
+        ):
+            self.statuses = fetch_queue_status(AUTO_GPUS)
+            self.fetched_at = time.time()
+        return self.statuses
+
+    def _load(self) -> tuple[float, dict[str, QueueStatus]] | None:
+        """The fresh statuses in the cache file and when they were fetched."""
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            if cached["key"] != self.key:
+                return None
+            if time.time() - cached["time"] > QUEUE_CACHE_SECONDS:
+                return None
+            return cached["time"], {
+                gpu: QueueStatus(*fields) for gpu, fields in cached["queues"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, statuses: dict[str, QueueStatus]) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(
+                    {
+                        "key": self.key,
+                        # placing jobs does not make the status any fresher
+                        "time": self.fetched_at,
+                        "queues": {gpu: list(s) for gpu, s in statuses.items()},
+                    },
+                    f,
+                )
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
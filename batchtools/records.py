@@ -0,0 +1,128 @@
+"""
+Compact records for the list commands.
+
+Listing commands read only a few fields of each object. Rather than keeping
+full models alive, the fetch functions here turn every object into a small
+tuple as it arrives. With the REST backend the objects are never turned into
+models at all: records are built straight from each page of JSON, and jobs
+are listed as metadata only.
+"""
+
+from collections.abc import Iterator
+from typing import Any
+from typing import NamedTuple
+
+from .backend import get_backend
+
+
+KUEUE_QUEUE_LABEL = "kueue.x-k8s.io/queue-name"
+# set by br on every job it creates, so bd can find them with one selector
+OWNER_LABEL = "batchtools/owner"
+GPU_RESOURCE = "nvidia.com/gpu"
+
+
+def _attr(obj: Any, *path: str) -> Any:
+    """Follow attributes of a model, returning None if any is missing."""
+    for name in path:
+        obj = getattr(obj, name, None)
+        if obj is None:
+            return None
+    return obj
+
+
+def _str(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _gpus(requests: Any) -> int:
+    try:
+        return int(requests.get(GPU_RESOURCE, 0) or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+class JobRecord(NamedTuple):
+    name: str
+    # the Kueue queue the job was submitted to, if it is Kueue-managed
+    queue: str | None = None
+
+    # everything we need is in the metadata
+    METADATA_ONLY = True
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> "JobRecord":
+        md = obj.get("metadata") or {}
+        return cls(md.get("name", ""), (md.get("labels") or {}).get(KUEUE_QUEUE_LABEL))
+
+    @classmethod
+    def from_object(cls, obj: Any) -> "JobRecord":
+        labels = _attr(obj, "model", "metadata", "labels")
+        queue = labels.get(KUEUE_QUEUE_LABEL) if isinstance(labels, dict) else None
+        return cls(obj.model.metadata.name, queue)
+
+
+class PodRecord(NamedTuple):
+    name: str
+    namespace: str = ""
+    phase: str = ""
+    node: str = ""
+    # the job that owns the pod, if any
+    job: str | None = None
+    containers: tuple[str, ...] = ()
+    # total nvidia.com/gpu requested by all containers
+    gpus: int = 0
+
+    METADATA_ONLY = False
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> "PodRecord":
+        md = obj.get("metadata") or {}
+        spec = obj.get("spec") or {}
+        owner = next(
+            (o for o in md.get("ownerReferences") or [] if o.get("kind") == "Job"), {}
+        )
+        containers = spec.get("containers") or []
+        return cls(
+            name=md.get("name", ""),
+            namespace=md.get("namespace", ""),
+            phase=(obj.get("status") or {}).get("phase", ""),
+            node=spec.get("nodeName") or "",
+            job=owner.get("name") or (md.get("labels") or {}).get("job-name"),
+            containers=tuple(c.get("name", "") for c in containers),
+            gpus=sum(
+                _gpus((c.get("resources") or {}).get("requests")) for c in containers
+            ),
+        )
+
+    @classmethod
+    def from_object(cls, obj: Any) -> "PodRecord":
+        md = obj.model.metadata
+        job = None
+        owners = _attr(md, "ownerReferences")
+        if isinstance(owners, list):
+            job = next((o.name for o in owners if o.kind == "Job"), None)
+        labels = _attr(md, "labels")
+        if job is None and isinstance(labels, dict):
+            job = labels.get("job-name")
+        containers = _attr(obj, "model", "spec", "containers")
+        if not isinstance(containers, list):
+            containers = []
+        return cls(
+            name=md.name,
+            namespace=_str(_attr(md, "namespace")),
+            phase=_str(_attr(obj, "model", "status", "phase")),
+            node=_str(_attr(obj, "model", "spec", "nodeName")),
+            job=job,
+            containers=tuple(_str(_attr(c, "name")) for c in containers),
+            gpus=sum(_gpus(_attr(c, "resources", "requests")) for c in containers),
+        )
+
+
+def fetch_jobs(**selectors: Any) -> Iterator[JobRecord]:
+    """Yield a JobRecord per job. Accepts the selectors of list_objects."""
+    return get_backend().records("jobs", JobRecord, **selectors)
+
+
+def fetch_pods(**selectors: Any) -> Iterator[PodRecord]:
+    """Yield a PodRecord per pod. Accepts the selectors of list_objects."""
+    return get_backend().records("pods", PodRecord, **selectors)
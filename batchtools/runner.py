@@ -0,0 +1,498 @@
+"""
+Drive the whole lifecycle of many jobs from one process and one event loop:
+create each job, wait for its pod, stream its log, sync its results and
+delete it.
+
+All jobs share a single watch on the pods of the namespace, so waiting costs
+no connection per job. The other stages call the blocking backend from a
+thread pool; each stage has its own concurrency limit, which is what
+protects the API server when thousands of jobs are in flight.
+
+From a script:
+
+    from batchtools.runner import run_jobs
+
+    results = run_jobs(bodies, timeout=3600)
+
+or, from code that already runs an event loop:
+
+    async with JobRunner(jobs_dir="jobs") as runner:
+        results = await asyncio.gather(*(runner.run(body) for body in bodies))
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import BinaryIO
+from typing import NamedTuple
+from typing import TypeVar
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from .archive import archive_job_logs
+from .backend import NO_LOG_LIMITS
+from .backend import ApiError
+from .backend import LogLimits
+from .backend import WatchUnavailable
+from .backend import get_backend
+from .logs import follow_pod_logs
+from .wait import POLL_BACKOFF
+from .wait import POLL_MAX_INTERVAL
+from .wait import POLL_MIN_INTERVAL
+from .wait import TERMINAL_PHASES
+from .wait import pod_phase
+
+T = TypeVar("T")
+
+# the shared watch is restarted this often, which also bounds how long its
+# thread outlives the runner
+WATCH_WINDOW = 60
+
+# how long the watch thread waits before retrying after an API error
+WATCH_RETRY_DELAY = 2.0
+
+# without a watch, the pods are polled this long before the watch is tried again
+POLL_WINDOW = 60
+
+
+def _remaining(deadline: float | None) -> float | None:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+class StageLimits(NamedTuple):
+    """How many jobs may be in each stage at once."""
+
+    # job lifecycles in flight; further jobs are not read from the input yet
+    jobs: int = 1024
+    create: int = 16
+    # each followed log holds a connection and a thread until the pod exits
+    logs: int = 64
+    # archiving the logs and running on_finished
+    sync: int = 8
+    delete: int = 16
+
+
+class JobResult(NamedTuple):
+    name: str
+    # the pod the job ran in, if it got one
+    pod: str | None = None
+    # Succeeded or Failed; None if the job timed out or could not be created
+    phase: str | None = None
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.phase == "Succeeded"
+
+
+class PrefixedOutput:
+    """
+    Interleave the output of many jobs on one stream, one whole line at a
+    time, each line prefixed with the name of its job.
+    """
+
+    def __init__(self, out: BinaryIO | None = None) -> None:
+        self.out = out
+        self.lock = threading.Lock()
+
+    def stream(self, name: str) -> "JobOutput":
+        return JobOutput(self, f"[{name}] ".encode())
+
+    def write_lines(self, data: bytes) -> None:
+        with self.lock:
+            out = self.out
+            if out is None:
+                # anything already print()ed must come out before our bytes
+                sys.stdout.flush()
+                out = sys.stdout.buffer
+            out.write(data)
+            out.flush()
+
+    def say(self, name: str, message: str) -> None:
+        self.write_lines(f"[{name}] {message}\n".encode())
+
+
+class JobOutput:
+    """The binary stream of one job, as follow_pod_logs expects it."""
+
+    def __init__(self, shared: PrefixedOutput, prefix: bytes) -> None:
+        self.shared = shared
+        self.prefix = prefix
+        self.partial = b""
+
+    def write(self, data: bytes) -> int:
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        if lines:
+            self.shared.write_lines(
+                b"".join(self.prefix + line + b"\n" for line in lines)
+            )
+        return len(data)
+
+    def flush(self) -> None:
+        # partial lines are held back until they are complete or we close
+        pass
+
+    def close(self) -> None:
+        if self.partial:
+            self.shared.write_lines(self.prefix + self.partial + b"\n")
+            self.partial = b""
+
+
+class PodWatcher:
+    """
+    One watch on every pod that belongs to a job, shared by all the jobs of a
+    runner. The watch runs in its own thread and hands the pods of the jobs
+    we are interested in to the event loop, where waiters are woken up.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.stopped = threading.Event()
+        # job name -> pod name -> latest pod seen
+        self.pods: dict[str, dict[str, dict[str, Any]]] = {}
+        self.changed: dict[str, asyncio.Event] = {}
+        self.thread = threading.Thread(
+            target=self._run, name="batchtools-pod-watch", daemon=True
+        )
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def track(self, job_name: str) -> None:
+        """Start collecting the pods of a job; call before creating it."""
+        self.pods.setdefault(job_name, {})
+        self.changed.setdefault(job_name, asyncio.Event())
+
+    def forget(self, job_name: str) -> None:
+        self.pods.pop(job_name, None)
+        self.changed.pop(job_name, None)
+
+    async def wait(
+        self,
+        job_name: str,
+        *,
+        phases: tuple[str, ...],
+        deadline: float | None,
+    ) -> tuple[str, str] | None:
+        """
+        Wait until a pod of the job reaches one of phases. Returns (pod name,
+        phase), or None once the deadline (in time.monotonic()) has passed.
+        """
+        self.track(job_name)
+        changed = self.changed[job_name]
+        while True:
+            for name, pod in self.pods[job_name].items():
+                if pod_phase(pod) in phases:
+                    return name, pod_phase(pod)
+            changed.clear()
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def _update(self, pods: list[dict[str, Any]]) -> None:
+        # runs in the event loop
+        for pod in pods:
+            metadata = pod["metadata"]
+            job_name = (metadata.get("labels") or {}).get("job-name")
+            if job_name in self.pods:
+                self.pods[job_name][metadata["name"]] = pod
+                self.changed[job_name].set()
+
+    def _deliver(self, pods: list[dict[str, Any]]) -> None:
+        if pods and not self.stopped.is_set():
+            try:
+                self.loop.call_soon_threadsafe(self._update, pods)
+            except RuntimeError:
+                # the event loop has been closed under us
+                self.stopped.set()
+
+    def _run(self) -> None:
+        backend = get_backend()
+        params = {"labelSelector": "job-name"}
+        polling = False
+        while not self.stopped.is_set():
+            try:
+                self._watch(backend, params)
+            except WatchUnavailable as e:
+                if not polling:
+                    print(f"Watch unavailable ({e}), falling back to polling")
+                polling = True
+                self._poll(backend, until=time.monotonic() + POLL_WINDOW)
+            except ApiError as e:
+                print(f"Error occurred while watching pods: {e}", file=sys.stderr)
+                self.stopped.wait(WATCH_RETRY_DELAY)
+
+    def _watch(self, backend: Any, params: dict[str, str]) -> None:
+        pods, resource_version = backend.list_raw("pods", params)
+        self._deliver(pods)
+        while not self.stopped.is_set():
+            for event_type, obj in backend.watch(
+                "pods", params, resource_version, WATCH_WINDOW
+            ):
+                if self.stopped.is_set():
+                    return
+                if event_type == "ERROR":
+                    # 410 Gone: our resourceVersion is too old, list again
+                    return
+                resource_version = obj["metadata"]["resourceVersion"]
+                if event_type in ("ADDED", "MODIFIED"):
+                    self._deliver([obj])
+
+    def _poll(self, backend: Any, *, until: float) -> None:
+        # with adaptive backoff, like wait.wait_for(); returns at until so
+        # that the watch is tried again
+        interval = POLL_MIN_INTERVAL
+        last_versions = None
+        while not self.stopped.is_set() and time.monotonic() < until:
+            try:
+                pods = [
+                    pod.as_dict()
+                    for pod in backend.list_objects("pods", labels={"!job-name": None})
+                ]
+            except ApiError as e:
+                print(f"Error occurred while polling pods: {e}", file=sys.stderr)
+                interval = max(interval, WATCH_RETRY_DELAY)
+            else:
+                self._deliver(pods)
+                versions = [pod["metadata"].get("resourceVersion") for pod in pods]
+                if versions != last_versions:
+                    # something is happening; look again soon
+                    last_versions = versions
+                    interval = POLL_MIN_INTERVAL
+            self.stopped.wait(interval)
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+
+class JobRunner:
+    """
+    Run batch jobs to completion concurrently: create, wait, stream logs,
+    sync, delete. With follow, logs are streamed from the moment a pod
+    runs; otherwise they are printed once it has finished. Use as an async
+    context manager, then await run() for each job body, or run_all() for
+    many.
+
+    Subclasses can override on_created() and on_finished(), which are
+    called from a worker thread after a job has been created and before it
+    is deleted.
+    """
+
+    def __init__(
+        self,
+        *,
+        limits: StageLimits = StageLimits(),
+        timeout: float | None = None,
+        follow: bool = True,
+        log_limits: LogLimits = NO_LOG_LIMITS,
+        jobs_dir: str | None = None,
+        delete: bool = True,
+        out: BinaryIO | None = None,
+    ) -> None:
+        self.limits = limits
+        self.timeout = timeout
+        self.follow = follow
+        self.log_limits = log_limits
+        self.jobs_dir = jobs_dir
+        self.delete = delete
+        self.output = PrefixedOutput(out)
+
+        self.executor: ThreadPoolExecutor | None = None
+        self.watcher: PodWatcher | None = None
+
+    async def __aenter__(self) -> "JobRunner":
+        limits = self.limits
+        self.create_slots = asyncio.Semaphore(limits.create)
+        self.log_slots = asyncio.Semaphore(limits.logs)
+        self.sync_slots = asyncio.Semaphore(limits.sync)
+        self.delete_slots = asyncio.Semaphore(limits.delete)
+        self.executor = ThreadPoolExecutor(
+            max_workers=limits.create + limits.logs + limits.sync + limits.delete,
+            thread_name_prefix="batchtools-runner",
+        )
+        self.watcher = PodWatcher(asyncio.get_running_loop())
+        self.watcher.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        assert self.watcher is not None and self.executor is not None
+        self.watcher.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def on_created(self, job_name: str, body: dict[str, Any]) -> None:
+        """Called once the job exists on the cluster."""
+
+    def on_finished(self, result: JobResult) -> None:
+        """Called once the job has finished or timed out, before it is deleted."""
+
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking function in the runner's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
+    async def run(self, body: dict[str, Any]) -> JobResult:
+        """Take one job through its whole lifecycle and return how it ended."""
+        assert self.watcher is not None, "use JobRunner as an async context manager"
+        name = body["metadata"]["name"]
+        self.watcher.track(name)
+        # not cancelled along with us, so that we know whether the job exists
+        creating = asyncio.ensure_future(self._create(body))
+        try:
+            try:
+                await asyncio.shield(creating)
+            except ApiError as e:
+                self.output.say(name, f"Error occurred while creating job: {e}")
+                return JobResult(name, error=str(e))
+            await self.call(self.on_created, name, body)
+            self.output.say(name, "created")
+
+            deadline = None if not self.timeout else time.monotonic() + self.timeout
+            result = await self._wait_and_log(name, deadline)
+
+            async with self.sync_slots:
+                if self.jobs_dir is not None and result.pod is not None:
+                    await self.call(self._archive, name)
+                await self.call(self.on_finished, result)
+
+            if self.delete or result.phase is None:
+                async with self.delete_slots:
+                    await self.call(self._delete, name)
+            return result
+        except BaseException:
+            # failed or cancelled half-way: do not leave the job behind
+            await self._discard(name, creating)
+            raise
+        finally:
+            self.watcher.forget(name)
+
+    async def run_all(self, bodies: Iterable[dict[str, Any]]) -> list[JobResult]:
+        """
+        Run every job of bodies, which is consumed lazily so that at most
+        limits.jobs lifecycles are in flight. Results are in input order.
+
+        bodies is iterated in a worker thread, so it may block (reading
+        stdin, asking the API server) without holding up the jobs in flight.
+        """
+        results: dict[int, JobResult] = {}
+        in_flight: set[asyncio.Task[None]] = set()
+
+        async def run_one(i: int, body: dict[str, Any]) -> None:
+            name = body["metadata"]["name"]
+            try:
+                results[i] = await self.run(body)
+            except Exception as e:
+                self.output.say(name, f"Error occurred while running job: {e}")
+                results[i] = JobResult(name, error=str(e))
+
+        count = 0
+        inputs = iter(bodies)
+        try:
+            while True:
+                if len(in_flight) >= self.limits.jobs:
+                    _, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                body = await asyncio.to_thread(next, inputs, None)
+                if body is None:
+                    break
+                in_flight.add(asyncio.create_task(run_one(count, body)))
+                count += 1
+            if in_flight:
+                await asyncio.wait(in_flight)
+        except BaseException:
+            # the input failed or we were cancelled: stop the jobs in flight,
+            # which deletes them
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        return [results[i] for i in range(count)]
+
+    async def _wait_and_log(self, name: str, deadline: float | None) -> JobResult:
+        assert self.watcher is not None
+        phases = TERMINAL_PHASES
+        if self.follow:
+            phases = ("Running", *TERMINAL_PHASES)
+        found = await self.watcher.wait(name, phases=phases, deadline=deadline)
+        if found is None:
+            self.output.say(name, "timed out waiting for the job to start")
+            return JobResult(name, error="timeout")
+        pod, phase = found
+
+        # a pod that has already finished still serves its whole log
+        async with self.log_slots:
+            following = asyncio.ensure_future(self.call(self._follow, name, pod))
+            try:
+                # on timeout the job is deleted, which ends the log stream
+                await asyncio.wait_for(asyncio.shield(following), _remaining(deadline))
+            except asyncio.TimeoutError:
+                self.output.say(name, "timed out waiting for the job to complete")
+                return JobResult(name, pod, error="timeout")
+        if phase not in TERMINAL_PHASES:
+            found = await self.watcher.wait(
+                name, phases=TERMINAL_PHASES, deadline=deadline
+            )
+            if found is None:
+                self.output.say(name, "timed out waiting for the job to complete")
+                return JobResult(name, pod, error="timeout")
+            pod, phase = found
+
+        self.output.say(name, f"pod {pod} finished with phase={phase}")
+        return JobResult(name, pod, phase)
+
+    async def _create(self, body: dict[str, Any]) -> None:
+        async with self.create_slots:
+            await self.call(get_backend().create, body)
+
+    async def _discard(self, name: str, creating: "asyncio.Future[None]") -> None:
+        try:
+            await creating
+        except (Exception, asyncio.CancelledError):
+            # the job was never created
+            return
+        await self.call(self._delete, name)
+
+    def _follow(self, name: str, pod: str) -> None:
+        stream = self.output.stream(name)
+        try:
+            follow_pod_logs(pod, out=stream, limits=self.log_limits)
+        finally:
+            stream.close()
+
+    def _archive(self, name: str) -> None:
+        assert self.jobs_dir is not None
+        try:
+            archive_job_logs(name, os.path.join(self.jobs_dir, name))
+        except ApiError as e:
+            self.output.say(name, f"Error occurred while archiving logs: {e}")
+
+    def _delete(self, name: str) -> None:
+        try:
+            get_backend().delete("job", name)
+        except ApiError as e:
+            self.output.say(name, f"Error occurred while deleting job: {e}")
+
+
+def run_jobs(bodies: Iterable[dict[str, Any]], **kwargs: Any) -> list[JobResult]:
+    """
+    Run jobs to completion from synchronous code; the keyword arguments are
+    those of JobRunner.
+    """
+
+    async def main() -> list[JobResult]:
+        async with JobRunner(**kwargs) as runner:
+            return await runner.run_all(bodies)
+
+    return asyncio.run(main())
@@ -0,0 +1,259 @@
+"""
+Where the start-up time of job pods goes, reconstructed from what the API
+server remembers about them:
+
+- queue: Workload created until Kueue admitted it
+- scheduling: pod created until its PodScheduled condition
+- image_pull: the pod's Pulling event until its Pulled event (without
+  events, which expire after an hour: Initialized until the container
+  started)
+- rsync: container started until its first line of output; the job script
+  copies the context in before it runs the command and prints nothing
+  while doing so
+- run: first line of output (or container start) until the container
+  finished
+"""
+
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import NamedTuple
+
+import math
+
+from .backend import ApiError
+from .backend import LogLimits
+from .backend import get_backend
+from .timings import parse_timestamp
+
+
+PHASES = ("queue", "scheduling", "image_pull", "rsync", "run")
+
+# enough of the start of a log to read the timestamp of its first line
+LOG_PEEK_BYTES = 256
+# log peeks that are in flight at once
+PEEK_WORKERS = 8
+
+POD_FIELDS = (
+    "metadata.name",
+    "metadata.creationTimestamp",
+    "metadata.labels",
+    "spec.containers.name",
+    "status.conditions",
+    "status.containerStatuses",
+)
+
+
+class StartupBreakdown(NamedTuple):
+    job: str
+    pod: str
+    # seconds per phase; phases that cannot be reconstructed are missing
+    seconds: dict[str, float]
+
+
+def _since(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return max(0.0, end - start)
+
+
+def _condition_time(pod: dict[str, Any], condition: str) -> float | None:
+    for c in pod.get("status", {}).get("conditions") or []:
+        if c.get("type") == condition and c.get("status") == "True":
+            return parse_timestamp(c.get("lastTransitionTime"))
+    return None
+
+
+def _event_time(event: dict[str, Any]) -> float | None:
+    return parse_timestamp(
+        event.get("lastTimestamp")
+        or event.get("eventTime")
+        or event.get("firstTimestamp")
+    )
+
+
+def admission_times(workloads: Iterable[dict[str, Any]]) -> dict[str, float]:
+    """Map job names to the time their Workload waited for admission."""
+    waits: dict[str, float] = {}
+    for wl in workloads:
+        md = wl.get("metadata", {})
+        job = next(
+            (
+                o.get("name")
+                for o in md.get("ownerReferences") or []
+                if o.get("kind") == "Job"
+            ),
+            None,
+        )
+        admitted = _condition_time(wl, "Admitted")
+        wait = _since(parse_timestamp(md.get("creationTimestamp")), admitted)
+        if job and wait is not None:
+            waits[job] = wait
+    return waits
+
+
+def pull_times(
+    pulling: Iterable[dict[str, Any]], pulled: Iterable[dict[str, Any]]
+) -> dict[str, float]:
+    """Map pod names to the time spent pulling their images."""
+    started: dict[str, float] = {}
+    for event in pulling:
+        ts = _event_time(event)
+        if ts is not None:
+            name = event.get("involvedObject", {}).get("name", "")
+            started[name] = min(ts, started.get(name, ts))
+    times: dict[str, float] = {}
+    for event in pulled:
+        name = event.get("involvedObject", {}).get("name", "")
+        ts = _event_time(event)
+        # an image that was already present is pulled without a Pulling event
+        wait = _since(started.get(name, ts), ts)
+        if wait is not None:
+            times[name] = max(wait, times.get(name, 0.0))
+    return times
+
+
+def pod_breakdown(
+    pod: dict[str, Any],
+    *,
+    queue: float | None,
+    image_pull: float | None,
+    first_output: float | None,
+) -> dict[str, float]:
+    """Split a pod's start-up and run time into PHASES."""
+    created = parse_timestamp(pod.get("metadata", {}).get("creationTimestamp"))
+    scheduled = _condition_time(pod, "PodScheduled")
+    initialized = _condition_time(pod, "Initialized")
+
+    started: float | None = None
+    finished: float | None = None
+    for status in pod.get("status", {}).get("containerStatuses") or []:
+        state = status.get("state", {})
+        ts = parse_timestamp(
+            (state.get("running") or state.get("terminated") or {}).get("startedAt")
+        )
+        if ts is not None:
+            started = ts if started is None else min(started, ts)
+        ts = parse_timestamp((state.get("terminated") or {}).get("finishedAt"))
+        if ts is not None:
+            finished = ts if finished is None else max(finished, ts)
+
+    seconds = {
+        "queue": queue,
+        "scheduling": _since(created, scheduled),
+        "image_pull": image_pull
+        if image_pull is not None
+        else _since(initialized, started),
+        "rsync": _since(started, first_output),
+        "run": _since(first_output or started, finished),
+    }
+    return {k: v for k, v in seconds.items() if v is not None}
+
+
+def first_output_time(pod_name: str, container: str) -> float | None:
+    """Return the timestamp of the first line a container printed, if any."""
+    try:
+        lines = get_backend().stream_logs(
+            pod_name,
+            container=container,
+            timestamps=True,
+            limits=LogLimits(limit_bytes=LOG_PEEK_BYTES),
+            chunk_size=LOG_PEEK_BYTES,
+        )
+        try:
+            first = next(lines, b"")
+        finally:
+            # only the first line is needed; drop the rest of the stream
+            lines.close()
+    except ApiError:
+        return None
+    return parse_timestamp(first.partition(b" ")[0].decode(errors="replace"))
+
+
+def startup_breakdowns(
+    job_names: Iterable[str] | None = None,
+) -> list[StartupBreakdown]:
+    """
+    Reconstruct the start-up breakdown of every pod of the given jobs (all
+    jobs if None). The pods, Workloads and image pull events are each
+    listed once; only the peeks at the first line of each log are per pod.
+    """
+    backend = get_backend()
+    wanted = set(job_names) if job_names is not None else None
+    pods: list[dict[str, Any]] = []
+    for obj in backend.iter_objects(
+        "pods", labels={"!job-name": None}, trim=POD_FIELDS
+    ):
+        pod = obj.as_dict()
+        job = pod.get("metadata", {}).get("labels", {}).get("job-name")
+        if wanted is None or job in wanted:
+            pods.append(pod)
+    if not pods:
+        return []
+
+    queue = admission_times(w.as_dict() for w in backend.iter_objects("workloads"))
+    pulls = pull_times(
+        (
+            e.as_dict()
+            for e in backend.iter_objects(
+                "events", fields={"involvedObject.kind": "Pod", "reason": "Pulling"}
+            )
+        ),
+        (
+            e.as_dict()
+            for e in backend.iter_objects(
+                "events", fields={"involvedObject.kind": "Pod", "reason": "Pulled"}
+            )
+        ),
+    )
+
+    def peek(pod: dict[str, Any]) -> float | None:
+        containers = pod.get("spec", {}).get("containers") or []
+        if not containers:
+            return None
+        return first_output_time(pod["metadata"]["name"], containers[0]["name"])
+
+    with ThreadPoolExecutor(max_workers=PEEK_WORKERS) as pool:
+        first_outputs = list(pool.map(peek, pods))
+
+    breakdowns: list[StartupBreakdown] = []
+    for pod, first_output in zip(pods, first_outputs):
+        md = pod["metadata"]
+        job = md.get("labels", {}).get("job-name", "")
+        seconds = pod_breakdown(
+            pod,
+            queue=queue.get(job),
+            image_pull=pulls.get(md["name"]),
+            first_output=first_output,
+        )
+        breakdowns.append(StartupBreakdown(job, md["name"], seconds))
+    return sorted(breakdowns, key=lambda b: (b.job, b.pod))
+
+
+def percentile(values: list[float], p: float) -> float:
+    """The p-th percentile of values by the nearest-rank method."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def format_breakdowns(breakdowns: list[StartupBreakdown]) -> str:
+    def cell(seconds: float | None) -> str:
+        return "-" if seconds is None else f"{seconds:.1f}s"
+
+    header = f"{'POD':<40}" + "".join(f"{phase:>12}" for phase in PHASES)
+    lines = [header]
+    for b in breakdowns:
+        lines.append(
+            f"{b.pod:<40}"
+            + "".join(f"{cell(b.seconds.get(phase)):>12}" for phase in PHASES)
+        )
+
+    lines.append("")
+    lines.append(f"{'PERCENTILE':<40}" + "".join(f"{phase:>12}" for phase in PHASES))
+    for p in (50, 90, 100):
+        row = f"{'max' if p == 100 else f'p{p}':<40}"
+        for phase in PHASES:
+            values = [b.seconds[phase] for b in breakdowns if phase in b.seconds]
+            row += f"{cell(percentile(values, p) if values else None):>12}"
+        lines.append(row)
+    return "\n".join(lines)
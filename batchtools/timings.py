@@ -0,0 +1,181 @@
+"""
+Where the time of a br submission goes.
+
+Client-side phases (copying the context, creating the job, fetching logs,
+deleting the job) are timed as they run. Queueing and execution happen on
+the cluster, so they are derived from the timestamps the API server keeps:
+
+- admission: job created until Kueue admitted it (the job's startTime,
+  which is set when Kueue unsuspends it)
+- pending: first pod created until its container started (scheduling,
+  image pulls)
+- run: container started until the last container finished
+
+With br --follow, log_fetch is the time spent streaming the log while the
+pod runs, so it overlaps run.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import NamedTuple
+
+import json
+import os
+import time
+
+from .backend import ApiError
+from .backend import get_backend
+
+
+# the order phases are reported in
+PHASES = (
+    "prepare_context",
+    "create",
+    "admission",
+    "pending",
+    "run",
+    "log_fetch",
+    "archive_logs",
+    "delete",
+)
+
+
+def parse_timestamp(ts: Any) -> float | None:
+    """Parse an API server timestamp (RFC 3339) into seconds since the epoch."""
+    if not isinstance(ts, str) or not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class ClusterTimes(NamedTuple):
+    """What the API server remembers about when a job ran, in epoch seconds."""
+
+    created: float | None = None
+    # when Kueue admitted (unsuspended) the job
+    admitted: float | None = None
+    # when the first pod was created
+    pod_created: float | None = None
+    # when the first container started
+    started: float | None = None
+    # when the last container finished
+    finished: float | None = None
+    # Complete or Failed once the job has finished, else the pod phase
+    phase: str | None = None
+
+
+def cluster_times(job: dict[str, Any], pods: list[dict[str, Any]]) -> ClusterTimes:
+    """Collect the timestamps of a job and its pods."""
+    pod_created: list[float] = []
+    started: list[float] = []
+    finished: list[float] = []
+    phases: list[str] = []
+    for pod in pods:
+        ts = parse_timestamp(pod.get("metadata", {}).get("creationTimestamp"))
+        if ts is not None:
+            pod_created.append(ts)
+        if pod.get("status", {}).get("phase"):
+            phases.append(pod["status"]["phase"])
+        for status in pod.get("status", {}).get("containerStatuses") or []:
+            state = status.get("state", {})
+            running = state.get("running") or state.get("terminated") or {}
+            ts = parse_timestamp(running.get("startedAt"))
+            if ts is not None:
+                started.append(ts)
+            ts = parse_timestamp((state.get("terminated") or {}).get("finishedAt"))
+            if ts is not None:
+                finished.append(ts)
+
+    phase = next(
+        (
+            c.get("type")
+            for c in job.get("status", {}).get("conditions") or []
+            if c.get("type") in ("Complete", "Failed") and c.get("status") == "True"
+        ),
+        phases[-1] if phases else None,
+    )
+    return ClusterTimes(
+        created=parse_timestamp(job.get("metadata", {}).get("creationTimestamp")),
+        admitted=parse_timestamp(job.get("status", {}).get("startTime")),
+        pod_created=min(pod_created, default=None),
+        started=min(started, default=None),
+        finished=max(finished, default=None) if finished else None,
+        phase=phase,
+    )
+
+
+def fetch_cluster_times(job_name: str) -> ClusterTimes | None:
+    """Fetch the job and its pods; must be called before the job is deleted."""
+    backend = get_backend()
+    try:
+        job = backend.get("job", job_name).as_dict()
+        pods = backend.list_objects("pod", labels={"job-name": job_name})
+    except ApiError as e:
+        print(f"Error occurred while collecting job times: {e}")
+        return None
+    return cluster_times(job, [pod.as_dict() for pod in pods])
+
+
+class Timings:
+    """Durations in seconds of the phases of one job."""
+
+    def __init__(self, job_name: str) -> None:
+        self.job_name = job_name
+        self.submitted_at = datetime.now(timezone.utc)
+        self.seconds: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body of the with statement as phase name."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + (
+                time.monotonic() - start
+            )
+
+    def add_cluster_phases(self, times: ClusterTimes) -> None:
+        """Add admission, pending and run time from the cluster's timestamps."""
+        for name, start, end in (
+            ("admission", times.created, times.admitted),
+            ("pending", times.pod_created, times.started),
+            ("run", times.started, times.finished),
+        ):
+            if start is not None and end is not None:
+                self.seconds[name] = end - start
+
+    def report(self) -> str:
+        lines = [f"Timings for {self.job_name}:"]
+        for name in PHASES:
+            if name in self.seconds:
+                lines.append(f"  {name:<16}{self.seconds[name]:>10.2f}s")
+        return "\n".join(lines)
+
+    def as_record(self, **fields: Any) -> dict[str, Any]:
+        return {
+            "job": self.job_name,
+            "submitted_at": self.submitted_at.isoformat(),
+            **fields,
+            "seconds": {
+                name: round(self.seconds[name], 3)
+                for name in PHASES
+                if name in self.seconds
+            },
+        }
+
+    def write(self, path: str, **fields: Any) -> None:
+        """Append the timings as one JSON line to path."""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a") as f:
+                f.write(json.dumps(self.as_record(**fields)) + "\n")
+        except OSError as e:
+            print(f"Error occurred while writing timings to {path}: {e}")
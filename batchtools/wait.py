@@ -0,0 +1,320 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import TypeVar
+
+import time
+
+from .backend import ApiError
+from .backend import WatchUnavailable
+from .backend import get_backend
+
+if TYPE_CHECKING:
+    import openshift_client as oc
+
+
+T = TypeVar("T")
+
+TERMINAL_PHASES = ("Succeeded", "Failed")
+TERMINAL_JOB_CONDITIONS = ("Complete", "Failed")
+# a Workload with either condition has quota and its pods can be created
+ADMITTED_CONDITIONS = {"QuotaReserved", "Admitted"}
+
+# bounds for the adaptive backoff used when the watch API is not available
+POLL_MIN_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 10.0
+POLL_BACKOFF = 1.5
+
+# the API server closes a watch after timeoutSeconds; we then resume it from
+# the last resourceVersion we saw
+WATCH_MAX_SECONDS = 300
+
+
+def pod_phase(pod: dict) -> str:
+    return pod.get("status", {}).get("phase") or "Unknown"
+
+
+def job_condition(job: dict) -> str | None:
+    """Return Complete or Failed once a job has finished, otherwise None."""
+    for cond in job.get("status", {}).get("conditions", []) or []:
+        if cond.get("type") in TERMINAL_JOB_CONDITIONS and cond.get("status") == "True":
+            return cond["type"]
+    return None
+
+
+def wait_for_pod(
+    job_name: str,
+    *,
+    timeout: int | None,
+    phases: tuple[str, ...] = TERMINAL_PHASES,
+) -> tuple[str, str] | None:
+    """
+    Block until a pod of the given job reaches one of phases. Returns
+    (pod name, phase), or None if the timeout expires first.
+
+    Uses a single watch connection filtered on job-name=<job>. If the watch
+    API is not available, falls back to polling with adaptive backoff.
+    """
+
+    def check(pod: dict) -> tuple[str, str] | None:
+        if pod_phase(pod) in phases:
+            return pod["metadata"]["name"], pod_phase(pod)
+        return None
+
+    return wait_for(
+        "pods",
+        {"labelSelector": f"job-name={job_name}"},
+        lambda: get_backend().list_objects("pods", labels={"job-name": job_name}),
+        check,
+        timeout=timeout,
+    )
+
+
+def wait_for_job(job_name: str, *, timeout: int | None) -> str | None:
+    """
+    Block until the job itself has finished, which for an indexed job means
+    every completion index is done. Returns Complete or Failed, or None if
+    the timeout expires first.
+    """
+    return wait_for(
+        "jobs",
+        {"fieldSelector": f"metadata.name={job_name}"},
+        lambda: [get_backend().get("job", job_name)],
+        job_condition,
+        timeout=timeout,
+    )
+
+
+def owner_job_name(obj: dict) -> str | None:
+    """Return the name of the Job that owns an object, e.g. a Workload."""
+    for owner in obj.get("metadata", {}).get("ownerReferences") or []:
+        if owner.get("kind") == "Job":
+            return owner.get("name")
+    return None
+
+
+def workload_state(workload: dict) -> str:
+    """Return Pending, Admitted (quota reserved) or Finished."""
+    true = {
+        c.get("type")
+        for c in workload.get("status", {}).get("conditions") or []
+        if c.get("status") == "True"
+    }
+    if "Finished" in true:
+        return "Finished"
+    if true & ADMITTED_CONDITIONS:
+        return "Admitted"
+    return "Pending"
+
+
+class QueuePosition:
+    """
+    Follow the Workloads of the namespace to tell where a job's Workload is
+    among the pending Workloads of its LocalQueue. Kueue admits Workloads
+    by priority, then by age; Workloads of other namespaces are not visible
+    to us, so the position is a lower bound.
+    """
+
+    def __init__(self, job_name: str) -> None:
+        self.job_name = job_name
+        # pending Workload name -> (LocalQueue, admission order)
+        self.pending: dict[str, tuple[str | None, tuple[int, str, str]]] = {}
+        self.workload: str | None = None
+        self.queue: str | None = None
+        # the state of the job's Workload, None until we have seen it
+        self.state: str | None = None
+
+    def update(self, event_type: str, workloads: list[dict]) -> None:
+        if event_type == "SYNC":
+            self.pending.clear()
+        for wl in workloads:
+            md = wl["metadata"]
+            spec = wl.get("spec") or {}
+            state = "Deleted" if event_type == "DELETED" else workload_state(wl)
+            if state == "Pending":
+                order = (
+                    -(spec.get("priority") or 0),
+                    md.get("creationTimestamp") or "",
+                    md["name"],
+                )
+                self.pending[md["name"]] = (spec.get("queueName"), order)
+            else:
+                self.pending.pop(md["name"], None)
+            if owner_job_name(wl) == self.job_name:
+                self.workload = md["name"]
+                self.queue = spec.get("queueName")
+                self.state = state
+
+    def position(self) -> int | None:
+        """The 1-based position of the job in its queue, while it is pending."""
+        if self.workload not in self.pending:
+            return None
+        queue, order = self.pending[self.workload]
+        return 1 + sum(q == queue and o < order for q, o in self.pending.values())
+
+
+def wait_for_admission(
+    job_name: str,
+    *,
+    timeout: int | None,
+    report: Callable[[str | None, int], None] | None = None,
+) -> str | None:
+    """
+    Block until Kueue has reserved quota for the job's Workload, so that the
+    job's pods can be created. Returns the Workload's state then (Admitted,
+    Finished or Deleted), or None if the timeout expires first.
+
+    While the job is pending, report(queue, position) is called whenever its
+    position in its LocalQueue changes. Uses a single watch on the
+    namespace's Workloads.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    tracker = QueuePosition(job_name)
+    reported = None
+    for event_type, workloads in watch_events(
+        "workloads",
+        {},
+        lambda: get_backend().list_objects("workloads"),
+        deadline=deadline,
+    ):
+        tracker.update(event_type, workloads)
+        if tracker.state not in (None, "Pending"):
+            return tracker.state
+        position = tracker.position()
+        if report is not None and position is not None and position != reported:
+            report(tracker.queue, position)
+            reported = position
+    return None
+
+
+def wait_for(
+    resource: str,
+    params: dict[str, str],
+    fallback_list: Callable[[], "list[oc.APIObject]"],
+    check: Callable[[dict], T | None],
+    *,
+    timeout: int | None,
+) -> T | None:
+    """
+    Watch a namespaced collection until check() returns something other than
+    None for one of its objects, and return that value. Returns None if the
+    timeout expires first.
+
+    If the watch API is not available, fall back to polling fallback_list
+    with adaptive backoff.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    for event_type, objs in watch_events(
+        resource, params, fallback_list, deadline=deadline
+    ):
+        if event_type != "DELETED":
+            result = _first_match(objs, check)
+            if result is not None:
+                return result
+    return None
+
+
+def watch_events(
+    resource: str,
+    params: dict[str, str],
+    fallback_list: Callable[[], "list[oc.APIObject]"],
+    *,
+    deadline: float | None,
+) -> Iterator[tuple[str, list[dict]]]:
+    """
+    Follow a namespaced collection until the deadline (a time.monotonic()
+    value, or None for no deadline). Yields ("SYNC", objects) with every
+    object of the collection first, and again whenever it had to be listed
+    anew, then (event type, [object]) for each ADDED, MODIFIED or DELETED
+    object.
+
+    If the watch API is not available, fall back to polling fallback_list
+    with adaptive backoff, yielding SYNC after every poll.
+    """
+    try:
+        yield from _watch(resource, params, deadline=deadline)
+    except WatchUnavailable as e:
+        print(f"Watch unavailable ({e}), falling back to polling")
+        yield from _poll(fallback_list, deadline=deadline)
+
+
+def _remaining(deadline: float | None) -> float | None:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _first_match(objs: list[dict], check: Callable[[dict], T | None]) -> T | None:
+    for obj in objs:
+        result = check(obj)
+        if result is not None:
+            return result
+    return None
+
+
+def _watch(
+    resource: str,
+    params: dict[str, str],
+    *,
+    deadline: float | None,
+) -> Iterator[tuple[str, list[dict]]]:
+    backend = get_backend()
+    objs, resource_version = _list(backend, resource, params)
+    yield "SYNC", objs
+
+    while True:
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            return
+        window = WATCH_MAX_SECONDS if remaining is None else int(remaining) + 1
+        window = min(window, WATCH_MAX_SECONDS)
+
+        for event_type, obj in backend.watch(
+            resource, params, resource_version, window
+        ):
+            if event_type == "ERROR":
+                # 410 Gone: our resourceVersion is too old, start over
+                objs, resource_version = _list(backend, resource, params)
+                yield "SYNC", objs
+                break
+            resource_version = obj["metadata"]["resourceVersion"]
+            if event_type in ("ADDED", "MODIFIED", "DELETED"):
+                yield event_type, [obj]
+
+
+def _list(
+    backend: Any, resource: str, params: dict[str, str]
+) -> tuple[list[dict], str]:
+    # the REST backend reports a failed list as a plain ApiError; either way
+    # we go on by polling
+    try:
+        return backend.list_raw(resource, params)
+    except WatchUnavailable:
+        raise
+    except ApiError as e:
+        raise WatchUnavailable(str(e))
+
+
+def _poll(
+    fallback_list: Callable[[], "list[oc.APIObject]"],
+    *,
+    deadline: float | None,
+) -> Iterator[tuple[str, list[dict]]]:
+    interval = POLL_MIN_INTERVAL
+    last_versions = None
+    while True:
+        objs = [obj.as_dict() for obj in fallback_list()]
+        yield "SYNC", objs
+
+        versions = [obj["metadata"].get("resourceVersion") for obj in objs]
+        if versions != last_versions:
+            # something is happening; look again soon
+            last_versions = versions
+            interval = POLL_MIN_INTERVAL
+
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            return
+
+        sleep_for = interval if remaining is None else min(interval, remaining)
+        time.sleep(sleep_for)
+        interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
@@ -0,0 +1,52 @@
+"""
+Compare per-command latency of the oc and REST backends.
+
+Run against a real cluster while logged in:
+
+    python benchmarks/bench_backends.py bj bq bps "bp" -n 5
+
+Each command is run as a fresh `batchtools` process, so the numbers include
+interpreter startup, exactly as a user would see them.
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_command(command: list[str], backend: str, runs: int) -> list[float]:
+    env = dict(os.environ, BATCHTOOLS_BACKEND=backend)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "batchtools.batchtools", *command],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("commands", nargs="+", help="batchtools subcommands to time")
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'command':<24} {'oc (s)':>10} {'rest (s)':>10} {'speedup':>8}")
+    for command in args.commands:
+        argv = shlex.split(command)
+        oc = statistics.median(time_command(argv, "oc", args.runs))
+        rest = statistics.median(time_command(argv, "rest", args.runs))
+        print(f"{command:<24} {oc:>10.3f} {rest:>10.3f} {oc / rest:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Measure submit-to-first-log latency and throughput against a fake cluster.
+
+    python benchmarks/bench_e2e.py --submitters 1000
+    python benchmarks/bench_e2e.py --submitters 1000 --gpu v100 --gpus 64
+    python benchmarks/bench_e2e.py --cli --submitters 50
+
+The fake Kubernetes/Kueue API server (tests/fakeapi.py) runs as a
+subprocess. All submitters start at once; each one creates a job, waits for
+its pod with a watch, follows the pod's log until the container exits and
+deletes the job. By default the submitters are threads that go through the
+same backend, wait and log code as br. With --cli every submitter runs
+`batchtools br` as its own process, so interpreter start-up and imports are
+included.
+
+Reports the percentiles of the create request and of submit-to-first-log
+latency, and the throughput of jobs that ran to completion.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from batchtools.startup import percentile  # noqa: E402
+
+# the fake containers print this as their first line
+FIRST_LINE_MARKER = b": started"
+
+
+class Sample(NamedTuple):
+    # seconds from the start of the submission
+    created: float
+    first_log: float
+    finished: float
+
+
+def raise_file_limit() -> None:
+    """Every submitter keeps a watch or log stream open."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def start_server(args: argparse.Namespace, kubeconfig: str) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tests.fakeapi",
+            "--kubeconfig",
+            kubeconfig,
+            "--gpus",
+            str(args.gpus),
+            "--nodes",
+            str(args.nodes),
+            "--run",
+            str(args.run),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # the server prints its URL once it is listening
+    print(f"fake API server at {server.stdout.readline().strip()}")
+    return server
+
+
+def thread_submitter(args: argparse.Namespace, start: threading.Barrier):
+    from batchtools.backend import get_backend
+    from batchtools.build_yaml import build_job_body
+    from batchtools.logs import LOG_CHUNK_SIZE
+    from batchtools.wait import TERMINAL_PHASES
+    from batchtools.wait import wait_for_pod
+
+    backend = get_backend()
+    run_id = uuid.uuid4().hex[:8]
+    queue = "dummy-localqueue" if args.gpu == "none" else f"{args.gpu}-localqueue"
+
+    def submit(i: int) -> Sample:
+        job_name = f"e2e-{run_id}-{i}"
+        body = build_job_body(
+            job_name=job_name,
+            queue_name=queue,
+            image="image",
+            container_name=f"{job_name}-container",
+            cmdline="true",
+            max_sec=args.timeout,
+            gpu=args.gpu,
+            gpu_req=1,
+            gpu_lim=1,
+            context=False,
+            devpod_name="",
+            devcontainer="",
+            context_dir="",
+            jobs_dir="",
+            getlist_path="",
+        )
+        start.wait()
+        t0 = time.perf_counter()
+        backend.create(body)
+        created = time.perf_counter() - t0
+        result = wait_for_pod(
+            job_name, timeout=args.timeout, phases=("Running", *TERMINAL_PHASES)
+        )
+        if result is None:
+            raise TimeoutError(f"{job_name} did not start")
+        lines = backend.stream_logs(result[0], follow=True, chunk_size=LOG_CHUNK_SIZE)
+        next(lines)
+        first_log = time.perf_counter() - t0
+        for _ in lines:
+            pass
+        finished = time.perf_counter() - t0
+        backend.delete("job", job_name)
+        return Sample(created, first_log, finished)
+
+    return submit
+
+
+def cli_submitter(args: argparse.Namespace, start: threading.Barrier, workdir: str):
+    env = dict(
+        os.environ,
+        XDG_CACHE_HOME=os.path.join(workdir, "cache"),
+        XDG_DATA_HOME=os.path.join(workdir, "data"),
+        PYTHONPATH=str(ROOT),
+    )
+
+    def submit(i: int) -> Sample:
+        start.wait()
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "batchtools.batchtools",
+                "br",
+                "--gpu",
+                args.gpu,
+                "--no-context",
+                "--no-archive-logs",
+                "--name",
+                f"e2e{i}",
+                "--timeout",
+                str(args.timeout),
+                "true",
+            ],
+            cwd=workdir,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        created = first_log = None
+        for line in proc.stdout:
+            if created is None and b"created successfully" in line:
+                created = time.perf_counter() - t0
+            if first_log is None and FIRST_LINE_MARKER in line:
+                first_log = time.perf_counter() - t0
+        proc.wait()
+        if proc.returncode or created is None or first_log is None:
+            raise RuntimeError(f"br exited with status {proc.returncode}")
+        return Sample(created, first_log, time.perf_counter() - t0)
+
+    return submit
+
+
+def report(samples: list[Sample], failed: int, elapsed: float) -> None:
+    print(f"{'':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, values in (
+        ("create", [s.created for s in samples]),
+        ("first log", [s.first_log for s in samples]),
+        ("finished", [s.finished for s in samples]),
+    ):
+        if values:
+            print(
+                f"{name:<16}"
+                + "".join(f"{percentile(values, p):>9.3f}s" for p in (50, 95, 99))
+                + f"{max(values):>9.3f}s"
+            )
+    print(
+        f"\n{len(samples)} job(s) completed in {elapsed:.1f}s "
+        f"({len(samples) / elapsed:.1f} jobs/s), {failed} failed"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submitters", type=int, default=1000)
+    parser.add_argument("--cli", action="store_true", help="Run br per submitter")
+    parser.add_argument("--gpu", default="none", help="GPU type the jobs request")
+    parser.add_argument("--gpus", type=int, default=1000, help="GPU quota per queue")
+    parser.add_argument("--nodes", type=int, default=16)
+    parser.add_argument("--run", type=float, default=1.0, help="Job run time (s)")
+    parser.add_argument("--timeout", type=int, default=600)
+    args = parser.parse_args()
+
+    raise_file_limit()
+    with tempfile.TemporaryDirectory() as workdir:
+        kubeconfig = os.path.join(workdir, "kubeconfig")
+        server = start_server(args, kubeconfig)
+        os.environ["KUBECONFIG"] = kubeconfig
+        try:
+            start = threading.Barrier(args.submitters)
+            if args.cli:
+                submit = cli_submitter(args, start, workdir)
+            else:
+                submit = thread_submitter(args, start)
+
+            samples: list[Sample] = []
+            failed = 0
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.submitters) as pool:
+                futures = [pool.submit(submit, i) for i in range(args.submitters)]
+                for future in futures:
+                    try:
+                        samples.append(future.result())
+                    except Exception as e:
+                        failed += 1
+                        print(f"submitter failed: {e}", file=sys.stderr)
+            report(samples, failed, time.perf_counter() - t0)
+        finally:
+            server.terminate()
+            server.wait()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Time the code paths that grow with the size of the cluster, offline.
+
+    python benchmarks/bench_paths.py
+    python benchmarks/bench_paths.py --pods 1000,10000 --save-baseline
+    python benchmarks/bench_paths.py --max-regression 20 --max-scaling 2
+
+Synthetic cluster snapshots (pods, jobs and ClusterQueues built with
+tests/helpers.DictToObject, the way the unit tests fake openshift_client
+objects) are fed to the record builders, the bps summary, the Kueue filters
+of bj/bd/bl, the per-job grouping of bp and the bq queue lines;
+build_job_body and prepare_context are timed on their own. No cluster is
+needed.
+
+Every run is appended to --history as one JSON line. With --save-baseline
+the times become the new baseline; otherwise the run fails (status 1) if
+a case is more than --max-regression percent slower than the baseline, or
+if the time per object of a case grows more than --max-scaling times from
+the smallest to the largest snapshot. Baselines are only comparable on the
+machine that recorded them.
+"""
+
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from batchtools import bp  # noqa: E402
+from batchtools.bps import summarize_gpu_pods  # noqa: E402
+from batchtools.bq import queue_status_line  # noqa: E402
+from batchtools.build_yaml import build_job_body  # noqa: E402
+from batchtools.file_setup import context_size  # noqa: E402
+from batchtools.file_setup import list_context  # noqa: E402
+from batchtools.file_setup import prepare_context  # noqa: E402
+from batchtools.helpers import is_kueue_managed_job  # noqa: E402
+from batchtools.helpers import is_kueue_managed_pod  # noqa: E402
+from batchtools.records import GPU_RESOURCE  # noqa: E402
+from batchtools.records import KUEUE_QUEUE_LABEL  # noqa: E402
+from batchtools.records import JobRecord  # noqa: E402
+from batchtools.records import PodRecord  # noqa: E402
+from tests.helpers import DictToObject  # noqa: E402
+
+HISTORY = ROOT / "benchmarks" / "results" / "history.jsonl"
+BASELINE = ROOT / "benchmarks" / "results" / "baseline.json"
+
+# cases faster than this are too noisy to fail a run on
+NOISE_MS = 1.0
+FILES_PER_DIRECTORY = 100
+GPU_TYPES = ("v100", "a100", "h100")
+
+
+def pod_dict(i: int, jobs: int, nodes: int) -> dict[str, Any]:
+    job = f"job-{i % jobs}"
+    return {
+        "metadata": {
+            "name": f"{job}-{i}",
+            "namespace": f"ns-{i % 50}",
+            "labels": {"job-name": job},
+            "ownerReferences": [{"kind": "Job", "name": job}],
+        },
+        "spec": {
+            "nodeName": f"node-{i % nodes}",
+            "containers": [
+                {"name": "main", "resources": {"requests": {GPU_RESOURCE: i % 3}}}
+            ],
+        },
+        "status": {"phase": "Running" if i % 10 else "Pending"},
+    }
+
+
+def job_dict(i: int) -> dict[str, Any]:
+    labels = {"job-name": f"job-{i}"}
+    # a quarter of the jobs were not submitted through Kueue
+    if i % 4:
+        labels[KUEUE_QUEUE_LABEL] = f"{GPU_TYPES[i % 3]}-localqueue"
+    return {"metadata": {"name": f"job-{i}", "labels": labels}}
+
+
+def clusterqueue_dict(i: int) -> dict[str, Any]:
+    flavors = [
+        {
+            "resources": [
+                {"name": "cpu", "nominalQuota": 64},
+                {"name": GPU_RESOURCE, "nominalQuota": 8},
+            ]
+        }
+        for _ in range(4)
+    ]
+    return {
+        "metadata": {"name": f"{GPU_TYPES[i % 3]}-{i}-clusterqueue"},
+        "spec": {
+            "queueingStrategy": "BestEffortFIFO",
+            "resourceGroups": [{"flavors": flavors}],
+        },
+        "status": {
+            "admittedWorkloads": i,
+            "pendingWorkloads": i * 2,
+            "reservingWorkloads": 0,
+        },
+    }
+
+
+def api_object(d: dict[str, Any]) -> mock.Mock:
+    """
+    Wrap d the way openshift_client returns objects. DictToObject turns
+    every nested dict into a Mock, but labels and resource requests are
+    plain dicts in real models, so they are put back afterwards.
+    """
+    obj = DictToObject({"model": d})
+    md = d["metadata"]
+    obj.model.metadata.labels = md.get("labels", {})
+    if "spec" in d:
+        for c, spec in zip(obj.model.spec.containers, d["spec"]["containers"]):
+            c.resources.requests = spec["resources"]["requests"]
+    return obj
+
+
+def make_tree(directory: str, files: int) -> None:
+    for i in range(files):
+        sub = os.path.join(directory, f"dir-{i // FILES_PER_DIRECTORY}")
+        if i % FILES_PER_DIRECTORY == 0:
+            os.makedirs(sub)
+        with open(os.path.join(sub, f"file-{i}.py"), "w") as f:
+            f.write("x" * (i % 4096))
+    os.makedirs(os.path.join(directory, "jobs"))
+
+
+def best_ms(fn: Callable[[], Any], runs: int) -> float:
+    # one untimed call, so that caches are as warm for the first sample as
+    # for the others
+    fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    # the fastest run is the one least disturbed by the rest of the machine
+    return min(samples) * 1000
+
+
+def pod_cases(
+    pods: list[mock.Mock], dicts: list[dict[str, Any]], jobs: list[mock.Mock]
+) -> dict[str, Callable[[], Any]]:
+    """The cases that scale with the number of pods."""
+    records = [PodRecord.from_object(p) for p in pods]
+    kueue_jobs = {j.name for j in map(JobRecord.from_object, jobs) if j.queue}
+
+    def group_by_job():
+        with mock.patch.object(bp, "fetch_pods", return_value=iter(records)):
+            return bp.pods_by_job()
+
+    return {
+        "pod_records_oc": lambda: [PodRecord.from_object(p) for p in pods],
+        "pod_records_rest": lambda: [PodRecord.from_dict(d) for d in dicts],
+        "bps_summary": lambda: summarize_gpu_pods(records, True),
+        "bl_kueue_filter": lambda: [
+            p for p in records if is_kueue_managed_pod(p, kueue_jobs)
+        ],
+        "bp_group_by_job": group_by_job,
+    }
+
+
+def run_cases(args: argparse.Namespace) -> dict[str, float]:
+    """Return the best time in milliseconds of every case@size."""
+    sizes = sorted(args.pods)
+    print(f"building {sizes[-1]} pods, {args.jobs} jobs, {args.queues} queues")
+    dicts = [pod_dict(i, args.jobs, args.nodes) for i in range(sizes[-1])]
+    pods = [api_object(d) for d in dicts]
+    jobs = [api_object(job_dict(i)) for i in range(args.jobs)]
+    queues = [clusterqueue_dict(i) for i in range(args.queues)]
+
+    results: dict[str, float] = {}
+
+    def record(name: str, size: int, fn: Callable[[], Any]) -> None:
+        ms = best_ms(fn, args.runs)
+        results[f"{name}@{size}"] = ms
+        print(f"{name + '@' + str(size):<32} {ms:10.2f} ms")
+
+    for size in sizes:
+        for name, fn in pod_cases(pods[:size], dicts[:size], jobs).items():
+            record(name, size, fn)
+
+    job_records = [JobRecord.from_object(j) for j in jobs]
+    record(
+        "job_records_oc", args.jobs, lambda: [JobRecord.from_object(j) for j in jobs]
+    )
+    record(
+        "bj_bd_kueue_filter",
+        args.jobs,
+        lambda: [j for j in job_records if is_kueue_managed_job(j)],
+    )
+    record(
+        "bj_bd_kueue_filter_oc",
+        args.jobs,
+        lambda: [j for j in jobs if is_kueue_managed_job(j)],
+    )
+    record("bq_lines", args.queues, lambda: [queue_status_line(q) for q in queues])
+
+    def build_bodies():
+        # build_job_body announces the context copy; keep that off the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(args.jobs):
+                build_job_body(
+                    job_name=f"job-{i}",
+                    queue_name="v100-localqueue",
+                    image="image",
+                    container_name="main",
+                    cmdline="python train.py",
+                    max_sec=300,
+                    gpu="v100",
+                    gpu_req=1,
+                    gpu_lim=1,
+                    context=True,
+                    devpod_name="devpod",
+                    devcontainer="main",
+                    context_dir="/work",
+                    jobs_dir="/work/jobs",
+                    getlist_path=f"/work/jobs/job-{i}/getlist",
+                    owner="alice",
+                )
+
+    record("build_job_body", args.jobs, build_bodies)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp, args.files)
+        jobs_dir = os.path.join(tmp, "jobs")
+        runs = itertools.count()
+
+        def prepare():
+            output_dir = os.path.join(jobs_dir, f"job-{next(runs)}")
+            prepare_context(
+                1, tmp, jobs_dir, output_dir, os.path.join(output_dir, "getlist")
+            )
+
+        record("prepare_context", args.files, prepare)
+        entries = list_context(tmp, jobs_dir)
+        record("context_size", args.files, lambda: context_size(tmp, entries))
+
+    return results
+
+
+def scaling_problems(results: dict[str, float], max_scaling: float) -> list[str]:
+    """Cases whose time per object grows by more than max_scaling."""
+    per_item: dict[str, list[tuple[int, float]]] = {}
+    for key, ms in results.items():
+        name, _, size = key.partition("@")
+        per_item.setdefault(name, []).append((int(size), ms / int(size)))
+    problems = []
+    for name, points in per_item.items():
+        if len(points) < 2:
+            continue
+        points.sort()
+        (small, first), (large, last) = points[0], points[-1]
+        if results[f"{name}@{large}"] >= NOISE_MS and last > first * max_scaling:
+            problems.append(
+                f"{name}: {last / first:.1f}x the time per object at {large} "
+                f"as at {small}"
+            )
+    return problems
+
+
+def regressions(
+    results: dict[str, float], baseline: dict[str, float], max_regression: float
+) -> list[str]:
+    problems = []
+    for key, ms in results.items():
+        base = baseline.get(key)
+        if base is None or max(ms, base) < NOISE_MS:
+            continue
+        if ms > base * (1 + max_regression / 100):
+            problems.append(f"{key}: {ms:.2f} ms, baseline {base:.2f} ms")
+    return problems
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sizes(text: str) -> list[int]:
+    try:
+        return [int(s) for s in text.split(",") if s]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid sizes: {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--pods", type=sizes, default=[1000, 10000, 50000])
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--queues", type=int, default=48)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--history", type=Path, default=HISTORY)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--max-regression", type=float, default=50.0)
+    parser.add_argument("--max-scaling", type=float, default=3.0)
+    args = parser.parse_args()
+
+    results = run_cases(args)
+
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, "a") as f:
+        run = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "results": {k: round(v, 3) for k, v in results.items()},
+        }
+        f.write(json.dumps(run) + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"saved baseline to {args.baseline}")
+        return
+
+    problems = scaling_problems(results, args.max_scaling)
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        problems += regressions(results, baseline, args.max_regression)
+    if problems:
+        sys.exit("slower than allowed:\n  " + "\n  ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
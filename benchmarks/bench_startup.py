@@ -0,0 +1,57 @@
+"""
+Measure how long `batchtools <command> --help` takes to start.
+
+    python benchmarks/bench_startup.py -n 20 --max-ms 250
+
+Exits with status 1 if the median start-up time of any command exceeds
+--max-ms, so it can be used as a regression check in CI.
+"""
+
+from pathlib import Path
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# the registry only names the command modules, so this imports none of them
+from batchtools.batchtools import COMMANDS  # noqa: E402
+
+
+def time_startup(argv: list[str], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "batchtools.batchtools", *argv],
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    slow = []
+    for argv in [["--help"], *([c, "--help"] for c in COMMANDS)]:
+        ms = time_startup(argv, args.runs)
+        label = " ".join(argv)
+        print(f"{label:<16} {ms:8.1f} ms")
+        if args.max_ms is not None and ms > args.max_ms:
+            slow.append(label)
+
+    if slow:
+        sys.exit(f"start-up slower than {args.max_ms} ms: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
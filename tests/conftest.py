@@ -2,11 +2,23 @@ import pytest
 import argparse
 import os
 
+from batchtools.backend import get_backend
+from tests.fakeapi import FAST
+from tests.fakeapi import FakeApiServer
+from tests.fakeapi import FakeCluster
+
 
 @pytest.fixture(autouse=True)
-def null_kubeconfig():
+def null_kubeconfig(tmp_path):
     # Ensure that we do not accidentally interact with a real cluster
     os.environ["KUBECONFIG"] = "/dev/null"
+    # ...or with the user's cached login state and job history
+    os.environ["XDG_CACHE_HOME"] = str(tmp_path / "cache")
+    os.environ["XDG_DATA_HOME"] = str(tmp_path / "data")
+    os.environ.pop("BATCHTOOLS_HISTORY", None)
+    os.environ.pop("BATCHTOOLS_BACKEND", None)
+    # With no usable kubeconfig we get the oc backend, which tests mock
+    get_backend.cache_clear()
 
 
 @pytest.fixture
@@ -23,3 +35,20 @@ def parser() -> argparse.ArgumentParser:
 @pytest.fixture
 def subparsers(parser):
     return parser.add_subparsers(dest="cmd")
+
+
+@pytest.fixture
+def cluster() -> FakeCluster:
+    return FakeCluster(timetable=FAST, gpus_per_queue=1)
+
+
+@pytest.fixture
+def server(cluster, tmp_path, monkeypatch):
+    """A fake API server that the REST backend talks to."""
+    with FakeApiServer(cluster) as server:
+        monkeypatch.setenv(
+            "KUBECONFIG", server.write_kubeconfig(str(tmp_path / "kubeconfig"))
+        )
+        monkeypatch.chdir(tmp_path)
+        get_backend.cache_clear()
+        yield server
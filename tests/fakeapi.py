@@ -0,0 +1,1258 @@
+"""
+A stand-in for the Kubernetes and Kueue APIs, for running the whole CLI
+without a cluster.
+
+FakeCluster keeps Jobs, Pods, Events, ClusterQueues, LocalQueues and
+Workloads in memory and plays out their lifecycle on a timetable. A Job
+submitted to a LocalQueue gets a Workload, which is admitted in FIFO order
+once its ClusterQueue has the GPU quota for it. The Job's pods are then
+scheduled onto fake nodes, pull their image, run for a while printing log
+lines and succeed (or fail, if their command ends in "exit N" or is
+"false"), which gives the quota back.
+
+FakeApiServer serves the cluster over HTTP like the API server does:
+paged lists, label and field selectors, metadata-only lists, watches and
+followed pod logs. Use it in-process:
+
+    with FakeApiServer(FakeCluster()) as server:
+        server.write_kubeconfig("kubeconfig")
+
+or as a subprocess, which prints the server's URL once it is ready:
+
+    python -m tests.fakeapi --kubeconfig /tmp/kubeconfig
+    KUBECONFIG=/tmp/kubeconfig batchtools bq
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from datetime import datetime
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import NamedTuple
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import argparse
+import copy
+import gzip
+import heapq
+import itertools
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+
+from batchtools.backend import API_RESOURCES
+
+GPU_RESOURCE = "nvidia.com/gpu"
+QUEUE_LABEL = "kueue.x-k8s.io/queue-name"
+COMPLETION_INDEX = "batch.kubernetes.io/job-completion-index"
+
+KINDS = {
+    "pods": "Pod",
+    "events": "Event",
+    "jobs": "Job",
+    "clusterqueues": "ClusterQueue",
+    "localqueues": "LocalQueue",
+    "workloads": "Workload",
+}
+
+# watch events kept for clients resuming from an older resourceVersion
+WATCH_HISTORY = 100_000
+# how often blocked watches and log streams check whether the server stopped
+POLL_SECONDS = 1.0
+
+
+class Timetable(NamedTuple):
+    """How long each step of a job takes on the fake cluster, in seconds."""
+
+    # Workload created until Kueue admits it (if the quota allows)
+    admit: float = 0.05
+    # pod created until it is bound to a node
+    schedule: float = 0.05
+    # pod bound until its container starts
+    pull: float = 0.1
+    # container started until it exits
+    run: float = 1.0
+    # lines each container prints, spread over its run time
+    log_lines: int = 3
+
+
+# fast enough for unit tests
+FAST = Timetable(admit=0.01, schedule=0.01, pull=0.01, run=0.2)
+
+
+def exit_code(container: dict[str, Any]) -> int:
+    """The exit status a fake container's command would have."""
+    script = ((container.get("command") or [""])[-1]).strip()
+    if script == "false":
+        return 1
+    match = re.search(r"\bexit (\d+)$", script)
+    return int(match.group(1)) if match else 0
+
+
+def timestamp(ts: float) -> str:
+    """Format ts the way the API server formats object timestamps."""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def log_timestamp(ts: float) -> str:
+    """Format ts the way the API server prefixes log lines (RFC 3339 Nano)."""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def field(obj: dict[str, Any], path: str) -> str:
+    """The value at a dotted path as a field selector sees it."""
+    value: Any = obj
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(key)
+    return "" if value is None else str(value)
+
+
+def matches_labels(obj: dict[str, Any], selector: str | None) -> bool:
+    labels = obj.get("metadata", {}).get("labels") or {}
+    for term in (selector or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        if "!=" in term:
+            key, _, value = term.partition("!=")
+            if labels.get(key) == value:
+                return False
+        elif "=" in term:
+            key, _, value = term.partition("=")
+            if labels.get(key) != value.lstrip("="):
+                return False
+        elif term.startswith("!"):
+            if term[1:] in labels:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def matches_fields(obj: dict[str, Any], selector: str | None) -> bool:
+    for term in (selector or "").split(","):
+        if not term.strip():
+            continue
+        if "!=" in term:
+            path, _, value = term.partition("!=")
+            if field(obj, path.strip()) == value:
+                return False
+        else:
+            path, _, value = term.partition("=")
+            if field(obj, path.strip()) != value.lstrip("="):
+                return False
+    return True
+
+
+def gpu_request(containers: list[dict[str, Any]]) -> int:
+    total = 0
+    for c in containers:
+        requests = (c.get("resources") or {}).get("requests") or {}
+        try:
+            total += int(requests.get(GPU_RESOURCE, 0))
+        except (TypeError, ValueError):
+            continue
+    return total
+
+
+class ApiStatus(Exception):
+    """An error the server answers with a v1 Status."""
+
+    def __init__(self, code: int, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.reason = reason
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "status": "Failure",
+            "message": str(self),
+            "reason": self.reason,
+            "code": self.code,
+        }
+
+
+class FakeCluster:
+    """
+    The objects of a cluster and the controllers that move them along. All
+    state is guarded by one condition variable, which is notified on every
+    change so that watches and followed logs can wake up.
+    """
+
+    def __init__(
+        self,
+        *,
+        namespace: str = "default",
+        user: str = "developer",
+        nodes: int = 4,
+        gpus_per_queue: int = 8,
+        gpu_types: tuple[str, ...] = ("v100", "a100", "h100"),
+        timetable: Timetable = Timetable(),
+        dev_pod: str | None = None,
+    ) -> None:
+        self.namespace = namespace
+        self.user = user
+        self.nodes = [f"node-{i}" for i in range(nodes)]
+        self.timetable = timetable
+        self.dev_pod = dev_pod or socket.gethostname()
+        self.lock = threading.Condition()
+        self.objects: dict[str, dict[tuple[str, str], dict[str, Any]]] = {
+            resource: {} for resource in KINDS
+        }
+        self.version = 0
+        # (resourceVersion, resource, event type, object) for watches
+        self.history: list[tuple[int, str, str, dict[str, Any]]] = []
+        # (namespace, pod, container) -> [(time, line)]
+        self.logs: dict[tuple[str, str, str], list[tuple[float, bytes]]] = {}
+        # job uid -> completion indexes that have no pod yet
+        self.indexes: dict[str, Iterator[int]] = {}
+        self.timers: list[tuple[float, int, Callable[..., None], tuple]] = []
+        self.sequence = itertools.count()
+        self.node_turn = itertools.count()
+        self.stopped = False
+        self.controller = threading.Thread(target=self._run_timers, daemon=True)
+
+        with self.lock:
+            for gpu in gpu_types:
+                self._add_queue(
+                    f"{gpu}-clusterqueue", f"{gpu}-localqueue", gpus_per_queue
+                )
+            self._add_queue("dummy-clusterqueue", "dummy-localqueue", 0)
+            self._add_dev_pod(self.dev_pod)
+
+    # -- object store -------------------------------------------------------
+
+    def _namespaced(self, resource: str) -> bool:
+        return API_RESOURCES[resource][1]
+
+    def _record(self, resource: str, event_type: str, obj: dict[str, Any]) -> None:
+        self.version += 1
+        obj["metadata"]["resourceVersion"] = str(self.version)
+        self.history.append((self.version, resource, event_type, copy.deepcopy(obj)))
+        if len(self.history) > WATCH_HISTORY:
+            del self.history[: len(self.history) - WATCH_HISTORY]
+        self.lock.notify_all()
+
+    def add(self, resource: str, obj: dict[str, Any]) -> dict[str, Any]:
+        md = obj.setdefault("metadata", {})
+        if not md.get("name") and md.get("generateName"):
+            md["name"] = md["generateName"] + uuid.uuid4().hex[:5]
+        if not md.get("name"):
+            raise ApiStatus(422, "Invalid", "metadata.name: Required value")
+        namespace = ""
+        if self._namespaced(resource):
+            namespace = md.setdefault("namespace", self.namespace)
+        key = (namespace, md["name"])
+        if key in self.objects[resource]:
+            raise ApiStatus(
+                409, "AlreadyExists", f'{resource} "{md["name"]}" already exists'
+            )
+        obj["kind"] = KINDS[resource]
+        obj.setdefault(
+            "apiVersion",
+            API_RESOURCES[resource][0].removeprefix("apis/").removeprefix("api/"),
+        )
+        md["uid"] = str(uuid.uuid4())
+        md["creationTimestamp"] = timestamp(time.time())
+        md.setdefault("labels", {})
+        self.objects[resource][key] = obj
+        self._record(resource, "ADDED", obj)
+        if resource == "jobs":
+            self._job_added(obj)
+        return obj
+
+    def modified(self, resource: str, obj: dict[str, Any]) -> None:
+        self._record(resource, "MODIFIED", obj)
+
+    def get(self, resource: str, namespace: str, name: str) -> dict[str, Any]:
+        key = (namespace if self._namespaced(resource) else "", name)
+        try:
+            return self.objects[resource][key]
+        except KeyError:
+            raise ApiStatus(404, "NotFound", f'{resource} "{name}" not found')
+
+    def select(
+        self,
+        resource: str,
+        namespace: str | None,
+        labels: str | None = None,
+        fields: str | None = None,
+    ) -> list[dict[str, Any]]:
+        return [
+            obj
+            for (ns, _), obj in sorted(self.objects[resource].items())
+            if (namespace is None or ns == namespace)
+            and matches_labels(obj, labels)
+            and matches_fields(obj, fields)
+        ]
+
+    def remove(self, resource: str, namespace: str, name: str) -> dict[str, Any]:
+        obj = self.get(resource, namespace, name)
+        del self.objects[resource][(obj["metadata"].get("namespace", ""), name)]
+        obj["metadata"]["deletionTimestamp"] = timestamp(time.time())
+        self._record(resource, "DELETED", obj)
+        if resource == "jobs":
+            self._job_removed(obj)
+        elif resource == "pods":
+            for key in [k for k in self.logs if k[:2] == (namespace, name)]:
+                del self.logs[key]
+        return obj
+
+    def events_since(self, version: int) -> list[tuple[int, str, str, dict[str, Any]]]:
+        """The watch events after version; raises 410 if they were dropped."""
+        if self.history and version < self.history[0][0] - 1:
+            raise ApiStatus(410, "Expired", f"too old resource version: {version}")
+        start = next(
+            (
+                i
+                for i in range(len(self.history) - 1, -1, -1)
+                if self.history[i][0] <= version
+            ),
+            -1,
+        )
+        return self.history[start + 1 :]
+
+    # -- timers -------------------------------------------------------------
+
+    def start(self) -> None:
+        self.controller.start()
+
+    def stop(self) -> None:
+        with self.lock:
+            self.stopped = True
+            self.lock.notify_all()
+
+    def after(self, delay: float, action: Callable[..., None], *args: Any) -> None:
+        heapq.heappush(
+            self.timers, (time.monotonic() + delay, next(self.sequence), action, args)
+        )
+        self.lock.notify_all()
+
+    def _run_timers(self) -> None:
+        with self.lock:
+            while not self.stopped:
+                now = time.monotonic()
+                if self.timers and self.timers[0][0] <= now:
+                    _, _, action, args = heapq.heappop(self.timers)
+                    action(*args)
+                    continue
+                wait = self.timers[0][0] - now if self.timers else POLL_SECONDS
+                self.lock.wait(min(wait, POLL_SECONDS))
+
+    # -- setup --------------------------------------------------------------
+
+    def _add_queue(self, cluster_queue: str, local_queue: str, gpus: int) -> None:
+        self.add(
+            "clusterqueues",
+            {
+                "apiVersion": "kueue.x-k8s.io/v1beta1",
+                "metadata": {"name": cluster_queue},
+                "spec": {
+                    "queueingStrategy": "BestEffortFIFO",
+                    "namespaceSelector": {},
+                    "resourceGroups": [
+                        {
+                            "coveredResources": ["cpu", "memory", GPU_RESOURCE],
+                            "flavors": [
+                                {
+                                    "name": "default-flavor",
+                                    "resources": [
+                                        {"name": "cpu", "nominalQuota": 1000},
+                                        {"name": "memory", "nominalQuota": "4Ti"},
+                                        {"name": GPU_RESOURCE, "nominalQuota": gpus},
+                                    ],
+                                }
+                            ],
+                        }
+                    ],
+                },
+                "status": {
+                    "admittedWorkloads": 0,
+                    "pendingWorkloads": 0,
+                    "reservingWorkloads": 0,
+                },
+            },
+        )
+        self.add(
+            "localqueues",
+            {
+                "apiVersion": "kueue.x-k8s.io/v1beta1",
+                "metadata": {"name": local_queue},
+                "spec": {"clusterQueue": cluster_queue},
+                "status": {"admittedWorkloads": 0, "pendingWorkloads": 0},
+            },
+        )
+
+    def _add_dev_pod(self, name: str) -> None:
+        now = timestamp(time.time())
+        self.add(
+            "pods",
+            {
+                "apiVersion": "v1",
+                "metadata": {"name": name, "labels": {"app": "devpod"}},
+                "spec": {
+                    "nodeName": self.nodes[0] if self.nodes else "",
+                    "containers": [{"name": "devcontainer", "image": "devpod"}],
+                },
+                "status": {
+                    "phase": "Running",
+                    "containerStatuses": [
+                        {
+                            "name": "devcontainer",
+                            "ready": True,
+                            "state": {"running": {"startedAt": now}},
+                        }
+                    ],
+                },
+            },
+        )
+
+    # -- Kueue --------------------------------------------------------------
+
+    def _job_added(self, job: dict[str, Any]) -> None:
+        spec = job.setdefault("spec", {})
+        spec.setdefault("completions", 1)
+        spec.setdefault("parallelism", 1)
+        job["status"] = {}
+        queue = job["metadata"]["labels"].get(QUEUE_LABEL)
+        if not queue:
+            self._start_job(job)
+            return
+
+        spec["suspend"] = True
+        self.modified("jobs", job)
+        md = job["metadata"]
+        containers = spec.get("template", {}).get("spec", {}).get("containers") or []
+        self.add(
+            "workloads",
+            {
+                "apiVersion": "kueue.x-k8s.io/v1beta1",
+                "metadata": {
+                    "name": f"job-{md['name']}-{md['uid'][:5]}",
+                    "namespace": md["namespace"],
+                    "labels": {"kueue.x-k8s.io/job-uid": md["uid"]},
+                    "ownerReferences": [
+                        {
+                            "apiVersion": "batch/v1",
+                            "kind": "Job",
+                            "name": md["name"],
+                            "uid": md["uid"],
+                        }
+                    ],
+                },
+                "spec": {
+                    "queueName": queue,
+                    "podSets": [
+                        {
+                            "name": "main",
+                            "count": spec["parallelism"],
+                            "template": {"spec": {"containers": containers}},
+                        }
+                    ],
+                },
+                "status": {"conditions": []},
+            },
+        )
+        self.after(self.timetable.admit, self._admit)
+
+    def _workload_state(self, wl: dict[str, Any]) -> str:
+        conditions = {
+            c["type"] for c in wl["status"]["conditions"] if c["status"] == "True"
+        }
+        if "Finished" in conditions:
+            return "finished"
+        return "admitted" if "Admitted" in conditions else "pending"
+
+    def _workload_gpus(self, wl: dict[str, Any]) -> int:
+        return sum(
+            ps["count"] * gpu_request(ps["template"]["spec"]["containers"])
+            for ps in wl["spec"]["podSets"]
+        )
+
+    def _admit(self) -> None:
+        """Admit pending Workloads, oldest first, as far as the quota allows."""
+        local_queues = {
+            (lq["metadata"]["namespace"], lq["metadata"]["name"]): lq
+            for lq in self.objects["localqueues"].values()
+        }
+        # the store keeps objects in the order they were created
+        workloads = list(self.objects["workloads"].values())
+        for cq in self.objects["clusterqueues"].values():
+            name = cq["metadata"]["name"]
+            quota = sum(
+                int(r.get("nominalQuota", 0))
+                for rg in cq["spec"]["resourceGroups"]
+                for flavor in rg["flavors"]
+                for r in flavor["resources"]
+                if r["name"] == GPU_RESOURCE
+            )
+            mine = [
+                wl
+                for wl in workloads
+                if local_queues.get(
+                    (wl["metadata"]["namespace"], wl["spec"]["queueName"]), {}
+                )
+                .get("spec", {})
+                .get("clusterQueue")
+                == name
+            ]
+            used = sum(
+                self._workload_gpus(wl)
+                for wl in mine
+                if self._workload_state(wl) == "admitted"
+            )
+            for wl in mine:
+                if self._workload_state(wl) != "pending":
+                    continue
+                need = self._workload_gpus(wl)
+                if used + need > quota:
+                    continue
+                used += need
+                self._admit_workload(wl, name)
+            self._update_queue_status(cq, mine, local_queues)
+
+    def _admit_workload(self, wl: dict[str, Any], cluster_queue: str) -> None:
+        now = timestamp(time.time())
+        wl["status"]["admission"] = {"clusterQueue": cluster_queue}
+        for kind in ("QuotaReserved", "Admitted"):
+            wl["status"]["conditions"].append(
+                {
+                    "type": kind,
+                    "status": "True",
+                    "reason": kind,
+                    "lastTransitionTime": now,
+                }
+            )
+        self.modified("workloads", wl)
+        owner = wl["metadata"]["ownerReferences"][0]["name"]
+        job = self.objects["jobs"].get((wl["metadata"]["namespace"], owner))
+        if job is not None:
+            job["spec"]["suspend"] = False
+            self._start_job(job)
+
+    def _update_queue_status(
+        self,
+        cq: dict[str, Any],
+        workloads: list[dict[str, Any]],
+        local_queues: dict[tuple[str, str], dict[str, Any]],
+    ) -> None:
+        states = [self._workload_state(wl) for wl in workloads]
+        used = sum(
+            self._workload_gpus(wl)
+            for wl, state in zip(workloads, states)
+            if state == "admitted"
+        )
+        usage = [
+            {
+                "name": "default-flavor",
+                "resources": [{"name": GPU_RESOURCE, "total": str(used)}],
+            }
+        ]
+        status = {
+            "admittedWorkloads": states.count("admitted"),
+            "pendingWorkloads": states.count("pending"),
+            "reservingWorkloads": states.count("admitted"),
+            "flavorsReservation": usage,
+            "flavorsUsage": usage,
+        }
+        if cq["status"] != status:
+            cq["status"] = status
+            self.modified("clusterqueues", cq)
+        for (namespace, name), lq in local_queues.items():
+            if lq["spec"]["clusterQueue"] != cq["metadata"]["name"]:
+                continue
+            mine = [
+                state
+                for wl, state in zip(workloads, states)
+                if (wl["metadata"]["namespace"], wl["spec"]["queueName"])
+                == (namespace, name)
+            ]
+            status = {
+                "admittedWorkloads": mine.count("admitted"),
+                "pendingWorkloads": mine.count("pending"),
+            }
+            if lq["status"] != status:
+                lq["status"] = status
+                self.modified("localqueues", lq)
+
+    def _finish_workload(self, job: dict[str, Any], reason: str = "Succeeded") -> None:
+        for wl in self._workloads_of(job):
+            wl["status"]["conditions"].append(
+                {
+                    "type": "Finished",
+                    "status": "True",
+                    "reason": reason,
+                    "lastTransitionTime": timestamp(time.time()),
+                }
+            )
+            self.modified("workloads", wl)
+        self.after(self.timetable.admit, self._admit)
+
+    def _workloads_of(self, job: dict[str, Any]) -> list[dict[str, Any]]:
+        uid = job["metadata"]["uid"]
+        return [
+            wl
+            for wl in self.objects["workloads"].values()
+            if wl["metadata"]["ownerReferences"][0]["uid"] == uid
+        ]
+
+    # -- Jobs and pods ------------------------------------------------------
+
+    def _start_job(self, job: dict[str, Any]) -> None:
+        job["status"] = {"startTime": timestamp(time.time()), "active": 0}
+        self.indexes[job["metadata"]["uid"]] = iter(range(job["spec"]["completions"]))
+        for _ in range(job["spec"]["parallelism"]):
+            self._next_pod(job)
+        self.modified("jobs", job)
+
+    def _next_pod(self, job: dict[str, Any]) -> None:
+        index = next(self.indexes.get(job["metadata"]["uid"], iter(())), None)
+        if index is None:
+            return
+        md = job["metadata"]
+        indexed = job["spec"].get("completionMode") == "Indexed"
+        template = copy.deepcopy(job["spec"].get("template", {}))
+        labels = dict(template.get("metadata", {}).get("labels") or {})
+        labels |= {"job-name": md["name"], "controller-uid": md["uid"]}
+        annotations = {}
+        prefix = md["name"]
+        if indexed:
+            labels[COMPLETION_INDEX] = str(index)
+            annotations[COMPLETION_INDEX] = str(index)
+            prefix = f"{prefix}-{index}"
+        pod = self.add(
+            "pods",
+            {
+                "apiVersion": "v1",
+                "metadata": {
+                    "name": f"{prefix}-{uuid.uuid4().hex[:5]}",
+                    "namespace": md["namespace"],
+                    "labels": labels,
+                    "annotations": annotations,
+                    "ownerReferences": [
+                        {
+                            "apiVersion": "batch/v1",
+                            "kind": "Job",
+                            "name": md["name"],
+                            "uid": md["uid"],
+                            "controller": True,
+                        }
+                    ],
+                },
+                "spec": template.get("spec", {}),
+                "status": {"phase": "Pending", "conditions": []},
+            },
+        )
+        job["status"]["active"] = job["status"].get("active", 0) + 1
+        self.after(self.timetable.schedule, self._schedule_pod, pod)
+
+    def _alive(self, pod: dict[str, Any]) -> bool:
+        md = pod["metadata"]
+        return self.objects["pods"].get((md["namespace"], md["name"])) is pod
+
+    def _condition(self, pod: dict[str, Any], kind: str, status: str = "True") -> None:
+        conditions = [c for c in pod["status"]["conditions"] if c["type"] != kind]
+        conditions.append(
+            {
+                "type": kind,
+                "status": status,
+                "lastTransitionTime": timestamp(time.time()),
+            }
+        )
+        pod["status"]["conditions"] = conditions
+
+    def _event(self, pod: dict[str, Any], reason: str, message: str) -> None:
+        md = pod["metadata"]
+        now = timestamp(time.time())
+        self.add(
+            "events",
+            {
+                "apiVersion": "v1",
+                "metadata": {
+                    "name": f"{md['name']}.{uuid.uuid4().hex[:16]}",
+                    "namespace": md["namespace"],
+                },
+                "involvedObject": {
+                    "kind": "Pod",
+                    "name": md["name"],
+                    "namespace": md["namespace"],
+                    "uid": md["uid"],
+                },
+                "reason": reason,
+                "message": message,
+                "type": "Normal",
+                "firstTimestamp": now,
+                "lastTimestamp": now,
+                "count": 1,
+            },
+        )
+
+    def _schedule_pod(self, pod: dict[str, Any]) -> None:
+        if not self._alive(pod):
+            return
+        if self.nodes:
+            pod["spec"]["nodeName"] = self.nodes[next(self.node_turn) % len(self.nodes)]
+        self._condition(pod, "PodScheduled")
+        self.modified("pods", pod)
+        for c in pod["spec"].get("containers") or []:
+            self._event(pod, "Pulling", f'Pulling image "{c.get("image", "")}"')
+        self.after(self.timetable.pull, self._start_pod, pod)
+
+    def _start_pod(self, pod: dict[str, Any]) -> None:
+        if not self._alive(pod):
+            return
+        started = timestamp(time.time())
+        containers = pod["spec"].get("containers") or []
+        for c in containers:
+            self._event(
+                pod, "Pulled", f'Successfully pulled image "{c.get("image", "")}"'
+            )
+        for kind in ("Initialized", "ContainersReady", "Ready"):
+            self._condition(pod, kind)
+        pod["status"]["phase"] = "Running"
+        pod["status"]["startTime"] = started
+        pod["status"]["containerStatuses"] = [
+            {
+                "name": c["name"],
+                "ready": True,
+                "restartCount": 0,
+                "state": {"running": {"startedAt": started}},
+            }
+            for c in containers
+        ]
+        self.modified("pods", pod)
+
+        lines = max(1, self.timetable.log_lines)
+        for c in containers:
+            self.logs[
+                (pod["metadata"]["namespace"], pod["metadata"]["name"], c["name"])
+            ] = []
+            for i in range(lines):
+                self.after(
+                    self.timetable.run * i / lines, self._log, pod, c["name"], i, lines
+                )
+        self.after(self.timetable.run, self._finish_pod, pod)
+
+    def _log(self, pod: dict[str, Any], container: str, i: int, lines: int) -> None:
+        key = (pod["metadata"]["namespace"], pod["metadata"]["name"], container)
+        if key not in self.logs:
+            return
+        text = "started" if i == 0 else f"output line {i} of {lines - 1}"
+        self.logs[key].append((time.time(), f"{key[1]}: {text}\n".encode()))
+        self.lock.notify_all()
+
+    def _finish_pod(self, pod: dict[str, Any]) -> None:
+        if not self._alive(pod):
+            return
+        finished = timestamp(time.time())
+        codes = {c["name"]: exit_code(c) for c in pod["spec"].get("containers") or []}
+        failed = any(codes.values())
+        pod["status"]["phase"] = "Failed" if failed else "Succeeded"
+        for status in pod["status"]["containerStatuses"]:
+            status["ready"] = False
+            status["state"] = {
+                "terminated": {
+                    "exitCode": codes.get(status["name"], 0),
+                    "reason": "Error" if codes.get(status["name"]) else "Completed",
+                    "startedAt": status["state"]["running"]["startedAt"],
+                    "finishedAt": finished,
+                }
+            }
+        for kind in ("ContainersReady", "Ready"):
+            self._condition(pod, kind, "False")
+        self.modified("pods", pod)
+
+        owner = pod["metadata"]["ownerReferences"][0]["name"]
+        job = self.objects["jobs"].get((pod["metadata"]["namespace"], owner))
+        if job is None:
+            return
+        status = job["status"]
+        status["active"] -= 1
+        if failed:
+            # every job br creates has backoffLimit: 0
+            status["failed"] = status.get("failed", 0) + 1
+            status["conditions"] = [
+                {
+                    "type": "Failed",
+                    "status": "True",
+                    "reason": "BackoffLimitExceeded",
+                    "lastTransitionTime": finished,
+                }
+            ]
+            self._finish_workload(job, "Failed")
+        else:
+            status["succeeded"] = status.get("succeeded", 0) + 1
+            if status["succeeded"] >= job["spec"]["completions"]:
+                status["completionTime"] = finished
+                status["conditions"] = [
+                    {
+                        "type": "Complete",
+                        "status": "True",
+                        "lastTransitionTime": finished,
+                    }
+                ]
+                self._finish_workload(job)
+            else:
+                self._next_pod(job)
+        self.modified("jobs", job)
+
+    def _job_removed(self, job: dict[str, Any]) -> None:
+        """Delete the job's pods and Workload, as the garbage collector would."""
+        md = job["metadata"]
+        self.indexes.pop(md["uid"], None)
+        for pod in self.select("pods", md["namespace"], f"job-name={md['name']}"):
+            self.remove("pods", md["namespace"], pod["metadata"]["name"])
+        for wl in self._workloads_of(job):
+            self.remove("workloads", md["namespace"], wl["metadata"]["name"])
+        self.after(self.timetable.admit, self._admit)
+
+    # -- logs ---------------------------------------------------------------
+
+    def pod_running(self, namespace: str, name: str) -> bool:
+        pod = self.objects["pods"].get((namespace, name))
+        return pod is not None and pod["status"]["phase"] in ("Pending", "Running")
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeApiServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    @property
+    def cluster(self) -> FakeCluster:
+        return self.server.cluster
+
+    # -- responses ----------------------------------------------------------
+
+    def send_json(self, status: int, obj: Any) -> None:
+        self.send_body(status, json.dumps(obj).encode())
+
+    def send_body(self, status: int, body: bytes) -> None:
+        """Send a JSON body, serialized while the cluster was locked."""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(body) > 1024:
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiStatus(400, "BadRequest", "request body is not JSON")
+
+    # -- routing ------------------------------------------------------------
+
+    def route(self) -> tuple[str, str | None, str | None, str | None, dict[str, str]]:
+        """Split the path into (resource, namespace, name, subresource, query)."""
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:1] == ["api"]:
+            group, rest = "/".join(parts[:2]), parts[2:]
+        elif parts[:1] == ["apis"]:
+            group, rest = "/".join(parts[:3]), parts[3:]
+        else:
+            raise ApiStatus(404, "NotFound", f"{url.path} not found")
+        namespace = None
+        if len(rest) >= 3 and rest[0] == "namespaces":
+            namespace, rest = rest[1], rest[2:]
+        if not rest or rest[0] not in KINDS or API_RESOURCES[rest[0]][0] != group:
+            raise ApiStatus(404, "NotFound", f"{url.path} not found")
+        name = rest[1] if len(rest) > 1 else None
+        sub = rest[2] if len(rest) > 2 else None
+        return rest[0], namespace, name, sub, query
+
+    def handle_api(self, method: str) -> None:
+        try:
+            if (
+                self.server.token
+                and self.headers.get("Authorization") != f"Bearer {self.server.token}"
+            ):
+                raise ApiStatus(401, "Unauthorized", "Unauthorized")
+            if method == "GET" and self.path == "/apis/user.openshift.io/v1/users/~":
+                self.send_json(
+                    200,
+                    {
+                        "kind": "User",
+                        "apiVersion": "user.openshift.io/v1",
+                        "metadata": {"name": self.cluster.user},
+                    },
+                )
+                return
+            resource, namespace, name, sub, query = self.route()
+            handler = getattr(
+                self, f"{method.lower()}_{'object' if name else 'collection'}"
+            )
+            handler(resource, namespace, name, sub, query)
+        except ApiStatus as e:
+            self.send_json(e.code, e.status())
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_GET(self) -> None:
+        self.handle_api("GET")
+
+    def do_POST(self) -> None:
+        self.handle_api("POST")
+
+    def do_DELETE(self) -> None:
+        self.handle_api("DELETE")
+
+    # -- collections --------------------------------------------------------
+
+    def get_collection(self, resource, namespace, name, sub, query) -> None:
+        if query.get("watch") in ("1", "true"):
+            self.watch(resource, namespace, query)
+            return
+        with self.cluster.lock:
+            items = self.cluster.select(
+                resource,
+                namespace,
+                query.get("labelSelector"),
+                query.get("fieldSelector"),
+            )
+            start = int(query.get("continue") or 0)
+            limit = int(query.get("limit") or 0)
+            end = start + limit if limit else len(items)
+            metadata = {"resourceVersion": str(self.cluster.version)}
+            if end < len(items):
+                metadata["continue"] = str(end)
+                metadata["remainingItemCount"] = len(items) - end
+            page = items[start:end]
+            if "as=PartialObjectMetadataList" in self.headers.get("Accept", ""):
+                body = {
+                    "kind": "PartialObjectMetadataList",
+                    "apiVersion": "meta.k8s.io/v1",
+                    "metadata": metadata,
+                    "items": [
+                        {
+                            "kind": "PartialObjectMetadata",
+                            "apiVersion": "meta.k8s.io/v1",
+                            "metadata": obj["metadata"],
+                        }
+                        for obj in page
+                    ],
+                }
+            else:
+                body = {
+                    "kind": f"{KINDS[resource]}List",
+                    "apiVersion": "v1",
+                    "metadata": metadata,
+                    "items": page,
+                }
+            payload = json.dumps(body).encode()
+        self.send_body(200, payload)
+
+    def post_collection(self, resource, namespace, name, sub, query) -> None:
+        body = self.read_body()
+        if not isinstance(body, dict):
+            raise ApiStatus(400, "BadRequest", "expected an object")
+        if body.get("kind") != KINDS[resource]:
+            raise ApiStatus(
+                400, "BadRequest", f"{body.get('kind')} cannot be created in {resource}"
+            )
+        with self.cluster.lock:
+            if namespace:
+                body.setdefault("metadata", {})["namespace"] = namespace
+            created = json.dumps(self.cluster.add(resource, body)).encode()
+        self.send_body(201, created)
+
+    def delete_collection(self, resource, namespace, name, sub, query) -> None:
+        self.read_body()
+        with self.cluster.lock:
+            deleted = [
+                self.cluster.remove(
+                    resource,
+                    obj["metadata"].get("namespace", ""),
+                    obj["metadata"]["name"],
+                )
+                for obj in self.cluster.select(
+                    resource,
+                    namespace,
+                    query.get("labelSelector"),
+                    query.get("fieldSelector"),
+                )
+            ]
+            body = {
+                "kind": f"{KINDS[resource]}List",
+                "apiVersion": "v1",
+                "metadata": {"resourceVersion": str(self.cluster.version)},
+                "items": deleted,
+            }
+            payload = json.dumps(body).encode()
+        self.send_body(200, payload)
+
+    def watch(
+        self, resource: str, namespace: str | None, query: dict[str, str]
+    ) -> None:
+        cluster = self.cluster
+        labels, fields = query.get("labelSelector"), query.get("fieldSelector")
+        deadline = time.monotonic() + int(query.get("timeoutSeconds") or 1800)
+        with cluster.lock:
+            version = int(query.get("resourceVersion") or cluster.version)
+        self.start_chunked("application/json")
+        try:
+            while True:
+                with cluster.lock:
+                    try:
+                        events = cluster.events_since(version)
+                    except ApiStatus as e:
+                        lines = [{"type": "ERROR", "object": e.status()}]
+                        events = []
+                        version = cluster.version
+                    else:
+                        lines = []
+                    for rv, kind, event_type, obj in events:
+                        version = rv
+                        if kind != resource:
+                            continue
+                        if namespace and obj["metadata"].get("namespace") != namespace:
+                            continue
+                        if matches_labels(obj, labels) and matches_fields(obj, fields):
+                            lines.append({"type": event_type, "object": obj})
+                    remaining = deadline - time.monotonic()
+                    if not lines and remaining > 0 and not cluster.stopped:
+                        cluster.lock.wait(min(remaining, POLL_SECONDS))
+                for line in lines:
+                    self.send_chunk(json.dumps(line).encode() + b"\n")
+                if lines and lines[-1]["type"] == "ERROR":
+                    break
+                if time.monotonic() >= deadline or cluster.stopped:
+                    break
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    # -- objects ------------------------------------------------------------
+
+    def get_object(self, resource, namespace, name, sub, query) -> None:
+        if sub == "log" and resource == "pods":
+            self.pod_log(namespace or self.cluster.namespace, name, query)
+            return
+        if sub:
+            raise ApiStatus(404, "NotFound", f"{resource}/{sub} not found")
+        with self.cluster.lock:
+            payload = json.dumps(self.cluster.get(resource, namespace or "", name))
+        self.send_body(200, payload.encode())
+
+    def delete_object(self, resource, namespace, name, sub, query) -> None:
+        self.read_body()
+        with self.cluster.lock:
+            payload = json.dumps(self.cluster.remove(resource, namespace or "", name))
+        self.send_body(200, payload.encode())
+
+    def post_object(self, resource, namespace, name, sub, query) -> None:
+        raise ApiStatus(
+            405, "MethodNotAllowed", "the server does not allow this method"
+        )
+
+    def pod_log(self, namespace: str, name: str, query: dict[str, str]) -> None:
+        cluster = self.cluster
+        with cluster.lock:
+            pod = cluster.get("pods", namespace, name)
+            containers = [c["name"] for c in pod["spec"].get("containers") or []]
+            container = query.get("container") or (containers[0] if containers else "")
+            if container not in containers:
+                raise ApiStatus(
+                    400,
+                    "BadRequest",
+                    f"container {container} is not valid for pod {name}",
+                )
+            if pod["status"]["phase"] == "Pending":
+                raise ApiStatus(
+                    400,
+                    "BadRequest",
+                    f'container "{container}" in pod "{name}" is waiting to start',
+                )
+        follow = query.get("follow") == "true"
+        stamps = query.get("timestamps") == "true"
+        since = None
+        if query.get("sinceSeconds"):
+            since = time.time() - int(query["sinceSeconds"])
+        elif query.get("sinceTime"):
+            since = datetime.fromisoformat(
+                query["sinceTime"].replace("Z", "+00:00")
+            ).timestamp()
+        tail = int(query["tailLines"]) if query.get("tailLines") else None
+        budget = int(query["limitBytes"]) if query.get("limitBytes") else None
+
+        def lines_from(start: int) -> Iterator[bytes]:
+            entries = cluster.logs.get((namespace, name, container), [])
+            for ts, line in entries[start:]:
+                if since is not None and ts < since:
+                    continue
+                yield (log_timestamp(ts).encode() + b" " + line) if stamps else line
+
+        self.start_chunked("text/plain")
+        try:
+            with cluster.lock:
+                sent = len(cluster.logs.get((namespace, name, container), []))
+                first = list(lines_from(0))
+            if tail is not None:
+                first = first[-tail:] if tail else []
+            pending = first
+            while True:
+                for line in pending:
+                    if budget is not None:
+                        line = line[:budget]
+                        budget -= len(line)
+                    if line:
+                        self.send_chunk(line)
+                    if budget == 0:
+                        break
+                if not follow or budget == 0:
+                    break
+                with cluster.lock:
+                    entries = cluster.logs.get((namespace, name, container), [])
+                    if len(entries) == sent:
+                        if not cluster.pod_running(namespace, name) or cluster.stopped:
+                            break
+                        cluster.lock.wait(POLL_SECONDS)
+                    pending = list(lines_from(sent))
+                    sent = len(cluster.logs.get((namespace, name, container), []))
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """Serve a FakeCluster over HTTP on a local port, in a background thread."""
+
+    daemon_threads = True
+    # many clients connect at once in load tests
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        cluster: FakeCluster | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: str | None = "fake-token",
+    ) -> None:
+        super().__init__((host, port), FakeApiHandler)
+        self.cluster = cluster or FakeCluster()
+        self.token = token
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeApiServer":
+        self.cluster.start()
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.cluster.stop()
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def write_kubeconfig(self, path: str) -> str:
+        """Write a kubeconfig that points at this server and return its path."""
+        user = {"token": self.token} if self.token else {}
+        config = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "current-context": "fake",
+            "contexts": [
+                {
+                    "name": "fake",
+                    "context": {
+                        "cluster": "fake",
+                        "user": "fake",
+                        "namespace": self.cluster.namespace,
+                    },
+                }
+            ],
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": user}],
+        }
+        with open(path, "w") as f:
+            json.dump(config, f, indent=2)
+        return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--kubeconfig", metavar="PATH", help="Write a kubeconfig here")
+    parser.add_argument("--namespace", default="default")
+    parser.add_argument("--user", default="developer")
+    parser.add_argument("--dev-pod", help="Name of the dev pod (default: hostname)")
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--gpus", type=int, default=8, help="GPU quota of each queue")
+    defaults = Timetable()
+    for name in Timetable._fields:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=type(getattr(defaults, name)),
+            default=getattr(defaults, name),
+        )
+    args = parser.parse_args()
+
+    cluster = FakeCluster(
+        namespace=args.namespace,
+        user=args.user,
+        nodes=args.nodes,
+        gpus_per_queue=args.gpus,
+        timetable=Timetable(
+            **{name: getattr(args, name) for name in Timetable._fields}
+        ),
+        dev_pod=args.dev_pod,
+    )
+    server = FakeApiServer(cluster, host=args.host, port=args.port)
+    if args.kubeconfig:
+        server.write_kubeconfig(args.kubeconfig)
+    print(server.url, flush=True)
+    with server:
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import gzip
+import json
+from unittest import mock
+
+from batchtools.archive import INDEX_FILE
+from batchtools.archive import archive_job_logs
+from batchtools.archive import read_index
+from batchtools.backend import ApiError
+from batchtools.backend import OcBackend
+from tests.helpers import DictToObject
+
+
+def make_pod(name: str, containers: list[str]):
+    return DictToObject(
+        {
+            "model": {
+                "metadata": {
+                    "name": name,
+                    "namespace": "ns",
+                    "ownerReferences": [{"kind": "Job", "name": "job-a"}],
+                },
+                "spec": {
+                    "nodeName": "wrk-1",
+                    "containers": [{"name": c} for c in containers],
+                },
+                "status": {"phase": "Succeeded"},
+            }
+        }
+    )
+
+
+def fake_logs(cmd: list[str], **kwargs):
+    assert "--timestamps" in cmd
+    if "--container=broken" in cmd:
+        raise ApiError("container not found")
+    return iter(
+        [
+            b"2025-01-01T00:00:01Z first\n",
+            b"2025-01-01T00:00:02Z partial ",
+            b"line\n",
+            b"2025-01-01T00:00:03Z last\n",
+        ]
+    )
+
+
+def archive(tmp_path, pods):
+    result = mock.Mock(**{"objects.return_value": pods})
+    with (
+        mock.patch("openshift_client.selector", return_value=result) as selector,
+        mock.patch.object(OcBackend, "_oc_lines", side_effect=fake_logs),
+    ):
+        entries = archive_job_logs("job-a", str(tmp_path))
+    selector.assert_called_once_with("pods", labels={"job-name": "job-a"})
+    return entries
+
+
+def test_archive_job_logs(tmp_path):
+    entries = archive(tmp_path, [make_pod("pod-1", ["main", "broken"])])
+
+    with gzip.open(tmp_path / "pod-1.main.log.gz") as f:
+        assert f.read() == (
+            b"2025-01-01T00:00:01Z first\n"
+            b"2025-01-01T00:00:02Z partial line\n"
+            b"2025-01-01T00:00:03Z last\n"
+        )
+
+    main, broken = entries
+    assert main["pod"] == "pod-1"
+    assert main["job"] == "job-a"
+    assert main["node"] == "wrk-1"
+    assert main["phase"] == "Succeeded"
+    assert main["file"] == "pod-1.main.log.gz"
+    assert main["first_timestamp"] == "2025-01-01T00:00:01Z"
+    assert main["last_timestamp"] == "2025-01-01T00:00:03Z"
+    assert broken["error"] == "container not found"
+
+    with open(tmp_path / INDEX_FILE) as f:
+        assert json.load(f)["logs"] == entries
+
+
+def test_index_is_merged(tmp_path):
+    archive(tmp_path, [make_pod("pod-1", ["main"])])
+    archive(tmp_path, [make_pod("pod-1", ["main"]), make_pod("pod-2", ["main"])])
+
+    index = read_index(str(tmp_path))
+    assert [(e["pod"], e["container"]) for e in index] == [
+        ("pod-1", "main"),
+        ("pod-2", "main"),
+    ]
+
+
+def test_no_pods_writes_no_index(tmp_path):
+    assert archive(tmp_path, []) == []
+    assert not (tmp_path / INDEX_FILE).exists()
+    assert read_index(str(tmp_path)) == []
@@ -0,0 +1,377 @@
+import gzip
+import http.client
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+import pytest
+
+from batchtools.backend import (
+    ApiError,
+    KubeConfig,
+    LogLimits,
+    OcBackend,
+    RestBackend,
+    WatchUnavailable,
+    field_selector,
+    get_backend,
+    label_selector,
+    prune,
+)
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def send_json(self, status: int, obj: dict):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunked(self, chunks: list[bytes]):
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, self.headers, None))
+        path, _, query = self.path.partition("?")
+        if path == "/api/v1/namespaces/ns/pods" and "watch=1" in query:
+            self.send_chunked(
+                [
+                    json.dumps({"type": "ADDED", "object": pod("p1")}).encode() + b"\n",
+                    json.dumps({"type": "MODIFIED", "object": pod("p1")}).encode()
+                    + b"\n",
+                ]
+            )
+        elif path == "/api/v1/namespaces/ns/pods":
+            args = {k: v[0] for k, v in parse_qs(query).items()}
+            start = int(args.get("continue", 0))
+            end = start + int(args.get("limit", len(self.server.pods)))
+            metadata = {"resourceVersion": "42"}
+            if end < len(self.server.pods):
+                metadata["continue"] = str(end)
+            self.send_json(
+                200,
+                {
+                    "kind": "PodList",
+                    "metadata": metadata,
+                    "items": self.server.pods[start:end],
+                },
+            )
+        elif path == "/apis/batch/v1/namespaces/ns/jobs":
+            self.send_json(200, {"kind": "JobList", "metadata": {}, "items": []})
+        elif path == "/api/v1/namespaces/ns/pods/p1/log":
+            self.send_chunked([b"line one\n", b"line ", b"two\n"])
+        elif path == "/apis/user.openshift.io/v1/users/~":
+            self.send_json(200, {"metadata": {"name": "student"}})
+        else:
+            self.send_json(
+                404, {"kind": "Status", "message": f"{path} not found", "code": 404}
+            )
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(("POST", self.path, self.headers, json.loads(body)))
+        self.send_json(201, json.loads(body))
+
+    def do_DELETE(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(
+            ("DELETE", self.path, self.headers, json.loads(body))
+        )
+        self.send_json(200, {"kind": "Status", "status": "Success"})
+
+
+def pod(name: str) -> dict:
+    return {
+        "metadata": {"name": name, "namespace": "ns", "resourceVersion": "1"},
+        "spec": {"containers": [{"name": "c"}]},
+        "status": {"phase": "Running"},
+    }
+
+
+@pytest.fixture
+def api_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeApiHandler)
+    server.connections = 0
+    server.requests = []
+    server.pods = [pod("p1"), pod("p2")]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def backend(api_server) -> RestBackend:
+    host, port = api_server.server_address
+    return RestBackend(
+        KubeConfig(f"http://{host}:{port}", namespace="ns", token="sha256~secret")
+    )
+
+
+def write_kubeconfig(tmp_path, user: dict) -> str:
+    config = {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "current-context": "ctx",
+        "contexts": [
+            {"name": "ctx", "context": {"cluster": "c", "user": "u", "namespace": "ns"}}
+        ],
+        "clusters": [
+            {
+                "name": "c",
+                "cluster": {
+                    "server": "https://api.example.com:6443",
+                    "insecure-skip-tls-verify": True,
+                },
+            }
+        ],
+        "users": [{"name": "u", "user": user}],
+    }
+    path = tmp_path / "kubeconfig"
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def test_kubeconfig_with_token(tmp_path):
+    config = KubeConfig.from_file(write_kubeconfig(tmp_path, {"token": "abc"}))
+    assert config is not None
+    assert config.server == "https://api.example.com:6443"
+    assert config.namespace == "ns"
+    assert config.token == "abc"
+    assert config.insecure
+
+
+def test_kubeconfig_with_exec_plugin_is_not_usable(tmp_path):
+    path = write_kubeconfig(tmp_path, {"exec": {"command": "get-token"}})
+    assert KubeConfig.from_file(path) is None
+
+
+def test_get_backend_prefers_rest(tmp_path, monkeypatch):
+    monkeypatch.setenv("KUBECONFIG", write_kubeconfig(tmp_path, {"token": "abc"}))
+    assert isinstance(get_backend(), RestBackend)
+
+
+def test_get_backend_falls_back_to_oc():
+    # conftest points KUBECONFIG at /dev/null
+    assert isinstance(get_backend(), OcBackend)
+
+
+def test_get_backend_forced_oc(tmp_path, monkeypatch):
+    monkeypatch.setenv("KUBECONFIG", write_kubeconfig(tmp_path, {"token": "abc"}))
+    monkeypatch.setenv("BATCHTOOLS_BACKEND", "oc")
+    assert isinstance(get_backend(), OcBackend)
+
+
+def test_label_selector():
+    selector = label_selector(
+        {"job-name": "j", "!kueue.x-k8s.io/queue-name": None, "x": None}
+    )
+    assert selector == "job-name=j,kueue.x-k8s.io/queue-name,!x"
+
+
+def test_field_selector():
+    selector = field_selector({"status.phase": "Running", "!spec.nodeName": "n1"})
+    assert selector == "status.phase=Running,spec.nodeName!=n1"
+
+
+def test_prune():
+    obj = pod("p1")
+    assert prune(obj, ("metadata.name", "spec.containers.name", "status")) == {
+        "metadata": {"name": "p1"},
+        "spec": {"containers": [{"name": "c"}]},
+        "status": {"phase": "Running"},
+    }
+
+
+def test_list_with_field_selector_and_trim(backend, api_server):
+    pods = backend.list_objects(
+        "pods", fields={"status.phase": "Running"}, trim=("metadata.name",)
+    )
+    assert [p.as_dict() for p in pods] == [
+        {"metadata": {"name": "p1"}},
+        {"metadata": {"name": "p2"}},
+    ]
+    _, path, headers, _ = api_server.requests[0]
+    assert path == (
+        "/api/v1/namespaces/ns/pods?limit=500&fieldSelector=status.phase%3DRunning"
+    )
+    assert headers["Accept-Encoding"] == "gzip"
+
+
+def test_iter_objects_pages(backend, api_server):
+    api_server.pods = [pod(f"p{i}") for i in range(7)]
+    pods = backend.iter_objects("pods", page_size=3)
+
+    # the first page is usable before the rest has been requested
+    assert next(pods).model.metadata.name == "p0"
+    assert len(api_server.requests) == 1
+
+    assert [p.model.metadata.name for p in pods] == [f"p{i}" for i in range(1, 7)]
+    paths = [path for _, path, _, _ in api_server.requests]
+    assert paths == [
+        "/api/v1/namespaces/ns/pods?limit=3",
+        "/api/v1/namespaces/ns/pods?limit=3&continue=3",
+        "/api/v1/namespaces/ns/pods?limit=3&continue=6",
+    ]
+
+
+def test_requests_share_one_connection(backend, api_server):
+    for _ in range(5):
+        pods = backend.list_objects("pods", labels={"job-name": "j"})
+        assert [p.model.metadata.name for p in pods] == ["p1", "p2"]
+    assert backend.whoami() == "student"
+
+    assert api_server.connections == 1
+    method, path, headers, _ = api_server.requests[0]
+    assert path == "/api/v1/namespaces/ns/pods?limit=500&labelSelector=job-name%3Dj"
+    assert headers["Authorization"] == "Bearer sha256~secret"
+
+
+def test_create_and_delete(backend, api_server):
+    backend.create({"apiVersion": "batch/v1", "kind": "Job", "metadata": {"name": "j"}})
+    backend.delete("job", "j")
+
+    (_, create_path, _, body), (_, delete_path, _, options) = api_server.requests
+    assert create_path == "/apis/batch/v1/namespaces/ns/jobs"
+    assert body["metadata"]["name"] == "j"
+    assert delete_path == "/apis/batch/v1/namespaces/ns/jobs/j"
+    assert options == {"propagationPolicy": "Background"}
+
+
+def test_only_idempotent_requests_are_resent(backend):
+    """A pooled connection that drops before the response arrives."""
+
+    def dropped():
+        conn = mock.Mock(sock=None)
+        conn.getresponse.side_effect = http.client.RemoteDisconnected("closed")
+        return conn
+
+    fresh = mock.Mock(sock=None)
+    fresh.getresponse.return_value = mock.Mock(status=200)
+    with mock.patch.object(
+        backend.pool, "acquire", side_effect=[(dropped(), True), (fresh, False)]
+    ):
+        conn, _ = backend._send("GET", "/api", None, {}, 1)
+    assert conn is fresh
+
+    post = dropped()
+    with (
+        mock.patch.object(backend.pool, "acquire", return_value=(post, True)),
+        pytest.raises(ApiError, match="POST"),
+    ):
+        backend._send("POST", "/apis/batch/v1/namespaces/ns/jobs", b"{}", {}, 1)
+    post.request.assert_called_once()
+
+
+def test_unsent_requests_are_resent(backend):
+    stale = mock.Mock(sock=None)
+    stale.request.side_effect = BrokenPipeError()
+    fresh = mock.Mock(sock=None)
+    with mock.patch.object(
+        backend.pool, "acquire", side_effect=[(stale, True), (fresh, False)]
+    ):
+        conn, _ = backend._send(
+            "POST", "/apis/batch/v1/namespaces/ns/jobs", b"{}", {}, 1
+        )
+    assert conn is fresh
+
+
+def test_error_status(backend):
+    with pytest.raises(ApiError) as err:
+        backend.get("job", "missing")
+    assert err.value.status == 404
+    assert "not found" in str(err.value)
+
+
+def test_watch_and_list_raw(backend, api_server):
+    items, rv = backend.list_raw("pods", {"labelSelector": "job-name=j"})
+    assert rv == "42"
+    events = list(backend.watch("pods", {"labelSelector": "job-name=j"}, rv, 10))
+    assert [e for e, _ in events] == ["ADDED", "MODIFIED"]
+
+    # the connection is reused after the watch body was read to the end
+    assert backend.whoami() == "student"
+    assert api_server.connections == 1
+    assert "resourceVersion=42" in api_server.requests[1][1]
+
+
+def test_watch_unavailable(backend):
+    with (
+        mock.patch("batchtools.backend.API_RESOURCES", {"jobs": ("nope", True)}),
+        pytest.raises(WatchUnavailable),
+    ):
+        list(backend.watch("jobs", {}, "1", 10))
+
+
+def test_stream_logs(backend):
+    lines = list(backend.stream_logs("p1", chunk_size=5))
+    assert b"".join(lines) == b"line one\nline two\n"
+    assert max(len(line) for line in lines) <= 5
+
+
+def test_logs_are_limited_on_the_server(backend, api_server):
+    list(
+        backend.stream_logs(
+            "p1",
+            container="c",
+            limits=LogLimits(tail=20, since=600, limit_bytes=4096),
+            chunk_size=-1,
+        )
+    )
+    _, path, _, _ = api_server.requests[-1]
+    assert path == (
+        "/api/v1/namespaces/ns/pods/p1/log"
+        "?tailLines=20&sinceSeconds=600&limitBytes=4096&container=c"
+    )
+
+
+def test_records_from_json(backend, api_server):
+    from batchtools.records import JobRecord, PodRecord
+
+    api_server.pods[0]["metadata"]["ownerReferences"] = [{"kind": "Job", "name": "j"}]
+    api_server.pods[0]["spec"]["containers"][0]["resources"] = {
+        "requests": {"nvidia.com/gpu": "2"}
+    }
+    pods = list(backend.records("pods", PodRecord))
+    assert pods[0] == PodRecord("p1", "ns", "Running", "", "j", ("c",), 2)
+    assert pods[1].job is None
+    assert "as=PartialObjectMetadataList" not in api_server.requests[0][2]["Accept"]
+
+    list(backend.records("jobs", JobRecord))
+    _, path, headers, _ = api_server.requests[1]
+    assert path.startswith("/apis/batch/v1/namespaces/ns/jobs?")
+    assert "as=PartialObjectMetadataList" in headers["Accept"]
+
+
+def test_delete_collection(backend, api_server):
+    deleted = backend.delete_collection("jobs", {"batchtools/owner": "me"})
+    assert deleted == []
+
+    _, path, _, options = api_server.requests[0]
+    assert (
+        path
+        == "/apis/batch/v1/namespaces/ns/jobs?labelSelector=batchtools%2Fowner%3Dme"
+    )
+    assert options == {"propagationPolicy": "Background"}
@@ -1,5 +1,9 @@
+import subprocess
+import sys
+
 import pytest
 from batchtools.batchtools import BatchTools
+from batchtools.batchtools import load_command
 
 
 def test_no_command():
@@ -54,3 +58,28 @@ def test_command_help():
         with pytest.raises(SystemExit) as err:
             app.run([name, "--help"])
         assert err.value.code == 0
+
+
+def test_command_help_text():
+    for name, (_, help_text) in BatchTools.commands.items():
+        assert load_command(name).help == help_text
+
+
+def test_help_loads_only_the_selected_command():
+    # run in a fresh interpreter, since other tests have imported everything
+    code = """
+import sys
+from batchtools.batchtools import BatchTools
+try:
+    BatchTools().parse(["bq", "--help"])
+except SystemExit:
+    pass
+print(" ".join(sorted(sys.modules)))
+"""
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    modules = out.split()
+    assert "batchtools.bq" in modules
+    assert "batchtools.br" not in modules
+    assert not [m for m in modules if m.startswith("openshift_client")]
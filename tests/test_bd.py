@@ -64,7 +64,26 @@ def patch_kueue_managed(*names_that_are_kueue):
     return mock.patch("batchtools.bd.is_kueue_managed_job", side_effect=_predicate)
 
 
+@contextmanager
+def patch_invoke(deleted: list[str]):
+    """
+    Patches openshift_client.invoke for `oc whoami` and for the label-selected
+    `oc delete jobs`, which prints the names of the deleted jobs.
+    """
+
+    def _invoke(verb, cmd_args=None):
+        if verb == "whoami":
+            out = "student@example.com\n"
+        else:
+            out = "".join(f"job.batch/{name}\n" for name in deleted)
+        return mock.Mock(**{"out.return_value": out})
+
+    with mock.patch("openshift_client.invoke", side_effect=_invoke) as mock_invoke:
+        yield mock_invoke
+
+
 def test_no_jobs_found(args, capsys):
+    args.job_names = ["job-job-1"]
     with patch_selector_with([]):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
@@ -72,33 +91,58 @@ def test_no_jobs_found(args, capsys):
 
 
 def test_no_kueue_managed_gpu_jobs(args, kueue_jobs, capsys):
+    args.job_names = ["job-job-1"]
     with patch_selector_with(kueue_jobs), patch_kueue_managed():
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
         assert "No Kueue-managed GPU jobs to delete." in out
 
 
-def test_ignores_non_gpu_named_jobs(args, mixed_jobs, capsys):
-    with patch_selector_with(mixed_jobs), patch_kueue_managed("job-job-1"):
+def test_delete_all_when_no_names_given(args, capsys):
+    args.job_names = []  # explicit
+    with (
+        patch_selector_with([]) as mock_selector,
+        patch_invoke(["job-job-2", "job-job-1"]) as mock_invoke,
+    ):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
-        # delete only job-job-1
-        assert "Deleting job/job-job-1" in out
-        assert "Deleted job: job-job-1" in out
-        assert "ignored-1" not in out
 
+    assert "No job names provided -> deleting all of your jobs:" in out
+    assert "Deleted 2 job(s): job-job-1 job-job-2" in out
 
-def test_delete_all_when_no_names_given(args, kueue_jobs, capsys):
-    args.job_names = []  # explicit
-    with patch_selector_with(kueue_jobs), patch_kueue_managed("job-job-1", "job-job-2"):
+    # one delete-collection call, no listing and no per-job deletes
+    mock_selector.assert_not_called()
+    mock_invoke.assert_called_with(
+        "delete",
+        [
+            "jobs",
+            "--selector=batchtools/owner=student_example.com,kueue.x-k8s.io/queue-name",
+            "--cascade=background",
+            "--output=name",
+        ],
+    )
+
+
+def test_delete_all_with_nothing_to_delete(args, capsys):
+    with patch_invoke([]):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
+    assert "You have no jobs to delete." in out
 
-        assert "No job names provided -> deleting all Kueue-managed GPU jobs:" in out
-        for obj in kueue_jobs:
-            name = obj.model.metadata.name
-            assert f"Deleting job/{name}" in out
-            assert f"Deleted job: {name}" in out
+
+def test_ignores_non_kueue_jobs(args, mixed_jobs, capsys):
+    args.job_names = ["job-job-1", "ignored-1"]
+    with (
+        patch_selector_with(mixed_jobs) as mock_selector,
+        patch_kueue_managed("job-job-1"),
+    ):
+        DeleteJobsCommand.run(args)
+        out = capsys.readouterr().out
+
+    assert "ignored-1 is not a Kueue-managed GPU job; skipping." in out
+    assert "Deleted 1 job(s), 0 failed." in out
+    mock_selector.assert_any_call("job/job-job-1")
+    assert mock.call("job/ignored-1") not in mock_selector.call_args_list
 
 
 def test_delete_only_specified_allowed(args, kueue_jobs, capsys):
@@ -107,25 +151,27 @@ def test_delete_only_specified_allowed(args, kueue_jobs, capsys):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
 
-        assert "Deleting job/job-job-1" in out
-        assert "Deleted job: job-job-1" in out
         assert "job-job-2 is not a Kueue-managed GPU job; skipping." in out
-        assert "Deleting job/job-job-2" not in out
+        assert "Deleted 1 job(s), 0 failed." in out
 
 
 def test_only_deletes_listed_names_even_if_more_kueue(args, kueue_jobs, capsys):
     args.job_names = ["job-job-2"]
-    with patch_selector_with(kueue_jobs), patch_kueue_managed("job-job-1", "job-job-2"):
+    with (
+        patch_selector_with(kueue_jobs) as mock_selector,
+        patch_kueue_managed("job-job-1", "job-job-2"),
+    ):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
 
-        assert "Deleting job/job-job-2" in out
-        assert "Deleted job: job-job-2" in out
+        assert "Deleted 1 job(s), 0 failed." in out
         # make sure job-job-1 is not deleted implicitly
-        assert "Deleting job/job-job-1" not in out
+        mock_selector.assert_any_call("job/job-job-2")
+        assert mock.call("job/job-job-1") not in mock_selector.call_args_list
 
 
 def test_delete_jobs_prints_error_when_delete_raises(args, capsys):
+    args.job_names = ["job-job-1"]
     jobs = [DictToObject({"model": {"metadata": {"name": "job-job-1"}}})]
     with patch_selector_with(jobs) as mock_selector, patch_kueue_managed("job-job-1"):
         mock_selector.return_value.delete.side_effect = OpenShiftPythonException(
@@ -135,9 +181,11 @@ def test_delete_jobs_prints_error_when_delete_raises(args, capsys):
         DeleteJobsCommand.run(args)
         out = capsys.readouterr().out
         assert "Error occurred while deleting job/job-job-1: test exception" in out
+        assert "Deleted 0 job(s), 1 failed." in out
 
 
 def test_sys_exit_when_list_selector_raises(args):
+    args.job_names = ["job-job-1"]
     with mock.patch(
         "openshift_client.selector",
         side_effect=OpenShiftPythonException("not successful"),
@@ -4,10 +4,14 @@ from contextlib import contextmanager
 import openshift_client as oc
 
 import argparse
+import io
+import threading
 from typing import Any
-from typing import Callable
 
+from batchtools.backend import ApiError
+from batchtools.backend import OcBackend
 from batchtools.bl import LogsCommand
+from batchtools.bl import LogsCommandArgs
 from tests.helpers import DictToObject
 
 
@@ -16,34 +20,33 @@ def pods():
     return [
         DictToObject(
             {
-                "model": {"metadata": {"name": "pod1"}},
-                "logs": (
-                    Callable,
-                    {"return_value": {"container1": "These are logs from pod1"}},
-                ),
+                "model": {
+                    "metadata": {"name": name, "namespace": "ns"},
+                    "spec": {"containers": [{"name": "container1"}]},
+                },
             }
-        ),
-        DictToObject(
-            {
-                "model": {"metadata": {"name": "pod2"}},
-                "logs": (
-                    Callable,
-                    {"return_value": {"container1": "These are logs from pod2"}},
-                ),
-            }
-        ),
+        )
+        for name in ("pod1", "pod2")
     ]
 
 
+def fake_oc_logs(cmd: list[str], **kwargs):
+    """Stand in for `oc logs pod/<name> ...`"""
+    assert cmd[0] == "logs"
+    name = cmd[1].removeprefix("pod/")
+    return iter([f"These are logs from {name}\n".encode()])
+
+
 @pytest.fixture
 def args() -> argparse.Namespace:
-    return argparse.Namespace()
+    return LogsCommandArgs()
 
 
 @contextmanager
 def patch_pods_selector(pods: list[Any]):
     with (
         mock.patch("openshift_client.selector") as mock_selector,
+        mock.patch.object(OcBackend, "_oc_lines", side_effect=fake_oc_logs),
         mock.patch("batchtools.bl.is_kueue_managed_pod", return_value=True),
     ):
         mock_result = mock.Mock(name="result")
@@ -54,6 +57,7 @@ def patch_pods_selector(pods: list[Any]):
 
 def test_no_pods(args: argparse.Namespace, capsys):
     with patch_pods_selector([]):
+        args.pod_names = []
         LogsCommand.run(args)
         captured = capsys.readouterr()
         assert "No pods to retrieve logs from" in captured.out
@@ -66,8 +70,9 @@ def test_get_logs_all(args: argparse.Namespace, pods: list[Any], capsys):
         captured = capsys.readouterr()
         for pod in pods:
             assert f"Logs for {pod.model.metadata.name}" in captured.out
+            name = pod.model.metadata.name
             assert (
-                f"{{'container1': 'These are logs from {pod.model.metadata.name}'}}"
+                f"==> {name}/container1 <==\nThese are logs from {name}\n"
                 in captured.out
             )
 
@@ -115,9 +120,138 @@ def test_selector_exception_exits_cleanly(args: argparse.Namespace):
             mock.Mock(),
         )
 
+        args.pod_names = []
         with pytest.raises(SystemExit) as excinfo:
             LogsCommand.run(args)
 
         message = str(excinfo.value)
         assert "Error occurred while retrieving logs:" in message
         assert "test exception" in message
+
+
+def test_get_logs_all_uses_constant_api_calls(args: argparse.Namespace, capsys):
+    def make_pod(name: str, job_name: str):
+        return DictToObject(
+            {
+                "model": {
+                    "metadata": {
+                        "name": name,
+                        "ownerReferences": [{"kind": "Job", "name": job_name}],
+                    }
+                },
+            }
+        )
+
+    pods = [
+        make_pod(f"pod{i}", "kueue-job" if i % 2 else "other-job") for i in range(50)
+    ]
+    jobs = [DictToObject({"model": {"metadata": {"name": "kueue-job"}}})]
+
+    def _selector(kind, **kwargs):
+        result = mock.Mock(name="result")
+        result.objects.return_value = pods if kind == "pods" else jobs
+        return result
+
+    with mock.patch(
+        "openshift_client.selector", side_effect=_selector
+    ) as mock_selector:
+        args.pod_names = []
+        LogsCommand.run(args)
+
+    # one pod listing and one job listing, no matter how many pods there are
+    assert mock_selector.call_args_list == [
+        mock.call("pods", labels={"!job-name": None}),
+        mock.call("jobs", labels={"!kueue.x-k8s.io/queue-name": None}),
+    ]
+    out = capsys.readouterr().out
+    assert "Logs for pod1:" in out
+    assert "Logs for pod2:" not in out
+
+
+def test_logs_are_fetched_concurrently_and_printed_in_order(
+    args: argparse.Namespace, capsys
+):
+    names = [f"pod{i}" for i in (3, 1, 4, 0, 2)]
+    pods = [
+        DictToObject(
+            {
+                "model": {
+                    "metadata": {"name": name, "namespace": "ns"},
+                    "spec": {"containers": [{"name": "c"}]},
+                },
+            }
+        )
+        for name in names
+    ]
+    started = threading.Barrier(len(pods), timeout=5)
+
+    def _logs(cmd: list[str], **kwargs):
+        # every request is in flight before any of them completes
+        started.wait()
+        if cmd[1] == "pod/pod2":
+            raise ApiError("container not found")
+        return fake_oc_logs(cmd)
+
+    with (
+        patch_pods_selector(pods),
+        mock.patch.object(OcBackend, "_oc_lines", side_effect=_logs),
+        mock.patch("batchtools.bl.is_kueue_managed_pod", return_value=True),
+    ):
+        args.pod_names = []
+        LogsCommand.run(args)
+
+    out = capsys.readouterr().out
+    headers = [line for line in out.splitlines() if line.startswith("Logs for")]
+    assert headers == [f"Logs for pod{i}:" for i in range(5)]
+    # a failing pod reports its error in its own place
+    assert out.index("container not found") > out.index("Logs for pod2:")
+    assert out.index("container not found") < out.index("Logs for pod3:")
+
+
+def test_logs_are_fetched_a_bounded_way_ahead(capsys):
+    from batchtools.bl import print_logs
+    from batchtools.records import PodRecord
+
+    lock = threading.Lock()
+    fetched: list[str] = []
+    printed: list[str] = []
+    ahead: list[int] = []
+
+    def spool(pod, limits):
+        with lock:
+            fetched.append(pod.name)
+            ahead.append(len(fetched) - len(printed))
+        return io.BytesIO(b"log\n")
+
+    def copy(src, dst, length):
+        with lock:
+            printed.append(src.getvalue())
+
+    pods = [PodRecord(f"pod{i}", containers=("c",)) for i in range(10)]
+    with (
+        mock.patch("batchtools.bl.LOG_WORKERS", 3),
+        mock.patch("batchtools.bl.spool_logs", side_effect=spool),
+        mock.patch("batchtools.bl.shutil.copyfileobj", side_effect=copy),
+    ):
+        print_logs(pods)
+
+    assert len(printed) == 10
+    # never more than LOG_WORKERS pods fetched and not yet printed
+    assert max(ahead) <= 3
+
+
+def test_save_logs(
+    args: argparse.Namespace, pods: list[Any], tmp_path, monkeypatch, capsys
+):
+    monkeypatch.chdir(tmp_path)
+    args.pod_names = ["pod1"]
+    args.save = True
+    with patch_pods_selector(pods):
+        LogsCommand.run(args)
+
+    out = capsys.readouterr().out
+    assert "These are logs from pod1" not in out
+    # the pod belongs to no job, so its logs are saved under its own name
+    assert "Saved logs to jobs/pod1/" in out
+    assert (tmp_path / "jobs" / "pod1" / "pod1.container1.log.gz").exists()
+    assert (tmp_path / "jobs" / "pod1" / "logs-index.json").exists()
@@ -6,9 +6,15 @@ from typing import Any
 import argparse
 
 from batchtools.bp import PrintJobsCommand
+from batchtools.bp import PrintJobsCommandArgs
 from tests.helpers import DictToObject
 
 
+@pytest.fixture
+def args() -> argparse.Namespace:
+    return PrintJobsCommandArgs()
+
+
 @pytest.fixture
 def jobs() -> list[Any]:
     return [
@@ -17,11 +23,18 @@ def jobs() -> list[Any]:
     ]
 
 
+def make_pod(name: str, job_name: str) -> Any:
+    pod = DictToObject({"model": {"metadata": {"name": name}}})
+    # label keys are not valid attribute names, so use a real dict
+    pod.model.metadata.labels = {"job-name": job_name}
+    return pod
+
+
 @pytest.fixture
 def pods() -> dict[str, Any]:
     return {
-        "job1": [DictToObject({"model": {"metadata": {"name": "job1-pod1"}}})],
-        "job2": [DictToObject({"model": {"metadata": {"name": "job2-pod1"}}})],
+        "job1": [make_pod("job1-pod1", "job1")],
+        "job2": [make_pod("job2-pod1", "job2")],
     }
 
 
@@ -31,9 +44,11 @@ def patch_jobs_selector(
 ):
     def selector_side_effect(kind: str, labels: dict[str, str] | None = None):
         mock_result = mock.Mock(spec=["objects"])
-        if kind == "pods" and pods is not None and labels is not None:
-            job_name = labels["job-name"]
-            mock_result.objects.return_value = pods[job_name]
+        if kind == "pods":
+            assert labels == {"!job-name": None}
+            mock_result.objects.return_value = [
+                pod for job_pods in (pods or {}).values() for pod in job_pods
+            ]
         else:
             mock_result.objects.return_value = jobs
 
@@ -75,3 +90,36 @@ def test_print_jobs_selected(
         assert "Pods for job2" not in captured.out
         assert "job1-pod1" in captured.out
         assert "job2-pod1" not in captured.out
+
+
+def test_print_jobs_lists_pods_once(args: argparse.Namespace, capsys):
+    jobs = [
+        DictToObject({"model": {"metadata": {"name": f"job{i}"}}}) for i in range(20)
+    ]
+    pods = {
+        f"job{i}": [make_pod(f"job{i}-pod{n}", f"job{i}") for n in range(2)]
+        for i in range(0, 20, 2)
+    }
+    args.job_names = []
+    with patch_jobs_selector(jobs, pods) as mock_selector:
+        PrintJobsCommand.run(args)
+
+    assert mock_selector.call_count == 2
+    out = capsys.readouterr().out
+    assert "Pods for job0:\n" in out and "- job0-pod1" in out
+    assert "No pods found for job job1." in out
+
+
+def test_print_jobs_timing(args: argparse.Namespace, jobs: list[Any], capsys):
+    args.job_names = ["job1", "missing"]
+    args.timing = True
+    with (
+        patch_jobs_selector(jobs),
+        mock.patch("batchtools.bp.startup_breakdowns", return_value=[]) as breakdowns,
+    ):
+        PrintJobsCommand.run(args)
+
+    breakdowns.assert_called_once_with(["job1"])
+    out = capsys.readouterr().out
+    assert "missing does not exist; cannot fetch pod timing." in out
+    assert "No pods found." in out
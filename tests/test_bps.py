@@ -5,6 +5,7 @@ from contextlib import contextmanager
 from typing import Any
 
 from batchtools.bps import ListPodsCommand, summarize_gpu_pods
+from batchtools.records import PodRecord
 
 
 def create_pod(
@@ -45,10 +46,23 @@ def args() -> argparse.Namespace:
 
 @contextmanager
 def patch_pods_selector(pods: list[Any]):
-    with mock.patch("openshift_client.selector") as mock_selector:
+    """Fake oc.selector, applying field selectors the way the server would."""
+
+    def _selector(kind, field_selectors=None, **kwargs):
+        fields = field_selectors or {}
         mock_result = mock.Mock(name="result")
-        mock_result.objects.return_value = pods
-        mock_selector.return_value = mock_result
+        mock_result.objects.return_value = [
+            p
+            for p in pods
+            if p.model.status.phase == fields.get("status.phase", p.model.status.phase)
+            and p.model.spec.nodeName
+            == fields.get("spec.nodeName", p.model.spec.nodeName)
+        ]
+        return mock_result
+
+    with mock.patch(
+        "openshift_client.selector", side_effect=_selector
+    ) as mock_selector:
         with mock.patch("openshift_client.timeout"):
             yield mock_selector
 
@@ -146,7 +160,9 @@ def test_summarize_gpu_pods_empty():
 
 
 def test_summarize_gpu_pods_with_gpu():
-    pods = [create_pod("test-pod", "default", "node-a", "Running", 2)]
+    pods = [
+        PodRecord.from_object(create_pod("test-pod", "default", "node-a", "Running", 2))
+    ]
     result = summarize_gpu_pods(pods, verbose=False)
     assert len(result) == 1
     assert "node-a: BUSY 2 default/test-pod" in result[0]
@@ -162,12 +178,28 @@ def test_summarize_gpu_pods_multiple_containers():
     container2.resources.requests = {"nvidia.com/gpu": 2}
     pod.model.spec.containers.append(container2)
 
-    result = summarize_gpu_pods([pod], verbose=False)
+    result = summarize_gpu_pods([PodRecord.from_object(pod)], verbose=False)
 
     assert len(result) == 1
     assert "node-a: BUSY 3 default/multi-gpu-pod" in result[0]
 
 
+def test_filters_on_server(args: argparse.Namespace):
+    args.node_names = ["node-b", "node-a", "node-b"]
+    with patch_pods_selector([]) as mock_selector:
+        ListPodsCommand.run(args)
+
+    calls = sorted(
+        c.kwargs["field_selectors"]["spec.nodeName"]
+        for c in mock_selector.call_args_list
+    )
+    assert calls == ["node-a", "node-b"]
+    for c in mock_selector.call_args_list:
+        assert c.args == ("pods",)
+        assert c.kwargs["field_selectors"]["status.phase"] == "Running"
+        assert c.kwargs["all_namespaces"]
+
+
 def test_list_pods_openshift_exception(args: argparse.Namespace, capsys):
     """Test handling of OpenShift exceptions."""
     with mock.patch("openshift_client.selector") as mock_selector:
@@ -6,10 +6,31 @@ import argparse
 
 import batchtools.build_yaml
 
-from batchtools.br import CreateJobCommand, get_pod_status, log_job_output
+from batchtools.backend import ApiError
+from batchtools.backend import LogLimits
+from batchtools.br import (
+    CreateJobCommand,
+    log_array_output,
+    log_job_output,
+)
 from tests.helpers import DictToObject
 
 
+@pytest.fixture(autouse=True)
+def owner():
+    with mock.patch("batchtools.br.job_owner", return_value="student"):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def admitted():
+    """Kueue admits every job at once."""
+    with mock.patch(
+        "batchtools.br.wait_for_admission", return_value="Admitted"
+    ) as wait_for_admission:
+        yield wait_for_admission
+
+
 @pytest.fixture
 def tempdir():
     with tempfile.TemporaryDirectory() as t:
@@ -94,6 +115,7 @@ def test_create_job_nowait(
             "labels": {
                 "kueue.x-k8s.io/queue-name": queue_name,
                 "test_name": "kueue_test",
+                "batchtools/owner": "student",
             },
         },
         "spec": {
@@ -171,58 +193,268 @@ def test_create_job_raises_from_oc_create(
     assert "Error occurred while creating job: kaboom" in str(err.value)
 
 
+@mock.patch("batchtools.br.oc_delete")
+@mock.patch("batchtools.br.log_job_output", side_effect=ApiError("watch failed"))
+@mock.patch("openshift_client.create", name="create")
 @mock.patch("openshift_client.selector", name="selector")
-def test_get_pod_status_running(mock_selector):
-    pod = DictToObject({"model": {"status": {"phase": "Running"}}})
-    mock_selector.return_value = mock.Mock(**{"object.return_value": pod})
-    assert get_pod_status("mypod") == "Running"
+@mock.patch("socket.gethostname", name="gethostname")
+@mock.patch("os.getcwd", name="getcwd")
+def test_create_job_deletes_it_when_waiting_fails(
+    mock_getcwd,
+    mock_gethostname,
+    mock_selector,
+    mock_create,
+    mock_log_job_output,
+    mock_oc_delete,
+    parser,
+    subparsers,
+    tmp_path,
+):
+    CreateJobCommand.build_parser(subparsers)
+    args = parser.parse_args(["br", "--no-context", "--job-id", "1", "true"])
+    mock_getcwd.return_value = str(tmp_path)
+    mock_gethostname.return_value = "devpod"
+    devpod = DictToObject(
+        {
+            "model": {
+                "metadata": {"name": "devpod"},
+                "spec": {"containers": [{"name": "c"}]},
+            }
+        }
+    )
+    mock_selector.return_value = mock.Mock(**{"object.return_value": devpod})
+
+    with pytest.raises(SystemExit):
+        CreateJobCommand.run(args)
+    mock_oc_delete.assert_called_once_with("job", "job-v100-1")
 
 
 @mock.patch("batchtools.br.oc_delete")
-@mock.patch("batchtools.br.pretty_print", return_value="LOGS")
-@mock.patch("batchtools.br.get_pod_status")
+@mock.patch(
+    "batchtools.br.write_pod_logs", side_effect=lambda pod, limits: print("LOGS")
+)
+@mock.patch("batchtools.br.wait_for_pod", return_value=("pod-1", "Succeeded"))
 @mock.patch("openshift_client.selector", name="selector")
 def test_log_job_output_success(
-    mock_selector, mock_get_pod_status, mock_pretty_print, mock_oc_delete, capsys
+    mock_selector, mock_wait_for_pod, mock_write_logs, mock_oc_delete, capsys
 ):
-    # pod list for job
     pod = DictToObject({"model": {"metadata": {"name": "pod-1"}}})
-    mock_selector.return_value = mock.Mock(**{"objects.return_value": [pod]})
-
-    # simulate states until success
-    mock_get_pod_status.side_effect = ["Pending", "Running", "Succeeded"]
+    mock_selector.return_value = mock.Mock(**{"object.return_value": pod})
 
-    # avoid real sleep
-    with mock.patch("time.sleep", return_value=None):
-        log_job_output("job-abc", wait=True, timeout=30)
+    log_job_output("job-abc", wait=True, timeout=30)
 
     out = capsys.readouterr().out
     assert "finished with phase=Succeeded" in out
     assert "LOGS" in out
+    mock_wait_for_pod.assert_called_once_with("job-abc", timeout=30)
+    mock_selector.assert_called_once_with("pod/pod-1")
     mock_oc_delete.assert_not_called()
 
 
 @mock.patch("batchtools.br.oc_delete")
-@mock.patch("batchtools.br.get_pod_status", return_value="Running")
+@mock.patch("batchtools.br.wait_for_pod", return_value=None)
+def test_log_job_output_timeout_deletes_job(mock_wait_for_pod, mock_oc_delete, capsys):
+    log_job_output("job-timeout", wait=True, timeout=1)
+
+    out = capsys.readouterr().out
+    assert "Timeout waiting for job job-timeout to complete" in out
+    mock_oc_delete.assert_called_once_with("job", "job-timeout")
+
+
+@mock.patch("batchtools.br.write_pod_logs")
+@mock.patch("openshift_client.selector", name="selector")
+def test_log_job_output_nowait_no_pods(mock_selector, mock_write_logs, capsys):
+    mock_selector.return_value = mock.Mock(**{"objects.return_value": []})
+
+    log_job_output("job-none", wait=False, timeout=None)
+
+    out = capsys.readouterr().out
+    assert "No pods found for job job-none" in out
+    mock_write_logs.assert_not_called()
+
+
+@mock.patch("batchtools.br.follow_pod_logs")
+@mock.patch("batchtools.br.wait_for_pod")
+def test_log_job_output_follow(mock_wait_for_pod, mock_follow, capsys):
+    mock_wait_for_pod.side_effect = [("pod-1", "Running"), ("pod-1", "Succeeded")]
+
+    log_job_output("job-abc", wait=True, timeout=None, follow=True)
+
+    out = capsys.readouterr().out
+    assert "pod-1 is running, streaming logs" in out
+    assert "finished with phase=Succeeded" in out
+    mock_follow.assert_called_once_with("pod-1", limits=LogLimits())
+    assert "Running" in mock_wait_for_pod.call_args_list[0].kwargs["phases"]
+
+
+@mock.patch("openshift_client.create", name="create")
+@mock.patch("openshift_client.selector", name="selector")
+@mock.patch("socket.gethostname", name="gethostname")
+@mock.patch("os.getcwd", name="getcwd")
+def test_create_array_job(
+    mock_getcwd,
+    mock_gethostname,
+    mock_selector,
+    mock_create,
+    parser,
+    subparsers,
+    tmp_path,
+):
+    CreateJobCommand.build_parser(subparsers)
+    args = parser.parse_args(
+        ["br", "--no-wait", "--array", "8", "--parallelism", "2", "true"]
+    )
+    args.job_id = "sweep"
+
+    mock_getcwd.return_value = str(tmp_path)
+    mock_gethostname.return_value = "devpod"
+    devpod = DictToObject(
+        {
+            "model": {
+                "metadata": {"name": "devpod"},
+                "spec": {"containers": [{"name": "c"}]},
+            }
+        }
+    )
+    mock_selector.return_value = mock.Mock(**{"object.return_value": devpod})
+
+    CreateJobCommand.run(args)
+
+    body = mock_create.call_args.args[0]
+    assert body["spec"]["completionMode"] == "Indexed"
+    assert body["spec"]["completions"] == 8
+    assert body["spec"]["parallelism"] == 2
+    script = body["spec"]["template"]["spec"]["containers"][0]["command"][2]
+    assert "workdir=job-v100-sweep/$JOB_COMPLETION_INDEX" in script
+    assert "$workdir devpod:" in script and "/jobs/job-v100-sweep/" in script
+
+
+def test_invalid_array(args: argparse.Namespace):
+    args.gpu = "v100"
+    args.command = ["true"]
+    args.array = -1
+    with pytest.raises(SystemExit) as err:
+        CreateJobCommand.run(args)
+
+    assert "--array must be a positive number" in err.value.code
+
+
+@mock.patch("batchtools.br.write_pod_logs")
+@mock.patch("batchtools.br.wait_for_job", return_value="Complete")
 @mock.patch("openshift_client.selector", name="selector")
-def test_log_job_output_timeout_deletes_job(
-    mock_selector, mock_get_pod_status, mock_oc_delete, capsys
+def test_log_array_output_in_index_order(
+    mock_selector, mock_wait_for_job, mock_write_logs, capsys
 ):
-    pod = DictToObject({"model": {"metadata": {"name": "pod-timeout"}}})
-    mock_selector.return_value = mock.Mock(**{"objects.return_value": [pod]})
+    def member(name: str, index: str):
+        pod = DictToObject(
+            {
+                "model": {
+                    "metadata": {"name": name, "annotations": {}},
+                    "status": {"phase": "Succeeded"},
+                }
+            }
+        )
+        pod.model.metadata.annotations = {
+            "batch.kubernetes.io/job-completion-index": index
+        }
+        return pod
 
-    # make time.monotonic jump past the timeout quickly
-    times = [0.0, 2.0]
+    pods = [member("pod-b", "10"), member("pod-a", "2")]
+    mock_selector.return_value = mock.Mock(**{"objects.return_value": pods})
 
-    def fake_monotonic():
-        return times.pop(0) if times else 2.0
+    log_array_output("job-sweep", timeout=None)
+
+    out = capsys.readouterr().out
+    assert "finished with condition=Complete" in out
+    assert out.index("index 2 (pod-a") < out.index("index 10 (pod-b")
 
-    with (
-        mock.patch("time.monotonic", side_effect=fake_monotonic),
-        mock.patch("time.sleep", return_value=None),
-    ):
-        log_job_output("job-timeout", wait=True, timeout=1)
+
+@mock.patch("openshift_client.create", name="create")
+@mock.patch("openshift_client.selector", name="selector")
+@mock.patch("socket.gethostname", name="gethostname")
+@mock.patch("os.getcwd", name="getcwd")
+def test_create_jobs_from_file(
+    mock_getcwd,
+    mock_gethostname,
+    mock_selector,
+    mock_create,
+    parser,
+    subparsers,
+    tmp_path,
+    capsys,
+    monkeypatch,
+):
+    monkeypatch.setattr(batchtools.build_yaml, "rsync_script", "{cmdline}")
+    commands = tmp_path / "commands.txt"
+    commands.write_text("./train --lr 0.1\n\n# a comment\n./train --lr 0.01\n./eval\n")
+    (tmp_path / "train").write_text("")
+
+    CreateJobCommand.build_parser(subparsers)
+    args = parser.parse_args(
+        ["br", "--from-file", str(commands), "--workers", "2", "--no-wait"]
+    )
+
+    mock_getcwd.return_value = str(tmp_path)
+    mock_gethostname.return_value = "devpod"
+    devpod = DictToObject(
+        {
+            "model": {
+                "metadata": {"name": "devpod"},
+                "spec": {"containers": [{"name": "c"}]},
+            }
+        }
+    )
+    mock_selector.return_value = mock.Mock(**{"object.return_value": devpod})
+
+    CreateJobCommand.run(args)
+
+    # the dev pod is looked up once for the whole batch
+    mock_selector.assert_called_once_with("pod/devpod")
+
+    bodies = [c.args[0] for c in mock_create.call_args_list]
+    names = {body["metadata"]["name"] for body in bodies}
+    assert len(names) == 3
+    cmdlines = [
+        b["spec"]["template"]["spec"]["containers"][0]["command"][2] for b in bodies
+    ]
+    assert sorted(cmdlines) == [
+        "./eval",
+        "./train --lr 0.01",
+        "./train --lr 0.1",
+    ]
+    for name in names:
+        getlist = tmp_path / "jobs" / name / "getlist"
+        assert getlist.read_text() == "./commands.txt\n./train\n"
+
+    assert "Submitted 3 job(s), 0 failed." in capsys.readouterr().out
+
+
+def test_job_ids_are_unique():
+    from batchtools.br import job_ids
+
+    first, second = job_ids(), job_ids()
+    ids = [next(first) for _ in range(100)] + [next(second) for _ in range(100)]
+    assert len(set(ids)) == len(ids)
+
+
+@mock.patch("batchtools.br.oc_delete", name="oc_delete")
+@mock.patch("batchtools.br.wait_for_pod", name="wait_for_pod")
+def test_log_job_output_not_admitted(
+    mock_wait_for_pod, mock_oc_delete, admitted, capsys
+):
+    """A job that Kueue never admits is abandoned without looking for pods."""
+
+    def still_queued(job_name, *, timeout, report):
+        report("v100-localqueue", 3)
+        report("v100-localqueue", 2)
+        return None
+
+    admitted.side_effect = still_queued
+    log_job_output("job-a", wait=True, timeout=10)
 
     out = capsys.readouterr().out
-    assert "Timeout waiting for pod pod-timeout to complete" in out
-    mock_oc_delete.assert_called_once_with("job", "job-timeout")
+    assert "Job job-a is pending in v100-localqueue: position 3" in out
+    assert "position 2" in out
+    assert "Timeout waiting for job job-a to be admitted" in out
+    mock_wait_for_pod.assert_not_called()
+    mock_oc_delete.assert_called_once_with("job", "job-a")
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from batchtools.backend import get_backend
+
+from batchtools.batchtools import BatchTools
+from batchtools.bw import EXIT_FAILED
+from batchtools.bw import EXIT_TIMEOUT
+from batchtools.bw import JobTracker
+from tests.fakeapi import FAST
+
+
+def run(*argv: str) -> None:
+    BatchTools().run(list(argv))
+
+
+def br(name: str, command: str = "true") -> None:
+    run(
+        "br",
+        "--gpu",
+        "none",
+        "--no-context",
+        "--no-wait",
+        "--name",
+        name,
+        "--job-id",
+        "1",
+        command,
+    )
+
+
+def finished(name: str, condition: str | None) -> dict:
+    conditions = [{"type": condition, "status": "True"}] if condition else []
+    return {"metadata": {"name": name}, "status": {"conditions": conditions}}
+
+
+def test_tracker_stops_after_count_or_failure(capsys):
+    tracker = JobTracker(["a", "b", "c"], count=2, fail_fast=False)
+    assert tracker.check(finished("a", None)) is None
+    assert tracker.check(finished("a", "Complete")) is None
+    assert tracker.check(finished("other", "Complete")) is None
+    assert tracker.check(finished("b", "Failed")) is True
+    assert tracker.failed() == ["b"]
+
+    tracker = JobTracker(["a", "b"], count=0, fail_fast=True)
+    assert tracker.check(finished("a", "Failed")) is True
+    assert tracker.pending == {"b"}
+    assert "[1/2] a: Failed" in capsys.readouterr().out
+
+
+def test_tracker_counts_deleted_jobs_as_not_found(capsys):
+    tracker = JobTracker(["a", "b", "c"], count=0, fail_fast=False)
+    tracker.update("DELETED", [finished("a", None)])
+    tracker.update("DELETED", [finished("b", "Complete")])
+    tracker.update("SYNC", [finished("b", None)])
+    assert tracker.finished == {"a": "NotFound", "b": "Complete", "c": "NotFound"}
+    assert tracker.done()
+
+
+def test_bw_waits_for_own_jobs(server, capsys):
+    br("a")
+    br("b")
+    run("bw")
+    out = capsys.readouterr().out
+
+    assert "Waiting for 2 of 2 job(s)..." in out
+    assert "a-none-1: Complete" in out and "b-none-1: Complete" in out
+    assert "2 job(s) complete, 0 failed" in out
+
+
+def test_bw_reports_failures(server, capsys):
+    br("ok")
+    br("bad", "exit 3")
+    with pytest.raises(SystemExit) as e:
+        run("bw", "ok-none-1", "bad-none-1", "missing")
+    assert e.value.code == EXIT_FAILED
+    out = capsys.readouterr().out
+    assert "missing: NotFound" in out
+    assert "bad-none-1: Failed" in out
+    assert "1 job(s) complete, 2 failed" in out
+
+
+def test_bw_fails_when_a_job_is_deleted(server, capsys):
+    server.cluster.timetable = FAST._replace(run=30)
+    br("slow")
+    backend = get_backend()
+    threading.Timer(0.5, backend.delete, ("job", "slow-none-1")).start()
+    with pytest.raises(SystemExit) as e:
+        run("bw", "--timeout", "10")
+    assert e.value.code == EXIT_FAILED
+    assert "slow-none-1: NotFound" in capsys.readouterr().out
+
+
+def test_bw_times_out(server, capsys):
+    server.cluster.timetable = FAST._replace(run=30)
+    br("slow")
+    with pytest.raises(SystemExit) as e:
+        run("bw", "-l", "batchtools/owner", "--timeout", "1")
+    assert e.value.code == EXIT_TIMEOUT
+    assert "still waiting for: slow-none-1" in capsys.readouterr().out
+
+
+def test_bw_rejects_unsupported_selectors(server, capsys):
+    with pytest.raises(SystemExit):
+        run("bw", "-l", "a in (b)")
+    assert "unsupported label selector term" in capsys.readouterr().err
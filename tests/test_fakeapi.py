@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+
+from batchtools.backend import get_backend
+from batchtools.batchtools import BatchTools
+from batchtools.wait import wait_for_job
+from batchtools.wait import wait_for_pod
+from tests.fakeapi import FAST
+
+
+def run(*argv: str) -> None:
+    BatchTools().run(list(argv))
+
+
+def test_br_runs_a_job_to_completion(server, capsys, tmp_path):
+    """br waits for the job, streams its log, archives it and deletes the job."""
+    run("br", "--no-context", "--job-id", "1", "echo", "hi")
+    out = capsys.readouterr().out
+
+    assert "job-v100-1-" in out and ": started" in out
+    assert "finished with phase=Succeeded" in out
+    assert (tmp_path / "jobs" / "job-v100-1" / "logs-index.json").exists()
+    assert not server.cluster.objects["jobs"]
+    assert not server.cluster.objects["workloads"]
+
+
+def test_commands_see_queued_jobs(server, capsys):
+    """With one GPU of quota, the second job waits in the queue."""
+    server.cluster.timetable = FAST._replace(run=30)
+    for name in ("a", "b"):
+        run("br", "--no-context", "--no-wait", "--name", name, "--job-id", "1", "x")
+    assert wait_for_pod("a-v100-1", timeout=5, phases=("Running",))
+    capsys.readouterr()
+
+    run("bq")
+    run("bps")
+    run("bj")
+    out = capsys.readouterr().out
+    assert "v100-clusterqueue\tadmitted: 1\tpending: 1" in out
+    assert "BUSY 1 default/a-v100-1-" in out
+    assert "Found 2 job(s)" in out
+
+    run("bd")
+    assert "Deleted 2 job(s)" in capsys.readouterr().out
+    run("bj")
+    assert "No jobs found." in capsys.readouterr().out
+    assert not server.cluster.objects["workloads"]
+
+
+def test_admission_follows_quota(server):
+    """Kueue admits the second job only once the first gives its GPU back."""
+    backend = get_backend()
+    for name in ("first", "second"):
+        backend.create(
+            {
+                "apiVersion": "batch/v1",
+                "kind": "Job",
+                "metadata": {
+                    "name": name,
+                    "labels": {"kueue.x-k8s.io/queue-name": "v100-localqueue"},
+                },
+                "spec": {
+                    "template": {
+                        "spec": {
+                            "containers": [
+                                {
+                                    "name": "c",
+                                    "resources": {"requests": {"nvidia.com/gpu": "1"}},
+                                }
+                            ]
+                        }
+                    }
+                },
+            }
+        )
+
+    assert wait_for_job("first", timeout=5) == "Complete"
+    assert wait_for_job("second", timeout=5) == "Complete"
+
+    workloads = {
+        wl["metadata"]["ownerReferences"][0]["name"]: wl
+        for wl in (w.as_dict() for w in backend.list_objects("workloads"))
+    }
+    admitted = {
+        name: next(
+            c["lastTransitionTime"]
+            for c in wl["status"]["conditions"]
+            if c["type"] == "Admitted"
+        )
+        for name, wl in workloads.items()
+    }
+    finished_first = next(
+        c["lastTransitionTime"]
+        for c in workloads["first"]["status"]["conditions"]
+        if c["type"] == "Finished"
+    )
+    assert admitted["second"] >= finished_first
+
+
+def test_lists_are_paged_and_filtered(server):
+    backend = get_backend()
+    for i in range(5):
+        backend.create(
+            {
+                "apiVersion": "batch/v1",
+                "kind": "Job",
+                "metadata": {"name": f"plain-{i}", "labels": {"n": str(i % 2)}},
+                "spec": {"template": {"spec": {"containers": [{"name": "c"}]}}},
+            }
+        )
+    names = [
+        job.model.metadata.name
+        for job in backend.iter_objects("jobs", labels={"n": "1"}, page_size=1)
+    ]
+    assert names == ["plain-1", "plain-3"]
+
+    pods = backend.list_objects("pods", labels={"job-name": None})
+    assert [p.model.metadata.name for p in pods] == [server.cluster.dev_pod]
+
+
+def test_runs_as_a_subprocess(tmp_path):
+    kubeconfig = str(tmp_path / "kubeconfig")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "tests.fakeapi", "--kubeconfig", kubeconfig],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert server.stdout.readline().startswith("http://127.0.0.1:")
+        result = subprocess.run(
+            [sys.executable, "-m", "batchtools.batchtools", "bq"],
+            cwd=root,
+            env=dict(os.environ, KUBECONFIG=kubeconfig),
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    assert result.returncode == 0, result.stderr
+    assert "v100-clusterqueue\tadmitted: 0\tpending: 0" in result.stdout
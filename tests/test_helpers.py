@@ -0,0 +1,90 @@
+import argparse
+import base64
+import json
+import time
+from unittest import mock
+
+import pytest
+
+from batchtools.backend import ApiError
+from batchtools.backend import KubeConfig
+from batchtools.helpers import current_user
+from batchtools.helpers import is_logged_in
+from batchtools.helpers import job_owner
+from batchtools.helpers import label_value
+from batchtools.helpers import parse_duration
+
+
+def jwt(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"header.{payload.decode()}.signature"
+
+
+@mock.patch("batchtools.helpers.get_backend")
+def test_logged_in_with_unexpired_jwt(mock_get_backend):
+    config = KubeConfig("https://api", token=jwt({"exp": time.time() + 60}))
+    with mock.patch.object(KubeConfig, "load", return_value=config):
+        assert is_logged_in()
+    mock_get_backend.assert_not_called()
+
+
+@mock.patch("batchtools.helpers.get_backend")
+def test_not_logged_in_with_expired_jwt(mock_get_backend):
+    config = KubeConfig("https://api", token=jwt({"exp": time.time() - 60}))
+    with mock.patch.object(KubeConfig, "load", return_value=config):
+        assert not is_logged_in()
+    mock_get_backend.assert_not_called()
+
+
+@mock.patch("openshift_client.invoke")
+def test_whoami_result_is_cached(mock_invoke):
+    mock_invoke.return_value.out.return_value = "student\n"
+    assert is_logged_in()
+    assert is_logged_in()
+    mock_invoke.assert_called_once_with("whoami")
+
+
+@mock.patch("openshift_client.invoke")
+def test_current_user_is_remembered(mock_invoke):
+    mock_invoke.return_value.out.return_value = "student\n"
+    assert is_logged_in()
+    assert current_user() == "student"
+    assert job_owner() == "student"
+    mock_invoke.assert_called_once_with("whoami")
+
+
+@mock.patch("batchtools.helpers.get_backend")
+def test_failed_whoami_is_not_cached(mock_get_backend):
+    mock_get_backend.return_value.whoami.side_effect = ApiError("Unauthorized")
+    assert not is_logged_in()
+    assert not is_logged_in()
+    assert mock_get_backend.return_value.whoami.call_count == 2
+
+
+def test_label_value():
+    assert label_value("jdoe@bu.edu") == "jdoe_bu.edu"
+    assert label_value("system:serviceaccount:ns:sa") == "system_serviceaccount_ns_sa"
+    assert label_value("-" + "x" * 70) == "x" * 62
+
+
+def test_parse_duration():
+    assert parse_duration("90") == 90
+    assert parse_duration("15m") == 900
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("2d") == 2 * 24 * 3600
+    for text in ("", "5x", "m5", "1h 30m"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_duration(text)
+
+
+def test_parse_label_selector():
+    from batchtools.helpers import parse_label_selector
+
+    assert parse_label_selector("app=train, tier==gpu,owner,!skip") == {
+        "app": "train",
+        "tier": "gpu",
+        "!owner": None,
+        "skip": None,
+    }
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_label_selector("app!=train")
@@ -0,0 +1,116 @@
+import argparse
+import time
+
+from batchtools import history
+from batchtools.bhist import HistoryCommand
+from batchtools.bhist import HistoryCommandArgs
+from batchtools.timings import ClusterTimes
+
+WEEK = 7 * 24 * 3600
+
+
+def submit(name: str, *, gpu: str, user: str, at: float, wait: float, run: float):
+    history.record_submission(
+        name,
+        user=user,
+        queue=f"{gpu}-localqueue",
+        gpu=gpu,
+        gpus=2,
+        image="image",
+        command="./train",
+        submitted_at=at,
+    )
+    # the cluster creates the job a little after br submits it
+    times = ClusterTimes(
+        created=at + 3,
+        admitted=at + 3 + wait,
+        started=at + 3 + wait + 10,
+        finished=at + 3 + wait + 10 + run,
+        phase="Complete",
+    )
+    history.record_completion(name, times, context_bytes=1024)
+
+
+def test_history_path(tmp_path, monkeypatch):
+    assert history.history_path() == str(tmp_path / "data/batchtools/history.db")
+    monkeypatch.setenv("BATCHTOOLS_HISTORY", str(tmp_path / "h.db"))
+    assert history.history_path() == str(tmp_path / "h.db")
+
+
+def test_record_and_aggregate():
+    now = time.time()
+    for i, wait in enumerate([10, 20, 30, 40, 100]):
+        submit(f"job-{i}", gpu="v100", user="alice", at=now - 3600, wait=wait, run=1800)
+    submit("job-a100", gpu="a100", user="bob", at=now - 3600, wait=5, run=3600)
+    # submitted but never completed
+    history.record_submission(
+        "job-lost", user="bob", queue="q", gpu="h100", gpus=1, image="i", command="c"
+    )
+
+    with history.connect() as conn:
+        waits = history.queue_waits(conn, now - WEEK)
+        usage = history.gpu_hours(conn, now - WEEK)
+        (row,) = conn.execute(
+            "SELECT context_bytes, phase FROM jobs WHERE name = 'job-0'"
+        ).fetchall()
+
+    assert sorted(waits["v100"]) == [10, 20, 30, 40, 100]
+    assert waits["a100"] == [5]
+    assert "h100" not in waits
+    assert {(user, round(hours, 2)) for _, user, hours in usage} == {
+        ("alice", 5.0),
+        ("bob", 2.0),
+    }
+    assert row == (1024, "Complete")
+
+
+def test_queue_wait_falls_back_to_submission_time(tmp_path, monkeypatch):
+    import sqlite3
+
+    path = tmp_path / "old.db"
+    monkeypatch.setenv("BATCHTOOLS_HISTORY", str(path))
+    # a database from before the creation time was recorded
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (name TEXT PRIMARY KEY, user TEXT, queue TEXT, gpu TEXT,"
+        " gpus INTEGER, image TEXT, command TEXT, context_bytes INTEGER,"
+        " submitted_at REAL, admitted_at REAL, started_at REAL, finished_at REAL,"
+        " phase TEXT)"
+    )
+    now = time.time()
+    conn.execute(
+        "INSERT INTO jobs (name, gpu, submitted_at, admitted_at)"
+        " VALUES ('old', 'v100', ?, ?)",
+        (now - 60, now - 20),
+    )
+    conn.commit()
+    conn.close()
+
+    submit("new", gpu="v100", user="alice", at=now - 60, wait=15, run=60)
+
+    with history.connect() as conn:
+        waits = history.queue_waits(conn, now - WEEK)
+    assert sorted(waits["v100"]) == [15, 40]
+
+
+def test_bhist_report(capsys):
+    now = time.time()
+    submit("old", gpu="v100", user="alice", at=now - 10 * WEEK, wait=999, run=60)
+    for i, wait in enumerate([10, 20, 30, 40, 100]):
+        submit(f"job-{i}", gpu="v100", user="alice", at=now - 3600, wait=wait, run=60)
+
+    args = HistoryCommandArgs()
+    args.jobs = 2
+    HistoryCommand.run(args)
+
+    out = capsys.readouterr().out
+    v100 = next(line for line in out.splitlines() if line.startswith("v100"))
+    # the old job is outside of the default period
+    assert v100.split() == ["v100", "5", "30s", "100s"]
+    assert "alice" in out
+    assert "Recent jobs:" in out
+
+
+def test_bhist_empty(capsys):
+    HistoryCommand.run(argparse.Namespace(since=3600, jobs=0))
+    assert "No jobs recorded in this period." in capsys.readouterr().out
@@ -0,0 +1,142 @@
+import io
+from unittest import mock
+
+from batchtools.backend import LogLimits
+from batchtools.logs import follow_pod_logs
+from batchtools.logs import write_pod_logs
+from batchtools.records import PodRecord
+
+
+def fake_process(stdout: bytes, returncode: int = 0, stderr: bytes = b""):
+    proc = mock.Mock()
+    proc.stdout = io.BufferedReader(io.BytesIO(stdout))
+    proc.returncode = returncode
+    proc.communicate.return_value = (b"", stderr)
+    return proc
+
+
+def test_follow_strips_timestamps():
+    out = io.BytesIO()
+    proc = fake_process(
+        b"2025-01-01T00:00:01.5Z hello\n2025-01-01T00:00:02Z world\n",
+    )
+    with mock.patch("subprocess.Popen", return_value=proc) as popen:
+        follow_pod_logs("pod-1", out=out)
+
+    assert out.getvalue() == b"hello\nworld\n"
+    cmd = popen.call_args.args[0]
+    assert "-f" in cmd and "--timestamps" in cmd and "pod/pod-1" in cmd
+
+
+def test_follow_resumes_after_disconnect(capsys):
+    out = io.BytesIO()
+    first = fake_process(
+        b"2025-01-01T00:00:01.1Z one\n2025-01-01T00:00:01.12Z two\n",
+        returncode=1,
+    )
+    # the server only has second precision for sinceTime, so the resumed
+    # stream repeats lines we have already printed
+    second = fake_process(
+        b"2025-01-01T00:00:01.1Z one\n"
+        b"2025-01-01T00:00:01.12Z two\n"
+        b"2025-01-01T00:00:03Z three\n",
+    )
+    with (
+        mock.patch("subprocess.Popen", side_effect=[first, second]) as popen,
+        mock.patch("time.sleep", return_value=None),
+    ):
+        follow_pod_logs("pod-1", out=out)
+
+    assert out.getvalue() == b"one\ntwo\nthree\n"
+    assert "--since-time=2025-01-01T00:00:01.12Z" in popen.call_args.args[0]
+    assert "reconnecting" in capsys.readouterr().err
+
+
+def test_follow_long_lines_are_chunked():
+    out = io.BytesIO()
+    line = b"x" * 200_000
+    proc = fake_process(b"2025-01-01T00:00:01Z " + line + b"\n")
+    with (
+        mock.patch("subprocess.Popen", return_value=proc),
+        mock.patch("batchtools.logs.LOG_CHUNK_SIZE", 1024),
+    ):
+        follow_pod_logs("pod-1", out=out)
+
+    assert out.getvalue() == line + b"\n"
+
+
+def test_follow_gives_up_after_retries(capsys):
+    procs = [fake_process(b"", returncode=1, stderr=b"boom") for _ in range(10)]
+    with (
+        mock.patch("subprocess.Popen", side_effect=procs),
+        mock.patch("time.sleep", return_value=None),
+    ):
+        follow_pod_logs("pod-1", out=io.BytesIO())
+
+    assert "Error occurred while streaming logs for pod-1: boom" in (
+        capsys.readouterr().err
+    )
+
+
+def test_follow_limits_apply_to_first_connection(capsys):
+    out = io.BytesIO()
+    first = fake_process(b"2025-01-01T00:00:01Z one\n", returncode=1)
+    second = fake_process(b"2025-01-01T00:00:02Z two\n")
+    limits = LogLimits(tail=10, since=300, limit_bytes=100)
+    with (
+        mock.patch("subprocess.Popen", side_effect=[first, second]) as popen,
+        mock.patch("time.sleep", return_value=None),
+    ):
+        follow_pod_logs("pod-1", out=out, limits=limits)
+
+    assert out.getvalue() == b"one\ntwo\n"
+    first_cmd, second_cmd = (c.args[0] for c in popen.call_args_list)
+    assert {"--tail=10", "--since=300s"} <= set(first_cmd)
+    # the resumed stream continues from the last line
+    assert "--since-time=2025-01-01T00:00:01Z" in second_cmd
+    assert not any(arg.startswith(("--tail", "--since=")) for arg in second_cmd)
+    # the byte limit is ours to apply, the timestamps would count against it
+    assert not any(arg.startswith("--limit-bytes") for arg in first_cmd + second_cmd)
+
+
+def test_follow_limit_bytes_counts_the_log_only():
+    out = io.BytesIO()
+    first = fake_process(b"2025-01-01T00:00:01Z one\n", returncode=1)
+    second = fake_process(
+        b"2025-01-01T00:00:02Z two\n2025-01-01T00:00:03Z three and more\n"
+    )
+    with (
+        mock.patch("subprocess.Popen", side_effect=[first, second]),
+        mock.patch("time.sleep", return_value=None),
+    ):
+        follow_pod_logs("pod-1", out=out, limits=LogLimits(limit_bytes=12))
+
+    # 12 bytes of log across both connections, and the cut line is ended
+    assert out.getvalue() == b"one\ntwo\nthre\n"
+
+
+def test_write_pod_logs_copies_each_container_in_chunks():
+    pod = PodRecord("pod-1", containers=("main", "sidecar"))
+    out = mock.Mock(wraps=io.BytesIO())
+    line = b"x" * 5000
+    procs = [
+        fake_process(line + b"\n" + b"no newline at the end"),
+        fake_process(b"", returncode=1, stderr=b"container not found"),
+    ]
+    with (
+        mock.patch("subprocess.Popen", side_effect=procs) as popen,
+        mock.patch("batchtools.logs.LOG_CHUNK_SIZE", 1024),
+    ):
+        write_pod_logs(pod, out, limits=LogLimits(tail=5))
+
+    assert out.getvalue() == (
+        b"==> pod-1/main <==\n"
+        + line
+        + b"\nno newline at the end\n"
+        + b"==> pod-1/sidecar <==\n"
+        + b"Error occurred while retrieving logs: container not found\n"
+    )
+    # the log was never written in one piece
+    assert max(len(c.args[0]) for c in out.write.call_args_list) <= 1024
+    assert "--container=main" in popen.call_args_list[0].args[0]
+    assert "--tail=5" in popen.call_args_list[0].args[0]
@@ -0,0 +1,107 @@
+import math
+from unittest import mock
+
+import pytest
+
+from batchtools import queues
+from batchtools.backend import ApiError
+from batchtools.batchtools import BatchTools
+from batchtools.queues import QueuePicker
+from batchtools.queues import QueueStatus
+from batchtools.queues import gpus_reserved
+from batchtools.queues import parse_gpu_choice
+from batchtools.wait import wait_for_pod
+
+
+def test_parse_gpu_choice():
+    assert parse_gpu_choice("none") == ["none"]
+    assert parse_gpu_choice("auto") == ["v100", "a100", "h100"]
+    assert parse_gpu_choice("a100, v100,a100") == ["a100", "v100"]
+    with pytest.raises(ValueError, match="t4"):
+        parse_gpu_choice("v100,t4")
+    with pytest.raises(ValueError):
+        parse_gpu_choice("none,v100")
+
+
+def test_estimate():
+    status = QueueStatus("v100", quota=4, used=3, pending=2, run_seconds=600)
+    assert status._replace(pending=0).estimate(1) == 0.0
+    # two GPUs must be freed, at four GPUs per run time
+    assert status.estimate(1) == 300.0
+    assert math.isinf(status.estimate(5))
+    assert math.isinf(status._replace(quota=0).estimate(0))
+
+
+def test_gpus_reserved():
+    assert gpus_reserved({"status": {"reservingWorkloads": 2}}) == 2
+    cq = {
+        "status": {
+            "reservingWorkloads": 2,
+            "flavorsReservation": [
+                {"resources": [{"name": "cpu", "total": "8"}]},
+                {"resources": [{"name": "nvidia.com/gpu", "total": "6"}]},
+            ],
+        }
+    }
+    assert gpus_reserved(cq) == 6
+
+
+def test_picker_spreads_jobs_and_caches_status(server):
+    with mock.patch(
+        "batchtools.queues.fetch_queue_status", wraps=queues.fetch_queue_status
+    ) as fetch:
+        picker = QueuePicker(["a100", "v100"])
+        picks = [picker.pick(1)[0] for _ in range(3)]
+        # another br run shares the cached status and the jobs placed so far
+        gpu, estimates = QueuePicker(["v100", "a100"]).pick(1)
+
+    # one GPU of quota each: ties go to the first preference
+    assert picks == ["a100", "v100", "a100"]
+    assert gpu == "v100"
+    assert estimates == {"v100": 900.0, "a100": 1800.0}
+    fetch.assert_called_once()
+
+
+def test_picker_keeps_its_status_without_the_cache_file(server):
+    with (
+        mock.patch(
+            "batchtools.queues.fetch_queue_status", wraps=queues.fetch_queue_status
+        ) as fetch,
+        mock.patch.object(QueuePicker, "_save"),
+    ):
+        picker = QueuePicker(["a100", "v100"])
+        picks = [picker.pick(1)[0] for _ in range(3)]
+
+    assert picks == ["a100", "v100", "a100"]
+    fetch.assert_called_once()
+
+
+def test_br_from_file_reports_queue_status_errors(server, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("./a\n")
+    with (
+        mock.patch(
+            "batchtools.queues.fetch_queue_status", side_effect=ApiError("down")
+        ),
+        pytest.raises(SystemExit) as e,
+    ):
+        BatchTools().run(
+            ["br", "--gpu", "auto", "--no-context", "--from-file", str(commands)]
+        )
+    assert str(e.value.code) == "Error occurred while reading the queue status: down"
+    assert not server.cluster.objects["jobs"]
+
+
+def test_br_auto_avoids_the_busy_queue(server, capsys):
+    server.cluster.timetable = server.cluster.timetable._replace(run=30)
+    BatchTools().run(
+        ["br", "--gpu", "v100", "--no-context", "--no-wait", "--job-id", "1", "x"]
+    )
+    assert wait_for_pod("job-v100-1", timeout=5, phases=("Running",))
+
+    BatchTools().run(
+        ["br", "--gpu", "auto", "--no-context", "--no-wait", "--job-id", "2", "x"]
+    )
+    out = capsys.readouterr().out
+    assert "Choosing a100; expected wait: v100 " in out
+    assert "Creating job job-a100-2 in a100-localqueue..." in out
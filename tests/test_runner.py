@@ -0,0 +1,228 @@
+from unittest import mock
+
+import asyncio
+import io
+import json
+import threading
+
+import pytest
+
+from batchtools.backend import ApiError
+from batchtools.backend import WatchUnavailable
+from batchtools.batchtools import BatchTools
+from batchtools.build_yaml import build_job_body
+from batchtools.history import connect
+from batchtools.runner import JobResult
+from batchtools.runner import JobRunner
+from batchtools.runner import PodWatcher
+from batchtools.runner import PrefixedOutput
+from batchtools.runner import StageLimits
+from batchtools.runner import run_jobs
+from tests.fakeapi import FAST
+
+
+def job_body(name: str, gpu: str = "none") -> dict:
+    return build_job_body(
+        job_name=name,
+        queue_name="dummy-localqueue" if gpu == "none" else f"{gpu}-localqueue",
+        image="image",
+        container_name=f"{name}-container",
+        cmdline="true",
+        max_sec=60,
+        gpu=gpu,
+        gpu_req=1,
+        gpu_lim=1,
+        context=False,
+        devpod_name="",
+        devcontainer="",
+        context_dir="",
+        jobs_dir="",
+        getlist_path="",
+    )
+
+
+def test_prefixed_output_writes_whole_lines():
+    out = io.BytesIO()
+    shared = PrefixedOutput(out)
+    a, b = shared.stream("a"), shared.stream("b")
+    a.write(b"one\ntw")
+    b.write(b"three\n")
+    a.write(b"o\n")
+    b.write(b"unterminated")
+    b.close()
+    assert out.getvalue() == b"[a] one\n[b] three\n[a] two\n[b] unterminated\n"
+
+
+def test_run_jobs_to_completion(server, tmp_path):
+    out = io.BytesIO()
+    results = run_jobs(
+        [job_body(f"job-{i}") for i in range(3)],
+        out=out,
+        jobs_dir=str(tmp_path / "jobs"),
+    )
+
+    assert [r.name for r in results] == ["job-0", "job-1", "job-2"]
+    assert all(r.succeeded for r in results)
+    lines = out.getvalue().decode().splitlines()
+    for i, result in enumerate(results):
+        assert f"[job-{i}] {result.pod}: started" in lines
+        assert f"[job-{i}] pod {result.pod} finished with phase=Succeeded" in lines
+        index = json.loads(
+            (tmp_path / "jobs" / f"job-{i}" / "logs-index.json").read_text()
+        )
+        assert index["logs"][0]["pod"] == result.pod
+    assert not server.cluster.objects["jobs"]
+
+
+def test_timed_out_jobs_are_deleted(server):
+    """Even with delete=False, like br does when it gives up on a job."""
+    server.cluster.timetable = FAST._replace(run=30)
+    (result,) = run_jobs(
+        [job_body("slow")], timeout=0.5, delete=False, out=io.BytesIO()
+    )
+
+    # the pod was running, but not for long enough
+    assert result == JobResult("slow", result.pod, error="timeout")
+    assert result.pod is not None
+    assert not server.cluster.objects["jobs"]
+
+
+def test_hooks_and_limits(server):
+    """Jobs still run in order when only one may be in flight."""
+    events = []
+
+    class Recorder(JobRunner):
+        def on_created(self, job_name, body):
+            events.append(("created", job_name))
+
+        def on_finished(self, result):
+            events.append(("finished", result.name))
+
+    async def main():
+        async with Recorder(limits=StageLimits(jobs=1), out=io.BytesIO()) as runner:
+            return await runner.run_all(job_body(f"j{i}") for i in range(2))
+
+    results = asyncio.run(main())
+    assert [r.phase for r in results] == ["Succeeded", "Succeeded"]
+    assert events == [
+        ("created", "j0"),
+        ("finished", "j0"),
+        ("created", "j1"),
+        ("finished", "j1"),
+    ]
+
+
+def test_failing_jobs_get_a_result(server):
+    """An exception in one job is reported as its result and cleans it up."""
+
+    class Failing(JobRunner):
+        def on_finished(self, result):
+            if result.name == "bad":
+                raise RuntimeError("boom")
+
+    async def main():
+        async with Failing(out=io.BytesIO()) as runner:
+            return await runner.run_all([job_body("bad"), job_body("good")])
+
+    bad, good = asyncio.run(main())
+    assert bad == JobResult("bad", error="boom")
+    assert good.succeeded
+    assert not server.cluster.objects["jobs"]
+
+
+def test_jobs_in_flight_are_deleted_when_cancelled(server):
+    server.cluster.timetable = FAST._replace(run=30)
+    started = asyncio.Event()
+
+    class Runner(JobRunner):
+        def on_created(self, job_name, body):
+            self.loop.call_soon_threadsafe(started.set)
+
+    async def main():
+        async with Runner(out=io.BytesIO()) as runner:
+            runner.loop = asyncio.get_running_loop()
+            task = asyncio.create_task(runner.run_all([job_body("slow")]))
+            await asyncio.wait_for(started.wait(), 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert not server.cluster.objects["jobs"]
+
+
+def test_pod_watcher_polls_through_errors():
+    pod = {
+        "metadata": {"name": "p", "labels": {"job-name": "j"}},
+        "status": {"phase": "Succeeded"},
+    }
+    backend = mock.Mock()
+    backend.list_raw.side_effect = WatchUnavailable("no watch")
+    backend.list_objects.side_effect = [
+        ApiError("flaky"),
+        [mock.Mock(as_dict=lambda: pod)],
+    ]
+
+    async def main():
+        watcher = PodWatcher(asyncio.get_running_loop())
+        watcher.track("j")
+        watcher.start()
+        try:
+            return await watcher.wait(
+                "j",
+                phases=("Succeeded",),
+                deadline=asyncio.get_running_loop().time() + 5,
+            )
+        finally:
+            watcher.stop()
+
+    with (
+        mock.patch("batchtools.runner.get_backend", return_value=backend),
+        mock.patch("batchtools.runner.WATCH_RETRY_DELAY", 0.01),
+    ):
+        assert asyncio.run(main()) == ("p", "Succeeded")
+
+
+def test_br_runs_jobs_from_file(server, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("./a\n./b\n")
+
+    BatchTools().run(
+        ["br", "--gpu", "none", "--no-context", "--from-file", str(commands)]
+    )
+    out = capsys.readouterr().out
+
+    assert "Ran 2 job(s): 2 succeeded, 0 failed, 0 timed out." in out
+    assert out.count("finished with phase=Succeeded") == 2
+    assert not server.cluster.objects["jobs"]
+    with connect() as conn:
+        rows = conn.execute("SELECT command, phase FROM jobs ORDER BY command")
+        assert rows.fetchall() == [("./a", "Complete"), ("./b", "Complete")]
+
+
+def test_br_rejects_arrays_from_file_when_waiting(capsys):
+    with pytest.raises(SystemExit) as err:
+        BatchTools().run(["br", "--array", "3", "--from-file", "commands.txt"])
+    assert "--array with --from-file needs --no-wait" in str(err.value.code)
+
+
+def test_input_is_read_off_the_event_loop(server):
+    """The input may block until earlier jobs have finished."""
+    first_done = threading.Event()
+
+    class Runner(JobRunner):
+        def on_finished(self, result):
+            first_done.set()
+
+    def bodies():
+        yield job_body("first")
+        assert first_done.wait(5)
+        yield job_body("second")
+
+    async def main():
+        async with Runner(out=io.BytesIO()) as runner:
+            return await runner.run_all(bodies())
+
+    results = asyncio.run(main())
+    assert [r.name for r in results] == ["first", "second"]
+    assert all(r.succeeded for r in results)
@@ -0,0 +1,152 @@
+from unittest import mock
+
+from batchtools.backend import OcBackend
+from batchtools.startup import StartupBreakdown
+from batchtools.startup import admission_times
+from batchtools.startup import format_breakdowns
+from batchtools.startup import percentile
+from batchtools.startup import pull_times
+from batchtools.startup import startup_breakdowns
+
+
+def ts(seconds: int) -> str:
+    return f"2025-01-01T00:{seconds // 60:02d}:{seconds % 60:02d}Z"
+
+
+def make_pod(name: str, job: str, created: int) -> dict:
+    return {
+        "metadata": {
+            "name": name,
+            "creationTimestamp": ts(created),
+            "labels": {"job-name": job},
+        },
+        "spec": {"containers": [{"name": "main"}]},
+        "status": {
+            "conditions": [
+                {
+                    "type": "PodScheduled",
+                    "status": "True",
+                    "lastTransitionTime": ts(created + 2),
+                },
+                {
+                    "type": "Initialized",
+                    "status": "True",
+                    "lastTransitionTime": ts(created + 3),
+                },
+            ],
+            "containerStatuses": [
+                {
+                    "state": {
+                        "terminated": {
+                            "startedAt": ts(created + 33),
+                            "finishedAt": ts(created + 300),
+                        }
+                    }
+                }
+            ],
+        },
+    }
+
+
+def event(pod: str, reason: str, at: int) -> dict:
+    return {
+        "involvedObject": {"kind": "Pod", "name": pod},
+        "reason": reason,
+        "lastTimestamp": ts(at),
+    }
+
+
+def test_admission_times():
+    workload = {
+        "metadata": {
+            "creationTimestamp": ts(0),
+            "ownerReferences": [{"kind": "Job", "name": "job-a"}],
+        },
+        "status": {
+            "conditions": [
+                {"type": "Admitted", "status": "True", "lastTransitionTime": ts(45)}
+            ]
+        },
+    }
+    pending = {"metadata": {"creationTimestamp": ts(0)}, "status": {}}
+    assert admission_times([workload, pending]) == {"job-a": 45}
+
+
+def test_pull_times():
+    pulling = [event("p1", "Pulling", 10)]
+    pulled = [event("p1", "Pulled", 40), event("p2", "Pulled", 50)]
+    # p2's image was already on the node
+    assert pull_times(pulling, pulled) == {"p1": 30, "p2": 0}
+
+
+def test_percentile():
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 90) == 5.0
+    assert percentile(values, 100) == 5.0
+    assert percentile([7.0], 50) == 7.0
+
+
+def test_startup_breakdowns():
+    pods = [make_pod("job-a-1", "job-a", 60), make_pod("job-b-1", "job-b", 120)]
+    workloads = [
+        {
+            "metadata": {
+                "creationTimestamp": ts(0),
+                "ownerReferences": [{"kind": "Job", "name": "job-a"}],
+            },
+            "status": {
+                "conditions": [
+                    {"type": "Admitted", "status": "True", "lastTransitionTime": ts(59)}
+                ]
+            },
+        }
+    ]
+    events = {
+        "Pulling": [event("job-a-1", "Pulling", 63)],
+        "Pulled": [event("job-a-1", "Pulled", 90)],
+    }
+
+    def _selector(kind, **kwargs):
+        if kind == "events":
+            items = events[kwargs["field_selectors"]["reason"]]
+        else:
+            items = {"pods": pods, "workloads": workloads}[kind]
+        objects = [mock.Mock(**{"as_dict.return_value": item}) for item in items]
+        return mock.Mock(**{"objects.return_value": objects})
+
+    def _logs(cmd, **kwargs):
+        assert "--timestamps" in cmd and "--limit-bytes=256" in cmd
+        if cmd[1] == "pod/job-a-1":
+            return iter([f"{ts(60 + 43)} hello\n".encode()])
+        return iter([])
+
+    with (
+        mock.patch("openshift_client.selector", side_effect=_selector),
+        mock.patch.object(OcBackend, "_oc_lines", side_effect=_logs),
+    ):
+        breakdowns = startup_breakdowns(["job-a", "job-b"])
+
+    assert breakdowns == [
+        StartupBreakdown(
+            "job-a",
+            "job-a-1",
+            {"queue": 59, "scheduling": 2, "image_pull": 27, "rsync": 10, "run": 257},
+        ),
+        # no Workload, events or output: pull time is estimated from the
+        # Initialized condition, and the run starts with the container
+        StartupBreakdown(
+            "job-b", "job-b-1", {"scheduling": 2, "image_pull": 30, "run": 267}
+        ),
+    ]
+
+    report = format_breakdowns(breakdowns)
+    assert "job-a-1" in report
+    assert report.splitlines()[-1].split() == [
+        "max",
+        "59.0s",
+        "2.0s",
+        "30.0s",
+        "10.0s",
+        "267.0s",
+    ]
@@ -0,0 +1,114 @@
+import json
+from unittest import mock
+
+import pytest
+
+from batchtools.br import CreateJobCommand
+from batchtools.br import log_job_output
+from batchtools.timings import Timings
+from batchtools.timings import cluster_times
+from batchtools.timings import parse_timestamp
+from tests.helpers import DictToObject
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1970-01-01T00:01:00Z") == 60
+    assert parse_timestamp("") is None
+    assert parse_timestamp(None) is None
+    assert parse_timestamp("yesterday") is None
+
+
+def test_cluster_phases():
+    job = {
+        "metadata": {"creationTimestamp": "2025-01-01T00:00:00Z"},
+        "status": {"startTime": "2025-01-01T00:00:30Z"},
+    }
+    pods = [
+        {
+            "metadata": {"creationTimestamp": "2025-01-01T00:00:31Z"},
+            "status": {
+                "containerStatuses": [
+                    {
+                        "state": {
+                            "terminated": {
+                                "startedAt": "2025-01-01T00:01:31Z",
+                                "finishedAt": "2025-01-01T00:11:31Z",
+                            }
+                        }
+                    }
+                ]
+            },
+        }
+    ]
+    timings = Timings("job-a")
+    timings.add_cluster_phases(cluster_times(job, pods))
+    assert timings.seconds == {"admission": 30, "pending": 60, "run": 600}
+
+
+def test_cluster_phases_of_unfinished_job():
+    timings = Timings("job-a")
+    timings.add_cluster_phases(
+        cluster_times(
+            {"metadata": {"creationTimestamp": "2025-01-01T00:00:00Z"}, "status": {}},
+            [{"metadata": {}, "status": {"phase": "Running"}}],
+        )
+    )
+    assert timings.seconds == {}
+
+
+def test_report_and_write(tmp_path):
+    timings = Timings("job-a")
+    with mock.patch("time.monotonic", side_effect=[10.0, 12.5]):
+        with timings.phase("create"):
+            pass
+    timings.seconds["admission"] = 30.0
+
+    report = timings.report()
+    assert report.splitlines()[0] == "Timings for job-a:"
+    # phases are reported in pipeline order
+    assert report.index("create") < report.index("admission")
+
+    path = tmp_path / "jobs" / "timings.jsonl"
+    timings.write(str(path), gpu="v100")
+    timings.write(str(path), gpu="v100")
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[0])
+    assert record["job"] == "job-a"
+    assert record["gpu"] == "v100"
+    assert record["seconds"] == {"create": 2.5, "admission": 30.0}
+
+
+@mock.patch("batchtools.br.write_pod_logs")
+@mock.patch("batchtools.br.wait_for_pod", return_value=("pod-1", "Succeeded"))
+@mock.patch("batchtools.br.wait_for_admission", return_value="Admitted")
+@mock.patch("openshift_client.selector", name="selector")
+def test_log_fetch_is_timed(
+    mock_selector, mock_wait_for_admission, mock_wait_for_pod, mock_write_logs
+):
+    pod = DictToObject({"model": {"metadata": {"name": "pod-1"}}})
+    mock_selector.return_value = mock.Mock(**{"object.return_value": pod})
+
+    timings = Timings("job-a")
+    log_job_output("job-a", wait=True, timeout=30, timings=timings)
+    assert "log_fetch" in timings.seconds
+
+
+@mock.patch("batchtools.br.follow_pod_logs")
+@mock.patch("batchtools.br.wait_for_pod", return_value=("pod-1", "Succeeded"))
+@mock.patch("batchtools.br.wait_for_admission", return_value="Admitted")
+def test_streamed_logs_are_timed(
+    mock_wait_for_admission, mock_wait_for_pod, mock_follow_logs
+):
+    timings = Timings("job-a")
+    log_job_output("job-a", wait=True, timeout=30, follow=True, timings=timings)
+    mock_follow_logs.assert_called_once()
+    assert "log_fetch" in timings.seconds
+
+
+def test_timings_are_rejected_with_from_file(parser, subparsers):
+    CreateJobCommand.build_parser(subparsers)
+    args = parser.parse_args(["br", "--timings", "--from-file", "commands.txt"])
+    with pytest.raises(SystemExit) as err:
+        CreateJobCommand.run(args)
+    assert "--timings is not supported with --from-file" in str(err.value.code)
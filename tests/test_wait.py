@@ -0,0 +1,244 @@
+import json
+from unittest import mock
+
+import pytest
+
+from batchtools import wait
+from batchtools.backend import ApiError, OcBackend
+from batchtools.wait import wait_for_job, wait_for_pod
+
+
+def make_pod(name: str, phase: str, rv: str = "1") -> dict:
+    return {
+        "metadata": {"name": name, "resourceVersion": rv},
+        "status": {"phase": phase},
+    }
+
+
+def make_event(event_type: str, pod: dict) -> bytes:
+    return json.dumps({"type": event_type, "object": pod}).encode() + b"\n"
+
+
+@pytest.fixture
+def project():
+    with mock.patch("openshift_client.get_project_name", return_value="ns"):
+        yield
+
+
+def fake_raw(podlist: dict, *watch_streams: list[bytes]):
+    """Return an oc_raw_lines replacement: the first request is the list,
+    subsequent requests are successive watch connections."""
+    streams = list(watch_streams)
+    requested: list[str] = []
+
+    def _raw(cmd: list[str], **kwargs):
+        assert cmd[:2] == ["get", "--raw"]
+        path = cmd[2]
+        requested.append(path)
+        if "watch=1" not in path:
+            return iter([json.dumps(podlist).encode()])
+        return iter(streams.pop(0))
+
+    return _raw, requested
+
+
+def test_watch_returns_on_terminal_phase(project):
+    podlist = {"metadata": {"resourceVersion": "10"}, "items": []}
+    events = [
+        make_event("ADDED", make_pod("pod-1", "Pending", "11")),
+        make_event("MODIFIED", make_pod("pod-1", "Running", "12")),
+        make_event("MODIFIED", make_pod("pod-1", "Succeeded", "13")),
+    ]
+    raw, requested = fake_raw(podlist, events)
+    with mock.patch.object(OcBackend, "_oc_lines", side_effect=raw):
+        assert wait_for_pod("job-a", timeout=60) == ("pod-1", "Succeeded")
+
+    assert requested[0].startswith("/api/v1/namespaces/ns/pods?")
+    assert "labelSelector=job-name%3Djob-a" in requested[1]
+    assert "resourceVersion=10" in requested[1]
+
+
+def test_watch_already_finished(project):
+    podlist = {
+        "metadata": {"resourceVersion": "10"},
+        "items": [make_pod("pod-1", "Failed")],
+    }
+    raw, requested = fake_raw(podlist)
+    with mock.patch.object(OcBackend, "_oc_lines", side_effect=raw):
+        assert wait_for_pod("job-a", timeout=60) == ("pod-1", "Failed")
+    assert len(requested) == 1
+
+
+def test_watch_resumes_from_last_resource_version(project):
+    podlist = {"metadata": {"resourceVersion": "10"}, "items": []}
+    first = [make_event("ADDED", make_pod("pod-1", "Running", "15"))]
+    second = [make_event("MODIFIED", make_pod("pod-1", "Succeeded", "16"))]
+    raw, requested = fake_raw(podlist, first, second)
+    with mock.patch.object(OcBackend, "_oc_lines", side_effect=raw):
+        assert wait_for_pod("job-a", timeout=None) == ("pod-1", "Succeeded")
+    assert "resourceVersion=15" in requested[2]
+
+
+def test_watch_times_out(project):
+    podlist = {"metadata": {"resourceVersion": "10"}, "items": []}
+    raw, _ = fake_raw(podlist, [])
+    times = iter([0.0, 0.0, 100.0])
+    with (
+        mock.patch.object(OcBackend, "_oc_lines", side_effect=raw),
+        mock.patch("time.monotonic", side_effect=lambda: next(times)),
+    ):
+        assert wait_for_pod("job-a", timeout=30) is None
+
+
+@mock.patch("time.sleep", return_value=None)
+@mock.patch("openshift_client.selector", name="selector")
+def test_falls_back_to_polling(mock_selector, mock_sleep, project, capsys):
+    pods = iter(
+        [
+            make_pod("pod-1", "Pending", "1"),
+            make_pod("pod-1", "Pending", "1"),
+            make_pod("pod-1", "Running", "2"),
+            make_pod("pod-1", "Succeeded", "3"),
+        ]
+    )
+
+    def _objects():
+        return [mock.Mock(**{"as_dict.return_value": next(pods)})]
+
+    mock_selector.return_value = mock.Mock(**{"objects.side_effect": _objects})
+    with mock.patch.object(OcBackend, "_oc_lines", side_effect=ApiError("forbidden")):
+        assert wait_for_pod("job-a", timeout=None) == ("pod-1", "Succeeded")
+
+    assert "falling back to polling" in capsys.readouterr().out
+    intervals = [c.args[0] for c in mock_sleep.call_args_list]
+    # backoff grows while nothing changes and resets on a change
+    assert intervals[1] > intervals[0]
+    assert intervals[2] == wait.POLL_MIN_INTERVAL
+
+
+def test_wait_for_job_until_complete(project):
+    def make_job(rv: str, conditions: list[dict]) -> dict:
+        return {
+            "metadata": {"name": "job-a", "resourceVersion": rv},
+            "status": {"conditions": conditions},
+        }
+
+    joblist = {
+        "metadata": {"resourceVersion": "10"},
+        "items": [make_job("10", [])],
+    }
+    events = [
+        make_event(
+            "MODIFIED",
+            make_job("11", [{"type": "Complete", "status": "False"}]),
+        ),
+        make_event(
+            "MODIFIED",
+            make_job("12", [{"type": "Complete", "status": "True"}]),
+        ),
+    ]
+    raw, requested = fake_raw(joblist, events)
+    with mock.patch.object(OcBackend, "_oc_lines", side_effect=raw):
+        assert wait_for_job("job-a", timeout=60) == "Complete"
+
+    assert requested[0].startswith("/apis/batch/v1/namespaces/ns/jobs?")
+    assert "fieldSelector=metadata.name%3Djob-a" in requested[1]
+
+
+def make_workload(
+    name: str,
+    job: str,
+    *,
+    queue: str = "v100-localqueue",
+    created: str = "2026-01-01T00:00:00Z",
+    priority: int | None = None,
+    conditions: tuple[str, ...] = (),
+) -> dict:
+    return {
+        "metadata": {
+            "name": name,
+            "creationTimestamp": created,
+            "ownerReferences": [{"kind": "Job", "name": job}],
+        },
+        "spec": {"queueName": queue, "priority": priority},
+        "status": {"conditions": [{"type": c, "status": "True"} for c in conditions]},
+    }
+
+
+def test_queue_position_orders_by_priority_then_age():
+    from batchtools.wait import QueuePosition
+
+    tracker = QueuePosition("ours")
+    tracker.update(
+        "SYNC",
+        [
+            make_workload("old", "a", created="2026-01-01T00:00:00Z"),
+            make_workload("urgent", "b", created="2026-01-03T00:00:00Z", priority=10),
+            make_workload("other-queue", "c", queue="a100-localqueue"),
+            make_workload("running", "d", conditions=("QuotaReserved", "Admitted")),
+            make_workload("wl", "ours", created="2026-01-02T00:00:00Z"),
+        ],
+    )
+    assert (tracker.queue, tracker.state, tracker.position()) == (
+        "v100-localqueue",
+        "Pending",
+        3,
+    )
+
+    tracker.update("DELETED", [make_workload("old", "a")])
+    assert tracker.position() == 2
+    tracker.update(
+        "MODIFIED", [make_workload("urgent", "b", conditions=("QuotaReserved",))]
+    )
+    assert tracker.position() == 1
+    tracker.update("MODIFIED", [make_workload("wl", "ours", conditions=("Admitted",))])
+    assert tracker.state == "Admitted"
+    assert tracker.position() is None
+
+
+def test_br_reports_queue_position(server, capsys):
+    """With one GPU of quota, the second job waits for the first."""
+    from batchtools.batchtools import BatchTools
+
+    server.cluster.timetable = server.cluster.timetable._replace(run=0.5)
+    BatchTools().run(["br", "--no-context", "--no-wait", "--name", "a", "x"])
+    BatchTools().run(["br", "--no-context", "--job-id", "1", "--name", "b", "x"])
+
+    out = capsys.readouterr().out
+    assert "Job b-v100-1 is pending in v100-localqueue: position 1" in out
+    assert "Job b-v100-1 was admitted, waiting for its pod..." in out
+    assert "finished with phase=Succeeded" in out
+
+
+def test_br_stops_after_abandoning_a_job(server, capsys):
+    """A job that is never admitted is deleted once, with nothing else to do."""
+    from batchtools.batchtools import BatchTools
+
+    server.cluster.timetable = server.cluster.timetable._replace(run=30)
+    BatchTools().run(["br", "--no-context", "--no-wait", "--name", "a", "x"])
+    BatchTools().run(
+        ["br", "--no-context", "--job-id", "1", "--timeout", "1", "--name", "b", "x"]
+    )
+
+    out = capsys.readouterr().out
+    assert "Timeout waiting for job b-v100-1 to be admitted" in out
+    assert "Error" not in out
+    assert "RUNDIR" not in out
+    assert ("default", "b-v100-1") not in server.cluster.objects["jobs"]
+
+
+def test_failed_relist_falls_back_to_polling(capsys):
+    """The REST backend reports a failed relist as a plain ApiError."""
+    backend = mock.Mock()
+    backend.list_raw.side_effect = [([], "1"), ApiError("500 relist failed")]
+    backend.watch.return_value = iter([("ERROR", {"code": 410})])
+    done = make_pod("pod-1", "Succeeded")
+    fallback = mock.Mock(return_value=[mock.Mock(**{"as_dict.return_value": done})])
+
+    with mock.patch("batchtools.wait.get_backend", return_value=backend):
+        result = wait.wait_for(
+            "pods", {}, fallback, lambda pod: pod["metadata"]["name"], timeout=5
+        )
+
+    assert result == "pod-1"
+    assert "500 relist failed), falling back to polling" in capsys.readouterr().out